@@ -0,0 +1,192 @@
+"""Column-based workout statistics using NumPy (optional).
+
+Workouts are turned into three columns (day number, total seconds,
+exercise seconds) and every statistic is computed with array operations
+over those columns, which handles millions of workouts in well under a
+second. NumPy is only needed here; without it available() is False and
+the reports simply leave this section out.
+"""
+from array import array
+from datetime import date
+
+from workout_core import workout_seconds
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+PERCENTILES = (50, 75, 90, 95, 99)
+
+
+def available():
+    return np is not None
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("The analytics need NumPy: pip install numpy")
+
+
+class WorkoutColumns:
+    """Workouts as NumPy columns: int32 day numbers and int32 seconds"""
+    
+    def __init__(self, days, total_seconds, exercise_seconds):
+        require_numpy()
+        # int32 inputs (like a mapped archive) are used as they are, no copy
+        self.days = np.asarray(days, dtype=np.int32)
+        self.total_seconds = np.asarray(total_seconds, dtype=np.int32)
+        self.exercise_seconds = np.asarray(exercise_seconds, dtype=np.int32)
+    
+    @property
+    def dates(self):
+        """Days since 1970-01-01 as datetime64[D]"""
+        return self.days.astype(np.int64).astype("datetime64[D]")
+    
+    def __len__(self):
+        return len(self.days)
+
+
+class ColumnBuilder:
+    """Collects workouts one at a time into compact arrays
+    
+    Used while a report streams past, so only 12 bytes per workout are
+    kept instead of the dicts. Workouts without a readable date (an empty
+    or hand-edited "date") are left out and counted in `skipped`.
+    """
+    
+    def __init__(self):
+        self.days = array('i')
+        self.total_seconds = array('i')
+        self.exercise_seconds = array('i')
+        self.skipped = 0
+    
+    def add(self, workout):
+        try:
+            day = date.fromisoformat(workout.get("date") or "").toordinal()
+        except (TypeError, ValueError):
+            self.skipped += 1
+            return
+        total_seconds, exercise_seconds = workout_seconds(workout)
+        self.days.append(day - EPOCH_ORDINAL)
+        self.total_seconds.append(total_seconds)
+        self.exercise_seconds.append(exercise_seconds)
+    
+    def columns(self):
+        require_numpy()
+        return WorkoutColumns(np.frombuffer(self.days, dtype=np.int32),
+                              np.frombuffer(self.total_seconds, dtype=np.int32),
+                              np.frombuffer(self.exercise_seconds, dtype=np.int32))
+
+
+def concat_columns(parts):
+    """Join several WorkoutColumns into one"""
+    require_numpy()
+    return WorkoutColumns(np.concatenate([part.days for part in parts]),
+                          np.concatenate([part.total_seconds for part in parts]),
+                          np.concatenate([part.exercise_seconds for part in parts]))
+
+
+def _rolling_average(daily, window):
+    """Average per day over the last `window` days, for every day"""
+    sums = np.cumsum(daily, dtype=np.int64)
+    shifted = np.concatenate((np.zeros(window, dtype=np.int64), sums[:-window]))
+    return (sums - shifted[:len(sums)]) / window
+
+
+def _streaks(active):
+    """(longest, current) run of consecutive days with a workout"""
+    padded = np.concatenate(([0], active.astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+    starts, ends = edges[::2], edges[1::2]
+    if len(starts) == 0:
+        return 0, 0
+    lengths = ends - starts
+    current = int(lengths[-1]) if ends[-1] == len(active) else 0
+    return int(lengths.max()), current
+
+
+def analyze(columns):
+    """All the statistics in one go, as plain Python numbers"""
+    require_numpy()
+    if len(columns) == 0:
+        return {"workouts": 0}
+    
+    days = columns.days.astype(np.int64)
+    total = columns.total_seconds.astype(np.int64)
+    exercise = columns.exercise_seconds.astype(np.int64)
+    rest = np.maximum(total - exercise, 0)
+    
+    first_day = int(days.min())
+    offsets = days - first_day
+    span = int(offsets.max()) + 1
+    
+    # Daily totals are the base for the rolling averages and streaks
+    daily_seconds = np.bincount(offsets, weights=total, minlength=span)
+    daily_count = np.bincount(offsets, minlength=span)
+    
+    # Weeks start on Monday; 1970-01-01 was a Thursday
+    weeks = (days + 3) // 7
+    week_offsets = weeks - weeks.min()
+    week_seconds = np.bincount(week_offsets, weights=total)
+    week_count = np.bincount(week_offsets)
+    week_starts = ((np.arange(len(week_seconds)) + weeks.min()) * 7 - 3).astype("datetime64[D]")
+    
+    months = columns.dates.astype("datetime64[M]").astype(np.int64)
+    month_offsets = months - months.min()
+    month_seconds = np.bincount(month_offsets, weights=total)
+    month_exercise = np.bincount(month_offsets, weights=exercise)
+    month_rest = np.bincount(month_offsets, weights=rest)
+    month_count = np.bincount(month_offsets)
+    month_names = (np.arange(len(month_seconds)) + months.min()).astype("datetime64[M]")
+    
+    rolling_7 = _rolling_average(daily_seconds, 7)
+    rolling_30 = _rolling_average(daily_seconds, 30)
+    longest_streak, current_streak = _streaks(daily_count > 0)
+    percentiles = np.percentile(total, PERCENTILES)
+    
+    exercise_sum = int(exercise.sum())
+    return {
+        "workouts": len(columns),
+        "first_date": str(np.datetime64(first_day, "D")),
+        "last_date": str(np.datetime64(first_day + span - 1, "D")),
+        "total_seconds": int(total.sum()),
+        "exercise_seconds": exercise_sum,
+        "rest_seconds": int(rest.sum()),
+        "rest_to_exercise": float(rest.sum() / exercise_sum) if exercise_sum else None,
+        "weeks": [{"week_of": str(start), "workouts": int(c), "seconds": int(s)}
+                  for start, c, s in zip(week_starts, week_count, week_seconds) if c],
+        "months": [{"month": str(name), "workouts": int(c), "seconds": int(s),
+                    "rest_to_exercise": float(r / e) if e else None}
+                   for name, c, s, e, r in zip(month_names, month_count, month_seconds,
+                                               month_exercise, month_rest) if c],
+        "rolling_7_day_avg_seconds": float(rolling_7[-1]),
+        "rolling_30_day_avg_seconds": float(rolling_30[-1]),
+        "longest_streak_days": longest_streak,
+        "current_streak_days": current_streak,
+        "duration_percentiles_seconds": {f"p{p}": float(v) for p, v in zip(PERCENTILES, percentiles)},
+    }
+
+
+def format_section(result):
+    """Analytics as a report section"""
+    section = "DETAILED STATISTICS:\n"
+    section += "-" * 30 + "\n"
+    if result.get("workouts", 0) == 0:
+        return section + "No workouts to analyse.\n\n"
+    
+    ratio = result["rest_to_exercise"]
+    section += f"Rest to exercise ratio: {ratio:.2f}\n" if ratio is not None else ""
+    section += f"Average per day, 7 days to {result['last_date']}: {result['rolling_7_day_avg_seconds'] / 60:.1f} min\n"
+    section += f"Average per day, 30 days to {result['last_date']}: {result['rolling_30_day_avg_seconds'] / 60:.1f} min\n"
+    section += f"Longest streak: {result['longest_streak_days']} days\n"
+    section += f"Current streak: {result['current_streak_days']} days\n"
+    percentiles = ", ".join(f"{name} {seconds / 3600:.2f}h"
+                            for name, seconds in result["duration_percentiles_seconds"].items())
+    section += f"Workout length percentiles: {percentiles}\n"
+    section += "Weekly totals:\n"
+    for week in result["weeks"]:
+        section += f"   Week of {week['week_of']}: {week['workouts']} workouts, {week['seconds'] / 3600:.2f} hours\n"
+    section += "\n"
+    return section
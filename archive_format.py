@@ -0,0 +1,348 @@
+"""Compact binary format for archived months (.wka files).
+
+Layout (little endian):
+    
+    header   magic b"WKA1", record count (u64), meta length (u32), unused (u32)
+    meta     JSON of the top-level keys (archived_at, ...)
+    records  one fixed 48 byte record per workout, see RECORD
+    strings  UTF-8 notes and extra JSON, pointed to by offset/length
+
+Nothing is aligned: the records start right after the 20 byte header and
+the meta, and are read with packed little-endian structs and dtypes.
+
+A workout takes 48 bytes plus its notes instead of ~300 bytes of indented
+JSON, and the records can be memory-mapped and read as NumPy columns
+without copying. Anything a record can't represent exactly is kept as
+JSON in the string table, so converting from JSON is lossless.
+"""
+import json
+import mmap
+import os
+import struct
+from datetime import date, datetime, timedelta
+
+from workout_core import workout_seconds
+from workout_record import as_dict
+
+MAGIC = b"WKA1"
+HEADER = struct.Struct("<4sQII")
+# day, start, total, exercise, rest, saved_at_us, notes off/len, extra off/len, flags
+RECORD = struct.Struct("<iiiiiqIIIII")
+EXTENSION = ".wka"
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Record flags: which keys the original workout dict had
+HAS_START = 1
+HAS_TOTAL_SECONDS = 2
+HAS_EXERCISE_SECONDS = 4
+HAS_TOTAL_HOURS = 8
+HAS_EXERCISE_HOURS = 16
+HAS_REST = 32
+HAS_SAVED_AT = 64
+HAS_NOTES = 128
+MANUAL = 256
+INT_HOURS = 512
+FULL_JSON = 1024        # the extra JSON is the whole workout
+
+CORE_KEYS = ("date", "start_time", "total_seconds", "exercise_seconds",
+             "total_duration_hours", "exercise_duration_hours", "rest_seconds",
+             "saved_at", "notes", "manual_save")
+
+# NumPy view of RECORD, built on first use so plain reading doesn't need NumPy
+RECORD_FIELDS = [
+    ("day", "<i4"), ("start", "<i4"), ("total_seconds", "<i4"),
+    ("exercise_seconds", "<i4"), ("rest_seconds", "<i4"), ("saved_at_us", "<i8"),
+    ("notes_offset", "<u4"), ("notes_length", "<u4"),
+    ("extra_offset", "<u4"), ("extra_length", "<u4"), ("flags", "<u4"),
+]
+
+
+def _same(a, b):
+    """Equal, and with the same value types (so 0 and 0.0 differ)"""
+    return a == b and all(type(a[key]) is type(b[key]) for key in b)
+
+
+def encode_workout(workout, strings):
+    """Pack one workout into a record, adding its strings to the table"""
+    workout = as_dict(workout)
+    try:
+        return _encode_compact(workout, strings)
+    except (struct.error, TypeError, ValueError, OverflowError):
+        # Float or text durations, numbers beyond 32 bits, ...
+        return _encode_full_json(workout, strings)
+
+
+def _encode_full_json(workout, strings):
+    """A record that keeps the whole workout as JSON
+    
+    The day and seconds are still filled in where they fit, so the NumPy
+    columns can use them.
+    """
+    def int32(value):
+        return value if type(value) is int and -2**31 <= value < 2**31 else 0
+    try:
+        day = date.fromisoformat(workout["date"]).toordinal() - EPOCH_ORDINAL
+    except (KeyError, TypeError, ValueError):
+        day = 0
+    total_seconds, exercise_seconds = workout.get("total_seconds"), workout.get("exercise_seconds")
+    extra_offset, extra_length = strings.add(json.dumps(workout))
+    return RECORD.pack(day, -1, int32(total_seconds), int32(exercise_seconds), 0, 0, 0, 0,
+                       extra_offset, extra_length, FULL_JSON)
+
+
+def _encode_compact(workout, strings):
+    """encode_workout() for workouts that fit a record; raises if one doesn't"""
+    flags = 0
+    try:
+        day = date.fromisoformat(workout["date"]).toordinal() - EPOCH_ORDINAL
+    except (KeyError, TypeError, ValueError):
+        day = 0
+        flags |= FULL_JSON
+    
+    start = -1
+    if "start_time" in workout:
+        try:
+            hours, minutes, seconds = (int(part) for part in workout["start_time"].split(":"))
+            start = hours * 3600 + minutes * 60 + seconds
+            flags |= HAS_START
+        except (AttributeError, ValueError):
+            flags |= FULL_JSON
+    
+    total_seconds, exercise_seconds = workout_seconds(workout)
+    flags |= HAS_TOTAL_SECONDS if "total_seconds" in workout else 0
+    flags |= HAS_EXERCISE_SECONDS if "exercise_seconds" in workout else 0
+    flags |= HAS_TOTAL_HOURS if "total_duration_hours" in workout else 0
+    flags |= HAS_EXERCISE_HOURS if "exercise_duration_hours" in workout else 0
+    if isinstance(workout.get("total_duration_hours"), int):
+        flags |= INT_HOURS
+    if "rest_seconds" in workout:
+        rest_seconds = workout["rest_seconds"]
+        flags |= HAS_REST
+    else:
+        rest_seconds = max(total_seconds - exercise_seconds, 0)
+    
+    saved_at_us = 0
+    if "saved_at" in workout:
+        try:
+            saved_at_us = (datetime.fromisoformat(workout["saved_at"]) - EPOCH) // timedelta(microseconds=1)
+            flags |= HAS_SAVED_AT
+        except (TypeError, ValueError):
+            flags |= FULL_JSON
+    
+    notes_offset = notes_length = 0
+    if "notes" in workout:
+        flags |= HAS_NOTES
+        notes_offset, notes_length = strings.add(str(workout["notes"]))
+    if workout.get("manual_save") is True:
+        flags |= MANUAL
+    
+    extra = {key: value for key, value in workout.items() if key not in CORE_KEYS}
+    extra_offset = extra_length = 0
+    if extra:
+        extra_offset, extra_length = strings.add(json.dumps(extra))
+    
+    values = (day, start, total_seconds, exercise_seconds, rest_seconds, saved_at_us,
+              notes_offset, notes_length, extra_offset, extra_length, flags)
+    
+    # Check the round trip; whatever doesn't survive is stored as full JSON
+    if not flags & FULL_JSON and not _same(decode_record(values, strings.get), workout):
+        flags |= FULL_JSON
+    if flags & FULL_JSON:
+        extra_offset, extra_length = strings.add(json.dumps(workout))
+        values = values[:8] + (extra_offset, extra_length, flags)
+    return RECORD.pack(*values)
+
+
+# Decoded dates, most archives only have a few dozen different days
+_DAY_TEXT = {}
+
+
+def decode_record(values, get_string):
+    """Rebuild the workout dict from unpacked record values"""
+    (day, start, total_seconds, exercise_seconds, rest_seconds, saved_at_us,
+     notes_offset, notes_length, extra_offset, extra_length, flags) = values
+    if flags & FULL_JSON:
+        return json.loads(get_string(extra_offset, extra_length))
+    
+    day_text = _DAY_TEXT.get(day)
+    if day_text is None:
+        day_text = _DAY_TEXT[day] = date.fromordinal(day + EPOCH_ORDINAL).isoformat()
+    workout = {"date": day_text}
+    if flags & HAS_START:
+        hours, rest = divmod(start, 3600)
+        minutes, seconds = divmod(rest, 60)
+        workout["start_time"] = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    if flags & HAS_TOTAL_HOURS:
+        hours = round(total_seconds / 3600.0, 2)
+        workout["total_duration_hours"] = int(hours) if flags & INT_HOURS else hours
+    if flags & HAS_EXERCISE_HOURS:
+        hours = round(exercise_seconds / 3600.0, 2)
+        workout["exercise_duration_hours"] = int(hours) if flags & INT_HOURS else hours
+    if flags & HAS_TOTAL_SECONDS:
+        workout["total_seconds"] = total_seconds
+    if flags & HAS_EXERCISE_SECONDS:
+        workout["exercise_seconds"] = exercise_seconds
+    if flags & HAS_REST:
+        workout["rest_seconds"] = rest_seconds
+    if flags & HAS_NOTES:
+        workout["notes"] = get_string(notes_offset, notes_length)
+    if flags & HAS_SAVED_AT:
+        workout["saved_at"] = (EPOCH + timedelta(microseconds=saved_at_us)).isoformat()
+    if flags & MANUAL:
+        workout["manual_save"] = True
+    if extra_length:
+        workout.update(json.loads(get_string(extra_offset, extra_length)))
+    return workout
+
+
+class StringTable:
+    """Collects the UTF-8 strings written after the records"""
+    
+    def __init__(self):
+        self.data = bytearray()
+    
+    def add(self, text):
+        encoded = text.encode("utf-8")
+        offset = len(self.data)
+        self.data += encoded
+        return offset, len(encoded)
+    
+    def get(self, offset, length):
+        return self.data[offset:offset + length].decode("utf-8")
+
+
+def write_archive(path, workouts, meta=None):
+    """Write workouts (best already sorted by date) as a .wka file"""
+    meta_bytes = json.dumps(meta or {}).encode("utf-8")
+    strings = StringTable()
+    
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 0, len(meta_bytes), 0))
+        f.write(meta_bytes)
+        count = 0
+        for workout in workouts:
+            f.write(encode_workout(workout, strings))
+            count += 1
+        f.write(strings.data)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, count, len(meta_bytes), 0))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return count
+
+
+class ArchiveReader:
+    """Memory-mapped reader for a .wka file"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, meta_length, _ = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a workout archive")
+        self.meta = json.loads(bytes(self.map[HEADER.size:HEADER.size + meta_length]))
+        self.records_offset = HEADER.size + meta_length
+        self.strings_offset = self.records_offset + self.count * RECORD.size
+    
+    def __len__(self):
+        return self.count
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        try:
+            self.map.close()
+        except BufferError:
+            # NumPy views still point into the map; it closes when they go
+            pass
+        self.file.close()
+    
+    def get_string(self, offset, length):
+        start = self.strings_offset + offset
+        return self.map[start:start + length].decode("utf-8")
+    
+    def __iter__(self):
+        """Yield the workouts as dicts, in file order"""
+        view = memoryview(self.map)[self.records_offset:self.strings_offset]
+        try:
+            for values in RECORD.iter_unpack(view):
+                yield decode_record(values, self.get_string)
+        finally:
+            view.release()
+    
+    def records(self):
+        """The records as a NumPy structured array backed by the file"""
+        try:
+            import numpy as np
+        except ImportError:
+            raise RuntimeError("Reading archive columns needs NumPy: pip install numpy")
+        return np.frombuffer(self.map, dtype=np.dtype(RECORD_FIELDS), count=self.count,
+                             offset=self.records_offset)
+    
+    def columns(self):
+        """analytics.WorkoutColumns viewing the mapped file (no copy)"""
+        from analytics import WorkoutColumns
+        records = self.records()
+        return WorkoutColumns(records["day"], records["total_seconds"],
+                              records["exercise_seconds"])
+
+
+def archive_name(path):
+    """'archive/workout_data_2025-03.wka' -> '2025-03' (older ones: 'March_2025')"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name[len("workout_data_"):]
+
+
+def iter_archive(path):
+    """Workouts of an archive file in either format"""
+    if path.endswith(EXTENSION):
+        with ArchiveReader(path) as reader:
+            yield from reader
+    else:
+        with open(path, 'r') as f:
+            yield from json.load(f).get("workouts", [])
+
+
+def convert_json_archive(json_path, remove=False):
+    """Convert one archive/workout_data_*.json to .wka and check it matches"""
+    with open(json_path, 'r') as f:
+        data = json.load(f)
+    workouts = data.pop("workouts", [])
+    workouts = sorted(workouts, key=lambda w: w.get("date", ""))
+    out_path = os.path.splitext(json_path)[0] + EXTENSION
+    write_archive(out_path, workouts, data)
+    
+    with ArchiveReader(out_path) as reader:
+        same = reader.meta == data and all(_same(a, b) for a, b in zip(reader, workouts))
+        same = same and len(reader) == len(workouts)
+    if not same:
+        os.remove(out_path)
+        raise ValueError(f"{json_path} did not convert cleanly")
+    if remove:
+        os.remove(json_path)
+    return out_path
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+    
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Convert JSON archives to the compact .wka format")
+    parser.add_argument("--archive", default=os.path.join(script_dir, "archive"))
+    parser.add_argument("--remove-json", action="store_true", help="delete each JSON file once converted")
+    args = parser.parse_args()
+    
+    for json_path in sorted(glob.glob(os.path.join(args.archive, "workout_data_*.json"))):
+        json_size = os.path.getsize(json_path)
+        out_path = convert_json_archive(json_path, remove=args.remove_json)
+        print(f"{json_size:>12} -> {os.path.getsize(out_path):>12} bytes  {out_path}")
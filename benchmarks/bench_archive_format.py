@@ -0,0 +1,79 @@
+"""Size and load time of JSON archives vs the compact .wka format.
+    
+    python benchmarks/bench_archive_format.py --workouts 100000 --months 12
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive_format import ArchiveReader, convert_json_archive
+from synthetic import make_workouts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON vs .wka archive benchmark")
+    parser.add_argument("--workouts", type=int, default=20000, help="workouts per month")
+    parser.add_argument("--months", type=int, default=12)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as folder:
+        json_paths = []
+        for month in range(args.months):
+            path = os.path.join(folder, f"workout_data_Month{month}_2024.json")
+            with open(path, 'w') as f:
+                # The layout generate_monthly_report used to write
+                json.dump({"workouts": list(make_workouts(args.workouts, seed=month)),
+                           "archived_at": "2024-01-01T00:00:00", "report_generated": True},
+                          f, indent=4)
+            json_paths.append(path)
+        
+        started = time.perf_counter()
+        wka_paths = [convert_json_archive(path) for path in json_paths]
+        convert_s = time.perf_counter() - started
+        
+        json_size = sum(os.path.getsize(path) for path in json_paths)
+        wka_size = sum(os.path.getsize(path) for path in wka_paths)
+        
+        started = time.perf_counter()
+        count = 0
+        for path in json_paths:
+            with open(path, 'r') as f:
+                count += len(json.load(f)["workouts"])
+        json_s = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        for path in wka_paths:
+            with ArchiveReader(path) as reader:
+                for _ in reader:
+                    pass
+        dicts_s = time.perf_counter() - started
+        
+        columns_s = None
+        try:
+            started = time.perf_counter()
+            total = 0
+            for path in wka_paths:
+                total += int(ArchiveReader(path).columns().total_seconds.sum())
+            columns_s = time.perf_counter() - started
+        except RuntimeError:
+            pass
+    
+    print(f"{count} workouts in {args.months} months")
+    print(f"size:  json {json_size / 1e6:8.1f} MB   wka {wka_size / 1e6:8.1f} MB "
+          f"({json_size / wka_size:.1f}x smaller)")
+    print(f"convert json -> wka (with round trip check): {convert_s:.2f} s")
+    print(f"load:  json.load {json_s * 1000:8.1f} ms")
+    print(f"       wka dicts {dicts_s * 1000:8.1f} ms")
+    if columns_s is not None:
+        print(f"       wka mapped columns + sum {columns_s * 1000:8.1f} ms")
+    else:
+        print("       wka columns skipped (NumPy not installed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Cost of checkpointing the live workout.
+
+Times SessionCheckpoint.write() (a record updated in place through mmap)
+next to what a JSON checkpoint would cost (rewrite + os.replace).
+    
+    python benchmarks/bench_checkpoint.py --writes 100000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkpoint import SessionCheckpoint
+from stopwatch import WorkoutClock
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, len(sorted_values) * p // 100)]
+
+
+def report(name, costs_ns):
+    costs_ns.sort()
+    average = sum(costs_ns) / len(costs_ns)
+    print(f"{name:22s} avg {average / 1000:8.2f} us   p50 {percentile(costs_ns, 50) / 1000:8.2f} us   "
+          f"p99 {percentile(costs_ns, 99) / 1000:8.2f} us   max {costs_ns[-1] / 1000:8.2f} us")
+
+
+def json_checkpoint(path, clock, start_time):
+    """The obvious alternative: write a small JSON file and swap it in"""
+    now = clock.clock()
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump({"start_time": start_time.isoformat(),
+                   "main_ns": clock.main.elapsed_ns(now),
+                   "exercise_ns": clock.exercise.elapsed_ns(now),
+                   "rest_ns": clock.rest.elapsed_ns(now)}, f)
+    os.replace(temp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint cost benchmark")
+    parser.add_argument("--writes", type=int, default=100000)
+    args = parser.parse_args()
+    
+    clock = WorkoutClock()
+    clock.start()
+    clock.start_exercise()
+    start_time = datetime.now()
+    
+    with tempfile.TemporaryDirectory() as folder:
+        checkpoint = SessionCheckpoint(os.path.join(folder, "session.chk"))
+        costs = []
+        for _ in range(args.writes):
+            started = time.perf_counter_ns()
+            checkpoint.write(clock, start_time)
+            costs.append(time.perf_counter_ns() - started)
+        report("mmap record", costs)
+        
+        # maybe_write() runs every display frame, almost always writing nothing
+        costs = []
+        for _ in range(args.writes):
+            started = time.perf_counter_ns()
+            checkpoint.maybe_write(clock, start_time)
+            costs.append(time.perf_counter_ns() - started)
+        report("maybe_write (skipped)", costs)
+        
+        assert checkpoint.read()["main_running"]
+        checkpoint.close()
+        
+        json_path = os.path.join(folder, "session.json")
+        costs = []
+        for _ in range(min(args.writes, 10000)):
+            started = time.perf_counter_ns()
+            json_checkpoint(json_path, clock, start_time)
+            costs.append(time.perf_counter_ns() - started)
+        report("JSON rewrite", costs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Cost of keeping goals up to date on each save.
+    
+    python benchmarks/bench_goals.py --goals 100,300,1000
+
+Times GoalTracker.observe() for one saved workout (the goal state file
+write included, and on its own without it) against a store with a few
+months of history.
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import workout_core
+from goals import GoalTracker, parse_goal
+from synthetic import fill_store, make_history, make_workout
+
+GOAL_TEXTS = ["{} workouts per month", "{} exercise hours per week", "{} day streak",
+              "{} hours per month", "{} week streak"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Goal evaluation per save")
+    parser.add_argument("--goals", default="10,100,300,1000")
+    parser.add_argument("--saves", type=int, default=500)
+    args = parser.parse_args()
+    
+    today = date.today()
+    with tempfile.TemporaryDirectory() as folder:
+        store = workout_core.open_store(folder)
+        # A year of history up to yesterday
+        fill_store(store, itertools.takewhile(lambda workout: workout["date"] < today.isoformat(),
+                                              make_history(1000, today - timedelta(days=365))))
+        store.rollover()
+        rng = random.Random(1)
+        print(f"{'goals':>6s} {'rebuild ms':>11s} {'evaluate us':>12s} {'with save us':>13s}")
+        for count in (int(part) for part in args.goals.split(",")):
+            tracker = GoalTracker(os.path.join(folder, f"goals_{count}.json"), store)
+            for i in range(count):
+                tracker.add_goal(parse_goal(GOAL_TEXTS[i % len(GOAL_TEXTS)].format(i + 1)))
+            started = time.perf_counter()
+            tracker.progress()
+            rebuild_seconds = time.perf_counter() - started
+            
+            workouts = [[make_workout(today, rng)] for _ in range(args.saves)]
+            started = time.perf_counter()
+            for batch in workouts:
+                tracker._add(batch)
+            evaluate_seconds = (time.perf_counter() - started) / args.saves
+            
+            # observe() as the writer thread calls it, state file included
+            started = time.perf_counter()
+            for batch in workouts:
+                tracker.observe(batch, tracker.generation)
+            observe_seconds = (time.perf_counter() - started) / args.saves
+            print(f"{count:6d} {rebuild_seconds * 1000:11.1f} {evaluate_seconds * 1e6:12.1f} "
+                  f"{observe_seconds * 1e6:13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Guard the import time of the GUI-free modules.
+
+Imports each module in a fresh interpreter several times, prints the
+median and fails if it is over the budget or pulls in tkinter.
+    
+    python benchmarks/bench_import_time.py --max-ms 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK = """
+import sys, time
+started = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - started) * 1000
+print(elapsed, "tkinter" in sys.modules)
+"""
+
+
+def measure(module, runs):
+    times = []
+    loads_tk = False
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", CHECK.format(module=module)],
+                                cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        elapsed, tk = output.split()
+        times.append(float(elapsed))
+        loads_tk = loads_tk or tk == "True"
+    return statistics.median(times), loads_tk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time guard")
+    parser.add_argument("--modules", default="workout_core,workout_cli")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--max-ms", type=float, default=15.0)
+    args = parser.parse_args()
+    
+    failed = False
+    for module in args.modules.split(","):
+        median_ms, loads_tk = measure(module, args.runs)
+        status = "ok"
+        if loads_tk:
+            status = "FAIL: imports tkinter"
+            failed = True
+        elif median_ms > args.max_ms:
+            status = f"FAIL: over {args.max_ms} ms"
+            failed = True
+        print(f"{module:<16} {median_ms:7.2f} ms  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
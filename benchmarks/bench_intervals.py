@@ -0,0 +1,116 @@
+"""Phase switch timing of interval programs, with CPU load.
+
+Runs --programs interval programs at once on one DeadlineScheduler, each
+with its own WorkoutClock, while --load threads keep the CPU busy. Prints
+how late the phase switches fired and checks that the recorded exercise
+and rest totals match the program exactly. For comparison the same
+programs also run the old way, one thread each sleeping through every
+phase, where lateness adds up from phase to phase.
+    
+    python benchmarks/bench_intervals.py --programs 50 --load 2 --seconds 10
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deadline_scheduler import DeadlineScheduler
+from interval_program import WORK, IntervalRunner, expand, parse_items
+from stopwatch import WorkoutClock
+
+
+def busy_worker(stop_event):
+    """Keep a core busy so the scheduler has something to get in the way"""
+    x = 0
+    while not stop_event.is_set():
+        x += 1
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, len(sorted_values) * p // 100)]
+
+
+def report(name, late_ns):
+    late_ns.sort()
+    print(f"{name:22s} samples {len(late_ns):6d}   p50 {percentile(late_ns, 50) / 1e6:7.3f} ms   "
+          f"p99 {percentile(late_ns, 99) / 1e6:7.3f} ms   max {late_ns[-1] / 1e6:7.3f} ms")
+
+
+def sleep_accuracy(count=200, seconds=0.005):
+    """How late plain time.sleep() wakes up here: the floor for any timer"""
+    late_ns = []
+    for _ in range(count):
+        started = time.monotonic_ns()
+        time.sleep(seconds)
+        late_ns.append(time.monotonic_ns() - started - round(seconds * 1e9))
+    return late_ns
+
+
+def sleeping_program(phases, late_ns, lock):
+    """The old way: sleep through each phase, switch, repeat"""
+    start = time.monotonic_ns()
+    planned = start
+    for phase in phases:
+        time.sleep(phase.seconds)
+        planned += round(phase.seconds * 1e9)
+        with lock:
+            late_ns.append(time.monotonic_ns() - planned)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interval program timing benchmark")
+    parser.add_argument("--programs", type=int, default=50, help="programs running at once")
+    parser.add_argument("--load", type=int, default=2, help="busy threads to run alongside")
+    parser.add_argument("--seconds", type=float, default=10, help="length of each program")
+    parser.add_argument("--work", type=float, default=0.2, help="work phase seconds")
+    parser.add_argument("--rest", type=float, default=0.1, help="rest phase seconds")
+    args = parser.parse_args()
+    
+    rounds = max(1, int(args.seconds / (args.work + args.rest)))
+    phases = expand(parse_items(f"{rounds}x({args.work}w,{args.rest}r)"))
+    print(f"{args.programs} programs of {len(phases)} phases, {args.load} busy threads")
+    
+    stop_event = threading.Event()
+    for _ in range(args.load):
+        threading.Thread(target=busy_worker, args=(stop_event,), daemon=True).start()
+    
+    report("time.sleep() wake-up", sleep_accuracy())
+    
+    # Deadline scheduler: every program on the one thread, staggered starts
+    scheduler = DeadlineScheduler()
+    runners = []
+    rng = random.Random(1)
+    for _ in range(args.programs):
+        time.sleep(rng.uniform(0, 0.01))
+        runner = IntervalRunner(WorkoutClock(), phases, scheduler)
+        runner.start()
+        runners.append(runner)
+    while not all(runner.finished for runner in runners):
+        time.sleep(0.05)
+    report("deadline scheduler", list(scheduler.recent_late_ns))
+    
+    # The recorded totals are the planned ones
+    planned_work = sum(round(p.seconds * 1e9) for p in phases if p.kind == WORK)
+    worst_error = max(abs(runner.clock.exercise.elapsed_ns() - planned_work) for runner in runners)
+    print(f"{'':22s} worst exercise total error {worst_error / 1e6:.3f} ms")
+    scheduler.stop()
+    
+    # Thread per program sleeping through the phases
+    late_ns = []
+    lock = threading.Lock()
+    threads = [threading.Thread(target=sleeping_program, args=(phases, late_ns, lock))
+               for _ in range(args.programs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report("sleep per phase", late_ns)
+    stop_event.set()
+
+
+if __name__ == "__main__":
+    main()
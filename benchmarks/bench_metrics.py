@@ -0,0 +1,79 @@
+"""What the instrumentation costs, with metrics off and on.
+    
+    python benchmarks/bench_metrics.py --calls 200000
+
+Times an empty function bare, wrapped in @metrics.timed and inside a
+metrics.span(), plus metrics.observe(), first with metrics off and then
+on. Then saves workouts through a store with metrics off and on, to see
+the overhead on a real path.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+import workout_core
+from synthetic import make_workout
+
+
+def nothing():
+    pass
+
+
+@metrics.timed("bench.timed")
+def timed_nothing():
+    pass
+
+
+def per_call_ns(func, calls):
+    started = time.perf_counter_ns()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter_ns() - started) / calls
+
+
+def in_span():
+    with metrics.span("bench.span"):
+        pass
+
+
+def observed():
+    metrics.observe("bench.observe", 0.001)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics overhead")
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--saves", type=int, default=2000)
+    args = parser.parse_args()
+    
+    print(f"{'':14s} {'bare ns':>8s} {'timed ns':>9s} {'span ns':>8s} {'observe ns':>11s}")
+    for on in (False, True):
+        metrics.enable(on)
+        metrics.reset()
+        print(f"{'metrics ' + ('on' if on else 'off'):14s} {per_call_ns(nothing, args.calls):8.0f} "
+              f"{per_call_ns(timed_nothing, args.calls):9.0f} {per_call_ns(in_span, args.calls):8.0f} "
+              f"{per_call_ns(observed, args.calls):11.0f}")
+    
+    rng = random.Random(1)
+    workouts = [make_workout(date.today(), rng) for _ in range(args.saves)]
+    for on in (False, True):
+        metrics.enable(on)
+        with tempfile.TemporaryDirectory() as folder:
+            store = workout_core.open_store(folder)
+            started = time.perf_counter()
+            for workout in workouts:
+                store.append_many([workout])
+            seconds = (time.perf_counter() - started) / args.saves
+        print(f"store.append_many, metrics {'on ' if on else 'off'}: {seconds * 1e6:.1f} us a save")
+    metrics.enable(False)
+
+
+if __name__ == "__main__":
+    main()
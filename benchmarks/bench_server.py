@@ -0,0 +1,172 @@
+"""Load test for the HTTP/JSON API (workout_server.py).
+
+Fills a temporary data folder with synthetic workouts, starts
+`workout_cli serve` on a free localhost port in its own process and
+hammers each endpoint from concurrent asyncio clients, printing
+requests/sec and latency percentiles.
+    
+    python benchmarks/bench_server.py --workouts 50000 --clients 16 --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import workout_core
+from synthetic import make_workouts
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, len(sorted_values) * p // 100)]
+
+
+class Client:
+    """Minimal HTTP/1.1 client on one connection (keep-alive unless told not to)"""
+    
+    def __init__(self, port, keep_alive=True):
+        self.port = port
+        self.keep_alive = keep_alive
+        self.reader = self.writer = None
+    
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        data = json.dumps(body).encode() if body is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if self.keep_alive else 'close'}\r\n\r\n")
+        self.writer.write(head.encode() + data)
+        await self.writer.drain()
+        
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            parts = []
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+                parts.append(chunk[:-2])
+            body = b"".join(parts)
+        if not self.keep_alive:
+            self.close()
+        return status, body
+    
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def run_scenario(port, make_request, clients, seconds, keep_alive=True):
+    """clients connections sending requests back to back for `seconds`"""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    
+    async def worker(n):
+        nonlocal errors
+        client = Client(port, keep_alive)
+        i = 0
+        while time.perf_counter() < deadline:
+            method, path, body = make_request(n, i)
+            started = time.perf_counter()
+            status, _ = await client.request(method, path, body)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors += 1
+            i += 1
+        client.close()
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, latencies, errors
+
+
+def report(name, result):
+    rate, latencies, errors = result
+    print(f"{name:28s} {rate:9.0f} req/s   p50 {percentile(latencies, 50) * 1000:7.2f} ms   "
+          f"p99 {percentile(latencies, 99) * 1000:7.2f} ms   errors {errors}")
+
+
+def start_server(folder):
+    process = subprocess.Popen([sys.executable, "-m", "workout_cli", "serve", "--base", folder,
+                                "--port", "0"], cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    port = int(line.rsplit(":", 1)[1])
+    return process, port
+
+
+async def main_async(args, port, months):
+    def summary(n, i):
+        return "GET", "/summary", None
+    
+    def record(n, i):
+        return "POST", "/workouts", {"total_seconds": 3600, "exercise_seconds": 2400,
+                                     "notes": f"load test {n}/{i}"}
+    
+    def month_range(n, i):
+        month = months[(n + i) % len(months)]
+        return "GET", f"/workouts?from={month}&to={month}", None
+    
+    def year_range(n, i):
+        return "GET", f"/workouts?from={months[0]}&to={months[min(11, len(months) - 1)]}", None
+    
+    def report_month(n, i):
+        return "GET", f"/reports/{months[(n + i) % len(months)]}", None
+    
+    scenarios = [
+        ("GET /summary", summary, True),
+        ("GET /summary (no keep-alive)", summary, False),
+        ("POST /workouts", record, True),
+        ("GET /workouts (one month)", month_range, True),
+        ("GET /workouts (12 months)", year_range, True),
+        ("GET /reports/<month>", report_month, True),
+    ]
+    for name, make_request, keep_alive in scenarios:
+        clients = args.clients if "12 months" not in name else max(1, args.clients // 4)
+        report(name, await run_scenario(port, make_request, clients, args.seconds, keep_alive))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP API load test")
+    parser.add_argument("--workouts", type=int, default=50000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as folder:
+        store = workout_core.open_store(folder, "json")
+        workouts = list(make_workouts(args.workouts))
+        store.append_many(workouts)
+        months = store.months()
+        print(f"{args.workouts} workouts over {len(months)} months, "
+              f"{args.clients} clients, {args.seconds:g} s per scenario")
+        
+        process, port = start_server(folder)
+        try:
+            asyncio.run(main_async(args, port, months))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
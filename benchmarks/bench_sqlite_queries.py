@@ -0,0 +1,72 @@
+"""Compare query latency of the JSON file and the SQLite backend.
+    
+    python benchmarks/bench_sqlite_queries.py --sizes 1000,100000,1000000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlite_store import SQLiteStore, month_bounds
+from synthetic import make_workouts
+
+
+def json_month(data_file, month):
+    """What the JSON path has to do: load everything and filter in Python"""
+    first, following = month_bounds(month)
+    with open(data_file, 'r') as f:
+        data = json.load(f)
+    return [w for w in data["workouts"] if first <= w["date"] < following]
+
+
+def json_totals(data_file, start_date, end_date):
+    with open(data_file, 'r') as f:
+        data = json.load(f)
+    picked = [w for w in data["workouts"] if start_date <= w["date"] <= end_date]
+    return len(picked), sum(w.get("total_seconds", 0) for w in picked)
+
+
+def timed(func, *args, repeat=5):
+    """Best time of a few runs in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON vs SQLite query latency")
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    args = parser.parse_args()
+    
+    print(f"{'rows':>9} {'query':<8} {'json ms':>10} {'sqlite ms':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as folder:
+            data_file = os.path.join(folder, "workout_data.json")
+            with open(data_file, 'w') as f:
+                json.dump({"workouts": list(make_workouts(size))}, f)
+            
+            store = SQLiteStore(os.path.join(folder, "workout_data.db"))
+            store.append_many(make_workouts(size))
+            
+            month = "2015-02"
+            repeat = 1 if size >= 1000000 else 5
+            json_ms = timed(json_month, data_file, month, repeat=repeat)
+            sqlite_ms = timed(store.workouts_in_month, month, repeat=repeat)
+            print(f"{size:>9} {'month':<8} {json_ms:>10.2f} {sqlite_ms:>10.2f}")
+            
+            json_ms = timed(json_totals, data_file, "2015-01-01", "2015-06-30", repeat=repeat)
+            sqlite_ms = timed(store.totals_between, "2015-01-01", "2015-06-30", repeat=repeat)
+            print(f"{size:>9} {'totals':<8} {json_ms:>10.2f} {sqlite_ms:>10.2f}")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
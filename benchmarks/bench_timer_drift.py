@@ -0,0 +1,76 @@
+"""Measure timer drift against a reference clock.
+
+Runs the Stopwatch next to the old "sleep(1) then += 1" loop and compares
+both with time.perf_counter_ns() as the reference clock.
+    
+    python benchmarks/bench_timer_drift.py --seconds 60
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stopwatch import Stopwatch
+
+
+def busy_worker(stop_event):
+    """Keep a core busy so the scheduler has something to get in the way"""
+    x = 0
+    while not stop_event.is_set():
+        x += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Timer drift benchmark")
+    parser.add_argument("--seconds", type=int, default=30, help="how long to run")
+    parser.add_argument("--load", type=int, default=0, help="busy threads to run alongside")
+    parser.add_argument("--toggles", type=int, default=0,
+                        help="stop/start the stopwatch this many times per second")
+    args = parser.parse_args()
+    
+    stop_event = threading.Event()
+    for _ in range(args.load):
+        threading.Thread(target=busy_worker, args=(stop_event,), daemon=True).start()
+    
+    # Old approach: one thread sleeping a second and adding one
+    old_counter = [0]
+    def old_loop():
+        while not stop_event.is_set():
+            time.sleep(1)
+            old_counter[0] += 1
+    threading.Thread(target=old_loop, daemon=True).start()
+    
+    stopwatch = Stopwatch()
+    reference_start = time.perf_counter_ns()
+    stopwatch.start()
+    
+    worst_ns = 0
+    interval = 1.0 / args.toggles if args.toggles else 1.0
+    deadline = time.monotonic() + args.seconds
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        if args.toggles:
+            # Stop and restart at the same instant: should add no error
+            now = time.monotonic_ns()
+            stopwatch.stop(now)
+            stopwatch.start(now)
+        reference_ns = time.perf_counter_ns() - reference_start
+        worst_ns = max(worst_ns, abs(stopwatch.elapsed_ns() - reference_ns))
+    
+    reference_ns = time.perf_counter_ns() - reference_start
+    elapsed_ns = stopwatch.elapsed_ns()
+    stop_event.set()
+    
+    reference_s = reference_ns / 1e9
+    print(f"reference elapsed:   {reference_s:.3f} s")
+    print(f"stopwatch elapsed:   {elapsed_ns / 1e9:.3f} s "
+          f"(drift {(elapsed_ns - reference_ns) / 1e6:+.3f} ms, worst {worst_ns / 1e6:.3f} ms)")
+    print(f"sleep(1) loop count: {old_counter[0]} s "
+          f"(drift {(old_counter[0] - reference_s) * 1000:+.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Memory and time of holding workouts as dicts vs Workout records.
+    
+    python benchmarks/bench_workout_record.py --workouts 1000000
+
+Both sides read the same snapshot file of make_history() workouts, with
+events strings and integer-hour quick saves like real ones; --users adds
+the "user" key shared gym saves have. tracemalloc reports what stays
+allocated once it is loaded and the peak while loading.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_history
+from workout_record import Workout, load_records
+
+
+def measure(path, load):
+    """(workouts, held MB, peak MB, load seconds) for one way of loading"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    with open(path, 'r') as f:
+        workouts = load(f)["workouts"]
+    load_seconds = time.perf_counter() - started
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return workouts, held / 1e6, peak / 1e6, load_seconds
+
+
+def scan(workouts):
+    """Seconds for a summary-style pass over every workout"""
+    started = time.perf_counter()
+    total = 0
+    hours = 0.0
+    for workout in workouts:
+        total += workout.get("total_seconds", 0) or 0
+        hours += workout.get("total_duration_hours", 0) or 0
+        workout.get("date", "")[:7]
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workout dicts vs slotted records")
+    parser.add_argument("--workouts", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=0, help="athletes sharing the data")
+    args = parser.parse_args()
+    users = tuple(f"athlete{i}" for i in range(args.users))
+    
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "workout_data.json")
+        with open(path, 'w') as f:
+            json.dump({"workouts": list(make_history(args.workouts, users=users))}, f, indent=4)
+        
+        results = {}
+        for name, load in (("dicts", json.load), ("records", load_records)):
+            workouts, held, peak, load_seconds = measure(path, load)
+            results[name] = (held, peak, load_seconds, scan(workouts))
+            if name == "records":
+                # Workouts that didn't fit the slots and kept a dict of extras
+                fallbacks = sum(1 for workout in workouts
+                                if isinstance(workout, Workout) and workout.extra is not None)
+            del workouts
+    
+    print(f"{args.workouts} workouts")
+    print(f"{'':10s} {'held MB':>10s} {'peak MB':>10s} {'load s':>8s} {'scan ms':>9s}")
+    for name, (held, peak, load_seconds, scan_seconds) in results.items():
+        print(f"{name:10s} {held:10.1f} {peak:10.1f} {load_seconds:8.2f} {scan_seconds * 1000:9.1f}")
+    held_ratio = results["records"][0] / results["dicts"][0]
+    print(f"records hold {held_ratio:.0%} of the dicts' memory")
+    print(f"{fallbacks} workouts kept extra keys in a dict")
+
+
+if __name__ == "__main__":
+    main()
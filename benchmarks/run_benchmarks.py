@@ -0,0 +1,316 @@
+"""Benchmark suite for the storage, reporting and timing paths.
+
+Fills a temporary data folder with synthetic.make_history() workouts and
+archived months, then runs each scenario against it. The numbers can be
+written to JSON and compared with an earlier run:
+    
+    python benchmarks/run_benchmarks.py --workouts 100000 --json before.json
+    python benchmarks/run_benchmarks.py --workouts 100000 --compare before.json
+    python benchmarks/run_benchmarks.py --only report,summary --profile prof/ --tracemalloc
+
+--profile saves a cProfile file per scenario and prints its top functions;
+--tracemalloc records peak memory and the biggest allocation sites. Both
+slow the scenarios down, so compare timings only between runs without them.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import workout_core
+from synthetic import fill_store, make_history, parse_range, write_archives
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, len(sorted_values) * p // 100)]
+
+
+def millis(seconds):
+    return round(seconds * 1000, 3)
+
+
+class Context:
+    """The synthetic data folder the scenarios run against"""
+    
+    def __init__(self, folder, args):
+        self.folder = folder
+        self.args = args
+        self.paths = workout_core.data_paths(folder)
+        started = time.perf_counter()
+        store = workout_core.open_store(folder, args.backend)
+        month_counts = Counter()
+        
+        def counted(workouts):
+            for workout in workouts:
+                month_counts[workout["date"][:7]] += 1
+                yield workout
+        
+        self.workouts = fill_store(store, counted(make_history(args.workouts, date(2000, 1, 1),
+                                                               args.seed, args.note_words)))
+        # Scenarios work on the busiest month, the same one in every run
+        self.month = month_counts.most_common(1)[0][0]
+        self.archives = write_archives(self.paths["archive_folder"], args.archive_months,
+                                       args.per_month, seed=args.seed, note_words=args.note_words)
+        self.build_seconds = time.perf_counter() - started
+    
+    def store(self):
+        """A freshly opened store with the busiest month as the current one"""
+        store = workout_core.open_store(self.folder, self.args.backend)
+        store.rollover(self.month)
+        return store
+
+
+def scenario_save(ctx):
+    """One save as the writer thread does it: store append + summary update
+    
+    Saves go to a copy of the busiest month so the other scenarios see the
+    same data whatever order they run in.
+    """
+    from summary_cache import SummaryCache
+    from synthetic import make_workout
+    import random
+    folder = os.path.join(ctx.folder, "save_scenario")
+    os.makedirs(folder, exist_ok=True)
+    store = workout_core.open_store(folder, ctx.args.backend)
+    fill_store(store, ctx.store().current.iter_workouts())
+    store.rollover(ctx.month)
+    cache = SummaryCache(workout_core.data_paths(folder)["summary_file"], store)
+    cache.summary()
+    rng = random.Random(ctx.args.seed)
+    day = date.fromisoformat(ctx.month + "-01")
+    costs = []
+    for _ in range(ctx.args.saves):
+        workout = make_workout(day, rng, ctx.args.note_words)
+        started = time.perf_counter()
+        cache.append_many([workout])
+        costs.append(time.perf_counter() - started)
+    
+    batch = [make_workout(day, rng, ctx.args.note_words) for _ in range(100)]
+    started = time.perf_counter()
+    cache.append_many(batch)
+    batch_seconds = time.perf_counter() - started
+    costs.sort()
+    return {
+        "saves": len(costs),
+        "p50_ms": millis(percentile(costs, 50)),
+        "p99_ms": millis(percentile(costs, 99)),
+        "max_ms": millis(costs[-1]),
+        "batch_of_100_ms": millis(batch_seconds),
+    }
+
+
+def scenario_summary(ctx):
+    """Summary label refresh: rebuild from the store, then the cached path"""
+    from summary_cache import SummaryCache
+    store = ctx.store()
+    if os.path.exists(ctx.paths["summary_file"]):
+        os.remove(ctx.paths["summary_file"])
+    started = time.perf_counter()
+    cache = SummaryCache(ctx.paths["summary_file"], store)
+    totals = cache.summary()
+    rebuild_seconds = time.perf_counter() - started
+    
+    repeat = 1000
+    started = time.perf_counter()
+    for _ in range(repeat):
+        cache.summary()
+    warm_seconds = (time.perf_counter() - started) / repeat
+    return {
+        "month_workouts": totals["count"],
+        "rebuild_ms": millis(rebuild_seconds),
+        "refresh_us": round(warm_seconds * 1e6, 2),
+    }
+
+
+def scenario_report(ctx):
+    """Report of the busiest month: rendered, then from the report cache"""
+    from report_cache import ReportCache
+    partition = ctx.store().current
+    report_month = datetime.strptime(ctx.month, "%Y-%m").strftime("%B_%Y")
+    os.makedirs(ctx.paths["reports_folder"], exist_ok=True)
+    report_path = os.path.join(ctx.paths["reports_folder"], f"workout_report_{report_month}.txt")
+    
+    started = time.perf_counter()
+    stats = workout_core.write_store_report(partition, report_path, report_month)
+    render_seconds = time.perf_counter() - started
+    
+    cache = ReportCache(os.path.join(ctx.folder, "bench_report_cache"))
+    workout_core.write_store_report(partition, report_path, report_month, cache=cache)
+    started = time.perf_counter()
+    workout_core.write_store_report(partition, report_path, report_month, cache=cache)
+    cached_seconds = time.perf_counter() - started
+    cache.close()
+    return {
+        "month_workouts": stats.total_workouts,
+        "render_ms": millis(render_seconds),
+        "cached_ms": millis(cached_seconds),
+    }
+
+
+def scenario_archive_load(ctx):
+    """Reading every archived month back as workouts (and as columns with NumPy)"""
+    from archive_format import ArchiveReader
+    import analytics
+    if not ctx.archives:
+        return {"archives": 0}
+    started = time.perf_counter()
+    count = 0
+    for path in ctx.archives:
+        with ArchiveReader(path) as reader:
+            for _ in reader:
+                count += 1
+    load_seconds = time.perf_counter() - started
+    result = {
+        "archives": len(ctx.archives),
+        "workouts": count,
+        "load_ms": millis(load_seconds),
+        "workouts_per_s": round(count / load_seconds) if load_seconds else 0,
+    }
+    if analytics.available():
+        started = time.perf_counter()
+        for path in ctx.archives:
+            ArchiveReader(path).columns()
+        result["columns_ms"] = millis(time.perf_counter() - started)
+    return result
+
+
+def scenario_timer_drift(ctx):
+    """WorkoutClock against perf_counter while switching exercise/rest"""
+    from stopwatch import WorkoutClock
+    clock = WorkoutClock()
+    reference_start = time.perf_counter_ns()
+    clock.start()
+    clock.start_exercise()
+    worst_ns = 0
+    deadline = time.monotonic() + ctx.args.drift_seconds
+    switches = 0
+    while time.monotonic() < deadline:
+        time.sleep(0.01)
+        if switches % 2:
+            clock.start_exercise()
+        else:
+            clock.start_rest()
+        switches += 1
+        now = clock.clock()
+        reference_ns = time.perf_counter_ns() - reference_start
+        worst_ns = max(worst_ns, abs(clock.main.elapsed_ns(now) - reference_ns))
+    now = clock.clock()
+    parts_ns = clock.exercise.elapsed_ns(now) + clock.rest.elapsed_ns(now)
+    return {
+        "seconds": ctx.args.drift_seconds,
+        "switches": switches,
+        "worst_drift_ms": round(worst_ns / 1e6, 3),
+        "exercise_plus_rest_error_ms": round(abs(parts_ns - clock.main.elapsed_ns(now)) / 1e6, 3),
+    }
+
+
+SCENARIOS = {
+    "save": scenario_save,
+    "summary": scenario_summary,
+    "report": scenario_report,
+    "archive_load": scenario_archive_load,
+    "timer_drift": scenario_timer_drift,
+}
+
+
+def run_scenario(name, ctx, args):
+    """Run one scenario, under cProfile/tracemalloc if asked"""
+    func = SCENARIOS[name]
+    profiler = None
+    if args.tracemalloc:
+        import tracemalloc
+        tracemalloc.start()
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        result = func(ctx)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+    
+    if profiler is not None:
+        import pstats
+        os.makedirs(args.profile, exist_ok=True)
+        profile_path = os.path.join(args.profile, f"{name}.prof")
+        profiler.dump_stats(profile_path)
+        print(f"--- {name}: top functions (full profile in {profile_path})")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(8)
+    if args.tracemalloc:
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        result["peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+        print(f"--- {name}: biggest allocations still held")
+        for stat in snapshot.statistics("lineno")[:5]:
+            print(f"    {stat}")
+    return result
+
+
+def print_result(name, result, previous=None):
+    print(f"{name}")
+    for metric, value in result.items():
+        line = f"    {metric:30s} {value:>14}"
+        old = (previous or {}).get(metric)
+        if isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            line += f"   was {old:>12}  ({(value - old) / old * 100:+.1f}%)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Storage, report and timing benchmarks")
+    parser.add_argument("--workouts", type=int, default=100000, help="10 to 10M stored workouts")
+    parser.add_argument("--note-words", type=parse_range, default=(0, 6), help="min,max words a note")
+    parser.add_argument("--archive-months", type=int, default=12)
+    parser.add_argument("--per-month", type=int, default=5000, help="workouts per archived month")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--saves", type=int, default=500, help="saves timed by the save scenario")
+    parser.add_argument("--drift-seconds", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", help=f"comma separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results file of an earlier run to compare with")
+    parser.add_argument("--profile", help="folder for one cProfile file per scenario")
+    parser.add_argument("--tracemalloc", action="store_true", help="record peak memory per scenario")
+    args = parser.parse_args()
+    
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    for name in names:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}")
+    previous = {}
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            previous = json.load(f)["results"]
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        ctx = Context(folder, args)
+        print(f"{ctx.workouts} workouts, {len(ctx.archives)} archived months, "
+              f"busiest month {ctx.month} (built in {ctx.build_seconds:.1f} s)\n")
+        for name in names:
+            results[name] = run_scenario(name, ctx, args)
+            print_result(name, results[name], previous.get(name))
+    
+    if args.json:
+        settings = {key: value for key, value in vars(args).items()
+                    if key not in ("json", "compare", "profile")}
+        with open(args.json, 'w') as f:
+            json.dump({"meta": {"created": datetime.now().isoformat(timespec="seconds"),
+                                "python": platform.python_version(),
+                                "platform": platform.platform(),
+                                "settings": settings},
+                       "results": results}, f, indent=2)
+        print(f"\nresults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Synthetic workout data for the benchmarks
+
+make_workouts() is the simple evenly spread data most benchmarks use;
+make_history() looks more like a real training log. Run it to fill a
+data folder for trying the app at scale:
+    
+    python benchmarks/synthetic.py /tmp/big --workouts 1000000 --archive-months 24
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+NOTE_WORDS = ["cardio", "squat", "bench", "deadlift", "legs", "back", "chest",
+              "intervals", "run", "rowing", "mobility", "core", "easy", "hard"]
+EXTRA_WORDS = ["5x5", "3x10", "pr", "tempo", "zone2", "hills", "sprints", "stretch",
+               "tired", "great", "knee", "shoulder", "warmup", "cooldown", "bike", "swim"]
+
+
+def make_notes(rng, note_words=(0, 6)):
+    """Notes of note_words (min, max) words"""
+    return " ".join(rng.choice(NOTE_WORDS) for _ in range(rng.randint(*note_words)))
+
+
+def make_workout(day, rng, note_words=(0, 6)):
+    """One workout dict in the same layout save_workout writes"""
+    total_seconds = rng.randint(20 * 60, 120 * 60)
+    exercise_seconds = int(total_seconds * rng.uniform(0.5, 0.9))
+    start = datetime(day.year, day.month, day.day, rng.randint(5, 21), rng.randint(0, 59),
+                     rng.randint(0, 59))
+    return {
+        "date": day.isoformat(),
+        "start_time": start.strftime("%H:%M:%S"),
+        "total_duration_hours": round(total_seconds / 3600.0, 2),
+        "exercise_duration_hours": round(exercise_seconds / 3600.0, 2),
+        "total_seconds": total_seconds,
+        "exercise_seconds": exercise_seconds,
+        "notes": make_notes(rng, note_words),
+        "saved_at": (start + timedelta(seconds=total_seconds)).isoformat(),
+    }
+
+
+def make_workouts(count, start=date(2015, 1, 1), per_day=3, seed=1):
+    """Yield count workouts in date order, about per_day workouts a day"""
+    rng = random.Random(seed)
+    day = start
+    for i in range(count):
+        if i and i % per_day == 0:
+            day += timedelta(days=1)
+        yield make_workout(day, rng)
+
+
+def make_events(rng, total_seconds, exercise_seconds):
+    """The "events" string of a timed save: a few sets with rests between"""
+    from segment_events import END, EXERCISE, REST, START, EventRing
+    ring = EventRing(64)
+    sets = rng.randint(3, 12)
+    work = exercise_seconds * 10**9 // sets
+    rest = (total_seconds - exercise_seconds) * 10**9 // sets
+    t = 0
+    ring.record(t, START)
+    for _ in range(sets):
+        ring.record(t, EXERCISE)
+        t += work
+        ring.record(t, REST)
+        t += rest
+    ring.record(t, END)
+    return ring.encode()
+
+
+def make_history(count, start=date(2015, 1, 1), seed=1, note_words=(0, 6),
+                 rest_day_chance=0.3, max_per_day=2, users=()):
+    """Yield count workouts like a real training log, in date order
+    
+    Rest days, one or more sessions on training days, longer sessions at
+    the weekend, now and then a quick save without timing, and notes of
+    note_words (min, max) words. Timed sessions carry their events string
+    and, with users given, every workout names one of them, as saves from
+    a shared gym do.
+    """
+    rng = random.Random(seed)
+    # Its own generator, so the other fields stay as they were
+    event_rng = random.Random(seed + 1)
+    words = NOTE_WORDS + EXTRA_WORDS
+    day = start
+    made = 0
+    while made < count:
+        if rng.random() >= rest_day_chance:
+            hour = rng.choice((6, 7, 12, 17, 18, 19))
+            for _ in range(min(rng.randint(1, max_per_day), count - made)):
+                start_time = datetime(day.year, day.month, day.day, hour, rng.randint(0, 59),
+                                      rng.randint(0, 59))
+                notes = " ".join(rng.choice(words) for _ in range(rng.randint(*note_words)))
+                if rng.random() < 0.03:
+                    total_seconds = exercise_seconds = 0
+                else:
+                    average = 90 if day.weekday() >= 5 else 60
+                    total_seconds = int(max(10, min(180, rng.gauss(average, 20))) * 60)
+                    exercise_seconds = int(total_seconds * rng.uniform(0.45, 0.85))
+                workout = {
+                    "date": day.isoformat(),
+                    "start_time": start_time.strftime("%H:%M:%S"),
+                    "total_duration_hours": round(total_seconds / 3600.0, 2),
+                    "exercise_duration_hours": round(exercise_seconds / 3600.0, 2),
+                    "total_seconds": total_seconds,
+                    "exercise_seconds": exercise_seconds,
+                    "notes": notes,
+                    "saved_at": (start_time + timedelta(seconds=total_seconds)).isoformat(),
+                }
+                if total_seconds:
+                    workout["events"] = make_events(event_rng, total_seconds, exercise_seconds)
+                else:
+                    # build_manual_workout writes integer hours
+                    workout["total_duration_hours"] = workout["exercise_duration_hours"] = 0
+                    workout["manual_save"] = True
+                if users:
+                    workout["user"] = event_rng.choice(users)
+                yield workout
+                made += 1
+                hour = min(22, hour + 2)
+        day += timedelta(days=1)
+
+
+def add_months(month, count):
+    """'2024-11' plus 3 -> '2025-02'"""
+    year, number = map(int, month.split("-"))
+    year, number = divmod(year * 12 + number - 1 + count, 12)
+    return f"{year:04d}-{number + 1:02d}"
+
+
+def write_archives(folder, months, per_month, first_month="2020-01", seed=1, note_words=(0, 6)):
+    """Write `months` archived months of per_month workouts as .wka files
+    
+    Returns the paths, oldest month first.
+    """
+    from archive_format import write_archive
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(months):
+        month = add_months(first_month, i)
+        first_day = date.fromisoformat(month + "-01")
+        days = (date.fromisoformat(add_months(month, 1) + "-01") - first_day).days
+        rng = random.Random(seed * 1000 + i)
+        workouts = sorted((make_workout(first_day + timedelta(days=rng.randrange(days)), rng,
+                                        note_words) for _ in range(per_month)),
+                          key=lambda w: (w["date"], w["start_time"]))
+        path = os.path.join(folder, f"workout_data_{month}.wka")
+        write_archive(path, workouts, {"archived_at": f"{month}-28T00:00:00",
+                                       "report_generated": True})
+        paths.append(path)
+    return paths
+
+
+def fill_store(store, workouts, batch_size=50000):
+    """Append workouts to a store in batches (memory stays at one batch)"""
+    count = 0
+    batch = []
+    for workout in workouts:
+        batch.append(workout)
+        if len(batch) >= batch_size:
+            count += store.append_many(batch) or len(batch)
+            batch = []
+    if batch:
+        count += store.append_many(batch) or len(batch)
+    return count
+
+
+def parse_range(text):
+    """'0,6' -> (0, 6)"""
+    low, high = (int(part) for part in text.split(","))
+    return low, high
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import workout_core
+    
+    parser = argparse.ArgumentParser(description="Fill a data folder with synthetic workouts")
+    parser.add_argument("folder")
+    parser.add_argument("--workouts", type=int, default=10000, help="10 to 10M")
+    parser.add_argument("--start", default="2015-01-01", help="first day of the history")
+    parser.add_argument("--note-words", type=parse_range, default=(0, 6), help="min,max")
+    parser.add_argument("--archive-months", type=int, default=0, help="archived months to write")
+    parser.add_argument("--per-month", type=int, default=100, help="workouts per archived month")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    
+    os.makedirs(args.folder, exist_ok=True)
+    store = workout_core.open_store(args.folder, args.backend)
+    count = fill_store(store, make_history(args.workouts, date.fromisoformat(args.start),
+                                           args.seed, args.note_words))
+    print(f"{count} workouts in {len(store.months())} months")
+    if args.archive_months:
+        archive_folder = workout_core.data_paths(args.folder)["archive_folder"]
+        paths = write_archives(archive_folder, args.archive_months, args.per_month,
+                               seed=args.seed, note_words=args.note_words)
+        print(f"{len(paths)} archived months in {archive_folder}")
+
+
+if __name__ == "__main__":
+    main()
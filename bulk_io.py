@@ -0,0 +1,337 @@
+"""Bulk import and export of workouts as CSV or JSON Lines.
+
+Import streams the input file: the lines are handed out in chunks to a
+process pool that parses and validates them, while this process only
+drops duplicates and writes batches to the store. Export walks the store
+(and the archived months it doesn't hold) one month at a time. Either
+way memory stays about the same however big the file is:
+    
+    python -m workout_cli import history.csv
+    python -m workout_cli export everything.jsonl --from 2020-01
+
+A workout counts as a duplicate when its date, start time and saved_at
+all match one already stored or earlier in the file.
+"""
+import csv
+import io
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from datetime import date, datetime
+
+# Columns of an exported CSV; an imported one needs a header with at
+# least "date" and either seconds or hours
+CSV_COLUMNS = ["date", "start_time", "total_seconds", "exercise_seconds", "total_duration_hours",
+               "exercise_duration_hours", "notes", "saved_at", "manual_save", "user", "events"]
+TRUE_TEXT = ("1", "true", "yes", "y")
+MAX_ERRORS = 20
+
+
+def file_format(path, fmt=None):
+    """'csv' or 'jsonl', from fmt or the file extension"""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt == "ndjson":
+        fmt = "jsonl"
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"can't tell the format of {path!r}, use --format csv or jsonl")
+    return fmt
+
+
+def dedup_key(workout):
+    return (workout.get("date", ""), workout.get("start_time") or "", workout.get("saved_at") or "")
+
+
+def _seconds(record, seconds_key, hours_key):
+    """Whole seconds from the seconds field, or from the hours for other trackers"""
+    value = record.get(seconds_key)
+    if value not in (None, ""):
+        seconds = float(value)
+        if seconds != int(seconds):
+            raise ValueError(f"{seconds_key} must be whole seconds")
+    else:
+        value = record.get(hours_key)
+        seconds = round(float(value) * 3600) if value not in (None, "") else 0
+    if seconds < 0:
+        raise ValueError(f"{seconds_key} can't be negative")
+    return int(seconds)
+
+
+def normalize(record):
+    """A workout dict in the layout save_workout writes, or ValueError"""
+    day = record.get("date")
+    if not isinstance(day, str):
+        raise ValueError("missing date")
+    day = date.fromisoformat(day.strip()).isoformat()
+    start_time = (record.get("start_time") or "").strip()
+    if start_time:
+        if len(start_time) == 5:
+            start_time += ":00"
+        datetime.strptime(start_time, "%H:%M:%S")
+    total_seconds = _seconds(record, "total_seconds", "total_duration_hours")
+    exercise_seconds = _seconds(record, "exercise_seconds", "exercise_duration_hours")
+    if exercise_seconds > total_seconds:
+        raise ValueError("exercise_seconds is more than total_seconds")
+    manual = record.get("manual_save")
+    if isinstance(manual, str):
+        manual = manual.strip().lower() in TRUE_TEXT
+    notes = record.get("notes")
+    
+    workout = {
+        "date": day,
+        "start_time": start_time,
+        "total_duration_hours": round(total_seconds / 3600.0, 2),
+        "exercise_duration_hours": round(exercise_seconds / 3600.0, 2),
+        "total_seconds": total_seconds,
+        "exercise_seconds": exercise_seconds,
+        "notes": "" if notes is None else str(notes),
+    }
+    saved_at = record.get("saved_at")
+    if saved_at:
+        workout["saved_at"] = datetime.fromisoformat(str(saved_at).strip()).isoformat()
+    if manual is True:
+        workout["manual_save"] = True
+    for key in ("events", "user"):
+        if record.get(key):
+            workout[key] = record[key]
+    return workout
+
+
+def parse_chunk(fmt, fieldnames, lines, first_line):
+    """Parse and validate a chunk of lines (runs in a worker process)
+    
+    Returns (workouts, errors, rows) where errors holds (line, message).
+    """
+    workouts = []
+    errors = []
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO("".join(lines)), fieldnames=fieldnames)
+        records = ((first_line + reader.line_num - 1, record) for record in reader)
+    else:
+        records = ((first_line + i, line) for i, line in enumerate(lines) if line.strip())
+    rows = 0
+    for line_number, record in records:
+        rows += 1
+        try:
+            if fmt == "jsonl":
+                record = json.loads(record)
+                if not isinstance(record, dict):
+                    raise ValueError("not a JSON object")
+            workouts.append(normalize(record))
+        except (ValueError, TypeError) as e:
+            errors.append((line_number, str(e)))
+    return workouts, errors, rows
+
+
+def read_chunks(f, fmt, chunk_lines):
+    """Yield (first line number, lines) with chunk_lines lines or so each
+    
+    A CSV chunk only ends where the quotes are balanced, so a quoted note
+    spanning several lines stays in one chunk.
+    """
+    chunk = []
+    first_line = line_number = 1 if fmt == "jsonl" else 2
+    quotes = 0
+    for line in f:
+        chunk.append(line)
+        line_number += 1
+        if fmt == "csv":
+            quotes += line.count('"')
+        if len(chunk) >= chunk_lines and quotes % 2 == 0:
+            yield first_line, chunk
+            chunk = []
+            first_line = line_number
+            quotes = 0
+    if chunk:
+        yield first_line, chunk
+
+
+class ImportStats:
+    """What an import did"""
+    
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors = []            # the first MAX_ERRORS (line, message)
+        self.seconds = 0.0
+    
+    @property
+    def rows_per_second(self):
+        return round(self.rows / self.seconds) if self.seconds else 0
+    
+    def __str__(self):
+        return (f"{self.rows} rows: {self.imported} imported, {self.duplicates} duplicates, "
+                f"{self.invalid} invalid in {self.seconds:.2f} s ({self.rows_per_second} rows/s)")
+
+
+class MonthKeys:
+    """Dedup keys of the stored workouts, for the few most recent months used
+    
+    Keys for a month are read from its partition the first time a workout
+    of that month comes along. Only max_months months are held; a month
+    dropped earlier is read again from the store if needed, so flush()
+    must have written everything pending before keys are loaded.
+    """
+    
+    def __init__(self, store, flush, max_months=24):
+        self.store = store
+        self.flush = flush
+        self.max_months = max_months
+        self.months = OrderedDict()
+    
+    def seen(self, workout):
+        """True if the workout is stored already; otherwise remember it"""
+        month = workout["date"][:7]
+        keys = self.months.get(month)
+        if keys is None:
+            self.flush()
+            keys = self.months[month] = {dedup_key(stored) for stored in
+                                         self.store.partition(month).iter_workouts()}
+            if len(self.months) > self.max_months:
+                self.months.popitem(last=False)
+        else:
+            self.months.move_to_end(month)
+        key = dedup_key(workout)
+        if key in keys:
+            return True
+        keys.add(key)
+        return False
+
+
+def import_file(store, path, fmt=None, workers=None, chunk_lines=10000, batch_size=5000,
+                progress=None):
+    """Import a CSV or JSON Lines file into a partitioned store
+    
+    workers=0 parses in this process (None: one worker per CPU). progress(stats) is called after
+    every chunk. Returns the ImportStats.
+    """
+    fmt = file_format(path, fmt)
+    stats = ImportStats()
+    started = time.perf_counter()
+    pending = []
+    touched = set()
+    
+    def flush():
+        if pending:
+            store.append_many(pending)
+            touched.update(workout["date"][:7] for workout in pending)
+            pending.clear()
+    
+    keys = MonthKeys(store, flush)
+    
+    def take(result):
+        workouts, errors, rows = result
+        stats.rows += rows
+        stats.invalid += len(errors)
+        stats.errors.extend(errors[:MAX_ERRORS - len(stats.errors)])
+        for workout in workouts:
+            if keys.seen(workout):
+                stats.duplicates += 1
+                continue
+            pending.append(workout)
+            stats.imported += 1
+            if len(pending) >= batch_size:
+                flush()
+        stats.seconds = time.perf_counter() - started
+        if progress is not None:
+            progress(stats)
+    
+    with open(path, 'r', newline="" if fmt == "csv" else None, encoding="utf-8") as f:
+        fieldnames = None
+        if fmt == "csv":
+            fieldnames = next(csv.reader([f.readline()]), None)
+            if not fieldnames or "date" not in fieldnames:
+                raise ValueError("the CSV needs a header line with a 'date' column")
+        chunks = read_chunks(f, fmt, chunk_lines)
+        if workers == 0:
+            for first_line, lines in chunks:
+                take(parse_chunk(fmt, fieldnames, lines, first_line))
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # A couple of chunks per worker in flight, taken in file order
+                in_flight = deque()
+                for first_line, lines in chunks:
+                    in_flight.append(pool.submit(parse_chunk, fmt, fieldnames, lines, first_line))
+                    if len(in_flight) >= 2 * workers:
+                        take(in_flight.popleft().result())
+                while in_flight:
+                    take(in_flight.popleft().result())
+    flush()
+    
+    # Fold the appended logs into the month snapshots
+    for month in touched:
+        partition = store.partition(month)
+        if partition.needs_compaction():
+            partition.compact()
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def iter_months(store, archive_folder=None, first_month=None, last_month=None):
+    """Yield (month, date-sorted workouts) for the stored and archived months
+    
+    Every archive in the range is read and its workouts sorted into the
+    months of their own dates (older archives hold several months). A
+    workout that is in the store and in an archive, or in two archives,
+    is only yielded once, the stored copy winning (see workout_key).
+    """
+    from archive_format import iter_archive
+    from report_writer import merge_runs
+    from workout_core import archive_month, find_archives, workout_key, workout_sort_key
+    
+    def in_range(month):
+        return (not first_month or month >= first_month) and (not last_month or month <= last_month)
+    
+    stored = {month for month in store.months() if in_range(month)}
+    archived = {}   # month -> {workout_key: workout}
+    if archive_folder and os.path.isdir(archive_folder):
+        for _, path in find_archives(archive_folder, first_month, last_month):
+            for workout in iter_archive(path):
+                # Undated workouts stay with the month the archive is named after
+                month = (workout.get("date") or "")[:7] or archive_month(path)
+                if in_range(month):
+                    archived.setdefault(month, {}).setdefault(workout_key(workout), workout)
+    
+    for month in sorted(stored | set(archived)):
+        extra = archived.pop(month, {})
+        if month not in stored:
+            yield month, sorted(extra.values(), key=workout_sort_key)
+            continue
+        runs = store.partition(month).sorted_runs()
+        if extra:
+            workouts = list(merge_runs(runs))
+            for workout in workouts:
+                extra.pop(workout_key(workout), None)
+            runs = [workouts, sorted(extra.values(), key=workout_sort_key)]
+        yield month, merge_runs(runs)
+
+
+def export_file(store, path, fmt=None, archive_folder=None, first_month=None, last_month=None):
+    """Write the workouts of a range of months to a CSV or JSON Lines file
+    
+    The file is written under a temporary name and renamed when complete.
+    Returns (workouts, seconds).
+    """
+    from workout_record import as_dict
+    fmt = file_format(path, fmt)
+    started = time.perf_counter()
+    count = 0
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', newline="" if fmt == "csv" else None, encoding="utf-8") as f:
+        writer = None
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+        for month, workouts in iter_months(store, archive_folder, first_month, last_month):
+            for workout in workouts:
+                if writer is not None:
+                    writer.writerow(as_dict(workout))
+                else:
+                    f.write(json.dumps(as_dict(workout), separators=(",", ":")) + "\n")
+                count += 1
+    os.replace(temp_path, path)
+    return count, time.perf_counter() - started
@@ -0,0 +1,130 @@
+import mmap
+import os
+import struct
+import time
+import zlib
+
+# magic, version, flags, sequence, start (epoch us), written at (epoch ns),
+# main/exercise/rest elapsed ns, crc32 of everything before it
+RECORD = struct.Struct("<4sHHIqqqqqI")
+MAGIC = b"WKCP"
+VERSION = 1
+
+ACTIVE = 1
+MAIN_RUNNING = 2
+EXERCISE_RUNNING = 4
+REST_RUNNING = 8
+
+
+class SessionCheckpoint:
+    """The live workout, kept in a small fixed-size file for crash recovery
+    
+    The file is one RECORD (56 bytes) mapped into memory and overwritten
+    in place, so a checkpoint is a struct.pack_into() and costs a few
+    microseconds. A process crash can't lose it: the page belongs to the
+    OS as soon as it is written. A crc32 catches a record torn by a power
+    cut, in which case there is nothing to recover.
+    
+    write() is for state changes; maybe_write() is called every display
+    frame and only writes once `interval` seconds have passed.
+    """
+    
+    def __init__(self, path, interval=5.0):
+        self.path = path
+        self.interval_ns = int(interval * 1_000_000_000)
+        self.sequence = 0
+        self.last_write_ns = 0
+        
+        # Metrics
+        self.writes = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        
+        if not os.path.exists(path) or os.path.getsize(path) != RECORD.size:
+            with open(path, 'wb') as f:
+                f.write(bytes(RECORD.size))
+        self.file = open(path, 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), RECORD.size)
+    
+    def read(self):
+        """The saved session as a dict, or None if there isn't a valid active one"""
+        record = RECORD.unpack_from(self.map, 0)
+        magic, version, flags, sequence, start_us, written_ns, main_ns, exercise_ns, rest_ns, crc = record
+        if magic != MAGIC or version != VERSION:
+            return None
+        if zlib.crc32(self.map[:RECORD.size - 4]) != crc:
+            return None
+        self.sequence = sequence
+        if not flags & ACTIVE:
+            return None
+        return {
+            "start_time": start_us / 1_000_000,
+            "written_at": written_ns / 1_000_000_000,
+            "main_ns": main_ns,
+            "exercise_ns": exercise_ns,
+            "rest_ns": rest_ns,
+            "main_running": bool(flags & MAIN_RUNNING),
+            "exercise_running": bool(flags & EXERCISE_RUNNING),
+            "rest_running": bool(flags & REST_RUNNING),
+        }
+    
+    def write(self, clock, start_time):
+        """Checkpoint the clock now (start_time is the workout's datetime)"""
+        started = time.perf_counter_ns()
+        now = clock.clock()
+        flags = ACTIVE
+        if clock.main.running:
+            flags |= MAIN_RUNNING
+        if clock.exercise.running:
+            flags |= EXERCISE_RUNNING
+        if clock.rest.running:
+            flags |= REST_RUNNING
+        start_us = int(start_time.timestamp() * 1_000_000) if start_time else 0
+        self._put(flags, start_us, clock.main.elapsed_ns(now),
+                  clock.exercise.elapsed_ns(now), clock.rest.elapsed_ns(now))
+        self.last_write_ns = now
+        
+        cost = time.perf_counter_ns() - started
+        self.writes += 1
+        self.total_ns += cost
+        if cost > self.max_ns:
+            self.max_ns = cost
+    
+    def maybe_write(self, clock, start_time):
+        """write() if the last checkpoint is more than `interval` old"""
+        if clock.clock() - self.last_write_ns >= self.interval_ns:
+            self.write(clock, start_time)
+    
+    def clear(self):
+        """No session in progress any more"""
+        self._put(0, 0, 0, 0, 0)
+    
+    def _put(self, flags, start_us, main_ns, exercise_ns, rest_ns):
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        RECORD.pack_into(self.map, 0, MAGIC, VERSION, flags, self.sequence, start_us,
+                         time.time_ns(), main_ns, exercise_ns, rest_ns, 0)
+        crc = zlib.crc32(self.map[:RECORD.size - 4])
+        struct.pack_into("<I", self.map, RECORD.size - 4, crc)
+    
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.file.close()
+    
+    def stats(self):
+        """Write counters as a dict"""
+        average_us = self.total_ns / self.writes / 1000 if self.writes else 0.0
+        return {
+            "writes": self.writes,
+            "average_write_us": round(average_us, 1),
+            "max_write_us": round(self.max_ns / 1000, 1),
+            "interval_s": self.interval_ns / 1_000_000_000,
+        }
+    
+    def stats_text(self):
+        """Write counters as text for a messagebox"""
+        stats = self.stats()
+        return (f"Checkpoints written: {stats['writes']}\n"
+                f"Average write cost: {stats['average_write_us']} us\n"
+                f"Slowest write: {stats['max_write_us']} us\n"
+                f"Written every {stats['interval_s']:g} s while running, and on every change")
@@ -0,0 +1,142 @@
+import tkinter as tk
+from tkinter import ttk
+
+from render_loop import format_clock
+
+HEADINGS = {
+    "date": ("Date", 90),
+    "start_time": ("Start", 70),
+    "total_seconds": ("Duration", 80),
+    "exercise_seconds": ("Exercise", 80),
+    "notes": ("Notes", 260),
+}
+
+
+def format_duration(seconds):
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}:{format_clock(rest)}"
+
+
+class DataBrowser:
+    """Window listing the current workouts, only drawing the visible rows
+    
+    The Treeview holds a fixed set of `page_size` items whose values are
+    swapped as the list scrolls, so opening and scrolling cost the same at
+    a hundred workouts or a million. Rows come from a WorkoutIndex;
+    clicking a heading sorts by that column (again to reverse) and the
+    search box filters by note words and dates.
+    """
+    
+    def __init__(self, root, index, page_size=25):
+        self.index = index
+        self.page_size = page_size
+        self.rows = []
+        self.first = 0
+        self.sort_column = "date"
+        self.descending = True
+        self.search_job = None
+        
+        self.window = tk.Toplevel(root)
+        self.window.title("Current Workout Data")
+        
+        # Search box
+        search_frame = tk.Frame(self.window)
+        search_frame.pack(fill="x", padx=10, pady=5)
+        tk.Label(search_frame, text="Search notes/dates:").pack(side="left")
+        self.search_text = tk.StringVar()
+        self.search_text.trace_add("write", self.schedule_search)
+        entry = tk.Entry(search_frame, textvariable=self.search_text)
+        entry.pack(side="left", fill="x", expand=True, padx=5)
+        entry.focus_set()
+        
+        # The list with its own scrollbar
+        list_frame = tk.Frame(self.window)
+        list_frame.pack(fill="both", expand=True, padx=10)
+        self.tree = ttk.Treeview(list_frame, columns=list(HEADINGS), show="headings",
+                                 height=page_size, selectmode="browse")
+        for column, (title, width) in HEADINGS.items():
+            self.tree.heading(column, text=title, command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=width, stretch=(column == "notes"))
+        self.items = [self.tree.insert("", "end", values=()) for _ in range(page_size)]
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        # Scrolling moves our window over the rows, not the Treeview
+        self.tree.bind("<MouseWheel>", self.on_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_to(self.first - 3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_to(self.first + 3))
+        for key, step in (("<Prior>", -page_size), ("<Next>", page_size),
+                          ("<Up>", -1), ("<Down>", 1)):
+            self.window.bind(key, lambda event, step=step: self.scroll_to(self.first + step))
+        self.window.bind("<Home>", lambda event: self.scroll_to(0))
+        self.window.bind("<End>", lambda event: self.scroll_to(len(self.rows)))
+        
+        self.status_label = tk.Label(self.window, text="", anchor="w")
+        self.status_label.pack(fill="x", padx=10, pady=5)
+        
+        self.update_rows()
+    
+    def update_rows(self):
+        """Work out the rows to show after a sort or search change"""
+        self.rows = self.index.sorted_rows(self.sort_column, self.descending,
+                                           self.search_text.get())
+        for column, (title, _) in HEADINGS.items():
+            arrow = (" ▼" if self.descending else " ▲") if column == self.sort_column else ""
+            self.tree.heading(column, text=title + arrow)
+        self.scroll_to(0)
+    
+    def scroll_to(self, first):
+        """Show the page starting at row `first`"""
+        first = max(0, min(first, len(self.rows) - self.page_size))
+        self.first = first
+        for i, item in enumerate(self.items):
+            position = first + i
+            if position < len(self.rows):
+                day, start_time, total_seconds, exercise_seconds, notes = self.index.row(self.rows[position])
+                values = (day, start_time, format_duration(total_seconds),
+                          format_duration(exercise_seconds), notes.replace("\n", " "))
+            else:
+                values = ()
+            self.tree.item(item, values=values)
+        
+        total = len(self.rows)
+        if total:
+            self.scrollbar.set(first / total, min(1.0, (first + self.page_size) / total))
+            last = min(first + self.page_size, total)
+            self.status_label.config(text=f"Showing {first + 1}-{last} of {total} workouts")
+        else:
+            self.scrollbar.set(0.0, 1.0)
+            self.status_label.config(text="No workouts found.")
+    
+    def yview(self, action, amount, unit=None):
+        """Scrollbar command: 'moveto fraction' or 'scroll n units|pages'"""
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.rows)))
+        elif unit == "pages":
+            self.scroll_to(self.first + int(amount) * self.page_size)
+        else:
+            self.scroll_to(self.first + int(amount))
+    
+    def on_wheel(self, event):
+        self.scroll_to(self.first - 3 * (1 if event.delta > 0 else -1))
+        return "break"
+    
+    def sort_by(self, column):
+        """Sort by a column, or reverse the order if it already is"""
+        if column == self.sort_column:
+            self.descending = not self.descending
+        else:
+            self.sort_column = column
+            self.descending = False
+        self.update_rows()
+    
+    def schedule_search(self, *args):
+        """Search once typing pauses for a moment"""
+        if self.search_job is not None:
+            self.window.after_cancel(self.search_job)
+        self.search_job = self.window.after(150, self.run_search)
+    
+    def run_search(self):
+        self.search_job = None
+        self.update_rows()
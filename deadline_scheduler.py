@@ -0,0 +1,136 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from collections import deque
+
+import metrics
+
+
+class DeadlineScheduler:
+    """Calls functions at deadlines on the monotonic clock, from one thread
+    
+    Deadlines sit in a heap, so the thread only ever looks at the earliest
+    one and any number of interval programs share it. It sleeps until
+    shortly before that deadline and then spins for the last spin_ns,
+    which brings firing within a fraction of a millisecond of the
+    deadline on an idle machine; calls due together run in one go. Callbacks get the deadline they
+    were due at, so whatever they record can use the exact deadline
+    instead of the moment they happened to run.
+    """
+    
+    def __init__(self, clock=time.monotonic_ns, spin_ns=500_000, name="deadline-scheduler"):
+        self.clock = clock
+        self.spin_ns = spin_ns
+        self.heap = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.stopped = False
+        
+        # Lateness of every call made, for the stats
+        self.fired = 0
+        self.total_late_ns = 0
+        self.max_late_ns = 0
+        self.recent_late_ns = deque(maxlen=10000)
+        
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+    
+    def call_at(self, deadline_ns, callback, *args):
+        """Call callback(deadline_ns, *args) at deadline_ns; returns a handle for cancel()"""
+        entry = [deadline_ns, next(self.counter), callback, args]
+        with self.condition:
+            heapq.heappush(self.heap, entry)
+            # Wake the thread if this is now the earliest deadline
+            if self.heap[0] is entry:
+                self.condition.notify()
+        return entry
+    
+    def call_later(self, delay_ns, callback, *args):
+        return self.call_at(self.clock() + delay_ns, callback, *args)
+    
+    def cancel(self, handle):
+        """Drop a pending call (does nothing if it already ran)"""
+        with self.condition:
+            handle[2] = None
+    
+    def pending(self):
+        with self.condition:
+            return sum(1 for entry in self.heap if entry[2] is not None)
+    
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.stopped:
+                    while self.heap and self.heap[0][2] is None:
+                        heapq.heappop(self.heap)
+                    if not self.heap:
+                        self.condition.wait()
+                        continue
+                    wait_ns = self.heap[0][0] - self.clock() - self.spin_ns
+                    if wait_ns <= 0:
+                        break
+                    self.condition.wait(wait_ns / 1e9)
+                if self.stopped:
+                    return
+                deadline_ns = self.heap[0][0]
+            
+            # Spin for the last moment instead of trusting a coarse sleep
+            while self.clock() < deadline_ns:
+                pass
+            
+            # Everything due by now runs in one go
+            due = []
+            with self.condition:
+                now = self.clock()
+                while self.heap and self.heap[0][0] <= now:
+                    entry = heapq.heappop(self.heap)
+                    if entry[2] is None:
+                        continue
+                    late_ns = now - entry[0]
+                    self.fired += 1
+                    self.total_late_ns += late_ns
+                    if late_ns > self.max_late_ns:
+                        self.max_late_ns = late_ns
+                    self.recent_late_ns.append(late_ns)
+                    metrics.observe("interval.switch_late", late_ns / 1e9)
+                    due.append(entry)
+            for deadline_ns, _, callback, args in due:
+                try:
+                    callback(deadline_ns, *args)
+                except Exception:
+                    # One program's mistake must not stop the others, but it is reported
+                    metrics.inc("interval.callback_error")
+                    traceback.print_exc()
+    
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+    
+    def stats(self):
+        with self.condition:
+            average_us = self.total_late_ns / self.fired / 1000 if self.fired else 0.0
+            recent = sorted(self.recent_late_ns) or [0]
+            return {
+                "fired": self.fired,
+                "pending": sum(1 for entry in self.heap if entry[2] is not None),
+                "average_late_us": round(average_us, 1),
+                "p50_late_us": round(recent[len(recent) // 2] / 1000, 1),
+                "p99_late_us": round(recent[min(len(recent) - 1, len(recent) * 99 // 100)] / 1000, 1),
+                "max_late_us": round(self.max_late_ns / 1000, 1),
+            }
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_scheduler():
+    """The process-wide scheduler every window's programs run on"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = DeadlineScheduler()
+        return _shared
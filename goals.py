@@ -0,0 +1,285 @@
+"""Training goals, kept up to date one saved workout at a time.
+
+Goals are written like the README's examples and kept in goals.json:
+    
+    12 workouts per month
+    15 exercise hours per month
+    3 hours per week
+    4 week streak               (a workout every week, 4 weeks running)
+    30 day streak
+
+Each goal keeps a little running state (the period it is in and what it
+has counted so far), so a save costs a few additions per goal whatever
+the history. Like SummaryCache the state remembers the store's
+generation and is only rebuilt from the store when something else
+changed the data, reading just the months the goals can look back on.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import date
+
+import metrics
+
+PERIODS = ("day", "week", "month")
+METRICS = ("workouts", "total_hours", "exercise_hours", "streak")
+GOAL_TEXT = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(?:(exercise\s+)?(workouts?|hours?)\s*(?:per|/|a)\s*"
+                       r"(day|week|month)|-?\s*(day|week|month)s?\s*-?\s*streak)\s*$", re.IGNORECASE)
+
+
+def period_index(day_ordinal, period):
+    """Periods counted from year 1: days, Monday-to-Sunday weeks, months"""
+    if period == "day":
+        return day_ordinal
+    if period == "week":
+        return (day_ordinal - 1) // 7
+    day = date.fromordinal(day_ordinal)
+    return day.year * 12 + day.month - 1
+
+
+class Goal:
+    """One target, with its running state
+    
+    metric is workouts, total_hours or exercise_hours, counted per period,
+    or streak: consecutive periods with at least one workout.
+    """
+    
+    def __init__(self, name, metric, target, period="month"):
+        if metric not in METRICS:
+            raise ValueError(f"unknown goal metric {metric!r}")
+        if period not in PERIODS:
+            raise ValueError(f"unknown goal period {period!r}")
+        if not target > 0:
+            raise ValueError("a goal needs a target above 0")
+        self.name = name
+        self.metric = metric
+        self.target = target
+        self.period = period
+        # What add() counts: whole workouts or seconds
+        self.unit = 3600 if metric.endswith("_hours") else 1
+        self.reset()
+    
+    def reset(self):
+        self.current = None         # the latest period seen
+        self.value = 0              # workouts or seconds in it
+        self.run = 0                # streaks: periods in a row up to the one before current
+    
+    def add(self, period, amount):
+        """Count a workout of `period`; False if it is older than the state can take"""
+        current = self.current
+        if period == current:
+            self.value += amount
+            return True
+        if current is not None and period < current:
+            # Per-period goals only care about the latest period
+            return self.metric != "streak"
+        if self.metric == "streak":
+            self.run = self.run + 1 if current is not None and period == current + 1 else 0
+        self.current = period
+        self.value = amount
+        return True
+    
+    def progress(self, today):
+        """(done so far, target) as of today's period index"""
+        if self.metric == "streak":
+            if self.current is None or self.current < today - 1:
+                return 0, self.target
+            # This period still counts as on the way until it is over
+            return min(self.run + 1, self.target), self.target
+        if self.current != today:
+            return 0, self.target
+        return self.value / self.unit, self.target
+    
+    def lookback(self):
+        """Roughly how many days of history rebuilding the state needs"""
+        length = {"day": 1, "week": 7, "month": 31}[self.period]
+        if self.metric == "streak":
+            return int(self.target + 1) * length
+        return length
+    
+    def text(self, done, target):
+        """'12 workouts per month: 7/12'"""
+        if self.metric == "total_hours" or self.metric == "exercise_hours":
+            return f"{self.name}: {done:.1f}/{target:g}"
+        return f"{self.name}: {done:g}/{target:g}"
+    
+    def to_json(self):
+        return {"name": self.name, "metric": self.metric, "target": self.target,
+                "period": self.period}
+    
+    def state(self):
+        return [self.current, self.value, self.run]
+    
+    def set_state(self, state):
+        self.current, self.value, self.run = state
+
+
+def parse_goal(text):
+    """'12 workouts per month' / '15 exercise hours per month' / '4 week streak' -> Goal"""
+    match = GOAL_TEXT.match(text)
+    if match is None:
+        raise ValueError("write a goal like '12 workouts per month', "
+                         "'15 exercise hours per month' or '4 week streak'")
+    number, exercise, unit, per, streak_period = match.groups()
+    target = float(number)
+    if target == int(target):
+        target = int(target)
+    name = " ".join(text.split()).lower()
+    if streak_period:
+        return Goal(name, "streak", target, streak_period.lower())
+    if unit.lower().startswith("workout"):
+        return Goal(name, "workouts", target, per.lower())
+    return Goal(name, "exercise_hours" if exercise else "total_hours", target, per.lower())
+
+
+class GoalTracker:
+    """The goals of one data folder and their progress
+    
+    observe() is handed every batch the writer thread saves and adds it
+    to each goal's state; progress() only reads that state. Goals of the
+    same period share the period lookup, so even hundreds of goals cost
+    well under a millisecond a save. A lock guards the state because saves
+    come from the write-behind thread while the window reads it.
+    """
+    
+    def __init__(self, goals_file, store):
+        self.goals_file = goals_file
+        self.state_file = os.path.splitext(goals_file)[0] + "_state.json"
+        self.store = store
+        self.lock = threading.RLock()
+        self.goals = []
+        self.generation = None
+        self.last_day = None        # (date text, ordinal) of the last workout seen
+        self.load()
+    
+    def load(self):
+        """Read the goals and, if it is there, their saved state"""
+        try:
+            with open(self.goals_file, 'r') as f:
+                self.goals = [Goal(**goal) for goal in json.load(f)["goals"]]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            self.goals = []
+        self.hash = self.goals_hash()
+        try:
+            with open(self.state_file, 'r') as f:
+                data = json.load(f)
+            if data["goals_hash"] != self.hash:
+                raise KeyError("goals changed")
+            for goal, state in zip(self.goals, data["states"]):
+                goal.set_state(state)
+            self.generation = data["generation"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError):
+            self.generation = None
+    
+    def _write(self, path, data):
+        temp_file = path + ".tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(temp_file, path)
+    
+    def goals_hash(self):
+        """Fingerprint of the goal list, so a state is only used with its own goals"""
+        text = json.dumps([goal.to_json() for goal in self.goals], sort_keys=True)
+        return hashlib.sha1(text.encode()).hexdigest()
+    
+    def save_goals(self):
+        self._write(self.goals_file, {"goals": [goal.to_json() for goal in self.goals]})
+        self.hash = self.goals_hash()
+    
+    def save(self):
+        """Write the goals' state (the goals it belongs to are stored with it)"""
+        self._write(self.state_file, {"generation": self.generation, "goals_hash": self.hash,
+                                      "states": [goal.state() for goal in self.goals]})
+    
+    def add_goal(self, goal):
+        with self.lock:
+            if any(existing.name == goal.name for existing in self.goals):
+                raise ValueError(f"there is already a goal '{goal.name}'")
+            self.goals.append(goal)
+            self.generation = None
+            self.save_goals()
+    
+    def remove_goal(self, name):
+        with self.lock:
+            self.goals = [goal for goal in self.goals if goal.name != name]
+            self.save_goals()
+            self.save()
+    
+    def _ordinal(self, workout):
+        day = workout.get("date", "")
+        if self.last_day is None or self.last_day[0] != day:
+            self.last_day = (day, date.fromisoformat(day).toordinal())
+        return self.last_day[1]
+    
+    def _add(self, workouts):
+        """Add workouts to every goal; False if one came too late for a streak"""
+        in_order = True
+        by_period = {}
+        for goal in self.goals:
+            by_period.setdefault(goal.period, []).append(goal)
+        for workout in workouts:
+            try:
+                ordinal = self._ordinal(workout)
+            except ValueError:
+                continue
+            amounts = {"workouts": 1, "streak": 1,
+                       "total_hours": workout.get("total_seconds", 0) or 0,
+                       "exercise_hours": workout.get("exercise_seconds", 0) or 0}
+            for period, goals in by_period.items():
+                index = period_index(ordinal, period)
+                for goal in goals:
+                    if not goal.add(index, amounts[goal.metric]):
+                        in_order = False
+        return in_order
+    
+    @metrics.timed("goals.observe")
+    def observe(self, workouts, generation_before):
+        """Add just-saved workouts if the state was current before the save"""
+        with self.lock:
+            if not self.goals or self.generation != generation_before:
+                return
+            if self._add(workouts):
+                self.generation = self.store.generation()
+                self.save()
+            else:
+                self.generation = None
+    
+    @metrics.timed("goals.rebuild")
+    def rebuild(self):
+        """Work the state out again from the months the goals look back on"""
+        from report_writer import merge_runs
+        with self.lock:
+            for goal in self.goals:
+                goal.reset()
+            self.generation = self.store.generation()
+            if self.goals:
+                days = max(goal.lookback() for goal in self.goals)
+                first = date.fromordinal(date.today().toordinal() - days).strftime("%Y-%m")
+                for month in self.store.months():
+                    if month >= first:
+                        for workout in merge_runs(self.store.partition(month).sorted_runs()):
+                            self._add([workout])
+            self.save()
+    
+    def progress(self, today=None):
+        """[(goal, done, target)] as of today, rebuilt first if stale"""
+        with self.lock:
+            if self.goals and self.generation != self.store.generation():
+                self.rebuild()
+            ordinal = (today or date.today()).toordinal()
+            periods = {period: period_index(ordinal, period) for period in PERIODS}
+            return [(goal,) + goal.progress(periods[goal.period]) for goal in self.goals]
+    
+    def summary_text(self, limit=3):
+        """One line for the main window: the first few goals and how far along"""
+        progress = self.progress()
+        if not progress:
+            return ""
+        parts = [goal.text(done, target) for goal, done, target in progress[:limit]]
+        done = sum(1 for _, value, target in progress if value >= target)
+        text = "Goals: " + "  |  ".join(parts)
+        if len(progress) > limit:
+            text += f"  (+{len(progress) - limit} more)"
+        return text + f"  -  {done}/{len(progress)} reached"
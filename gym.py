@@ -0,0 +1,172 @@
+"""Several athletes' timers in one window process.
+    
+    python gym.py
+
+Every athlete gets a WorkoutTimer window with their own data folder
+(users/<name>/). All windows run on the one Tk event loop, and all saves
+go through one shared background writer, so adding athletes adds no
+threads and doesn't slow down anyone's saves or summary.
+"""
+import os
+import threading
+import tkinter as tk
+from tkinter import messagebox, simpledialog
+
+import workout_core
+from timer import WorkoutTimer
+from write_behind import WriteBehindQueue, unsaved_part, write_with_retries
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class AthleteWriter:
+    """One athlete's view of the gym's shared WriteBehindQueue
+    
+    Has the methods WorkoutTimer uses on its writer.
+    """
+    
+    def __init__(self, gym, user):
+        self.gym = gym
+        self.user = user
+    
+    def submit(self, workout):
+        self.gym.writer.submit((self.user, workout))
+    
+    def pending(self):
+        return self.gym.writer.pending()
+    
+    def flush(self, timeout=None):
+        return self.gym.writer.flush(timeout)
+    
+    def shutdown(self, timeout=None):
+        # The shared worker keeps running for the others
+        return self.flush(timeout)
+    
+    def take_failures(self):
+        return self.gym.take_failures(self.user)
+    
+    def stats_text(self):
+        return self.gym.writer.stats_text()
+
+
+class Gym:
+    """Launcher window: pick an athlete, open their timer, see the leaderboard"""
+    
+    def __init__(self, root, base_dir=SCRIPT_DIR):
+        self.root = root
+        self.base_dir = base_dir
+        self.timers = {}            # user -> WorkoutTimer
+        self.write_batches = {}     # user -> that timer's write_batch
+        self.failures = {}          # user -> [(workouts, error), ...]
+        self.lock = threading.Lock()
+        self.writer = WriteBehindQueue(self.write_shared_batch)
+        
+        self.root.title("Gym")
+        self.root.geometry("320x400")
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_app)
+        
+        tk.Label(root, text="Athletes", font=("Arial", 14, "bold")).pack(pady=10)
+        self.user_list = tk.Listbox(root, height=10)
+        self.user_list.pack(fill="both", expand=True, padx=10)
+        self.user_list.bind("<Double-Button-1>", lambda event: self.open_selected())
+        
+        button_frame = tk.Frame(root)
+        button_frame.pack(pady=10)
+        tk.Button(button_frame, text="Open Timer", width=12,
+                  command=self.open_selected).grid(row=0, column=0, padx=5)
+        tk.Button(button_frame, text="Add Athlete", width=12,
+                  command=self.add_athlete).grid(row=0, column=1, padx=5)
+        tk.Button(root, text="Leaderboard", width=26, bg="orange",
+                  command=self.show_leaderboard).pack(pady=5)
+        
+        self.refresh_users()
+    
+    def refresh_users(self):
+        self.user_list.delete(0, tk.END)
+        for user in workout_core.list_users(self.base_dir):
+            self.user_list.insert(tk.END, user)
+    
+    def add_athlete(self):
+        name = simpledialog.askstring("Add Athlete", "Athlete name:")
+        if name and name.strip():
+            os.makedirs(workout_core.user_dir(self.base_dir, name), exist_ok=True)
+            self.refresh_users()
+    
+    def open_selected(self):
+        selection = self.user_list.curselection()
+        if not selection:
+            messagebox.showinfo("Gym", "Pick an athlete first.")
+            return
+        self.open_athlete(self.user_list.get(selection[0]))
+    
+    def open_athlete(self, user):
+        """Open an athlete's timer window, or bring it to the front"""
+        if user in self.timers:
+            self.timers[user].root.lift()
+            return
+        window = tk.Toplevel(self.root)
+        self.timers[user] = WorkoutTimer(window, user=user, gym=self)
+    
+    def attach(self, user, write_batch):
+        """Called by a WorkoutTimer: route this athlete's saves to write_batch"""
+        with self.lock:
+            self.write_batches[user] = write_batch
+        return AthleteWriter(self, user)
+    
+    def detach(self, user):
+        """Called when an athlete's window closes (their saves are flushed)"""
+        with self.lock:
+            self.write_batches.pop(user, None)
+        self.timers.pop(user, None)
+    
+    def write_shared_batch(self, items):
+        """Runs on the writer thread: one write per athlete in the batch"""
+        by_user = {}
+        for user, workout in items:
+            by_user.setdefault(user, []).append(workout)
+        for user, workouts in by_user.items():
+            with self.lock:
+                write_batch = self.write_batches.get(user)
+            if write_batch is None:
+                error, retries = RuntimeError(f"{user}'s timer is closed"), 0
+            else:
+                error, retries = write_with_retries(write_batch, workouts, self.writer.retries,
+                                                    self.writer.retry_delay)
+            self.writer.count_write(error, retries)
+            if error is not None:
+                # Only this athlete's batch failed; the others are written
+                with self.lock:
+                    self.failures.setdefault(user, []).append((unsaved_part(workouts, error), error))
+    
+    def take_failures(self, user):
+        with self.lock:
+            return self.failures.pop(user, [])
+    
+    def show_leaderboard(self):
+        """This month's ranking from each athlete's summary"""
+        self.writer.flush()
+        board = workout_core.leaderboard(self.base_dir)
+        if not board:
+            messagebox.showinfo("Leaderboard", "No athletes yet.")
+            return
+        lines = ["This month, by total hours:", ""]
+        for place, (user, totals) in enumerate(board, 1):
+            lines.append(f"{place}. {user}: {totals['total_hours']:.1f} hours, "
+                         f"{totals['count']} workouts")
+        messagebox.showinfo("Leaderboard", "\n".join(lines))
+    
+    def exit_app(self):
+        """Close every athlete's timer, then stop the shared writer"""
+        for timer in list(self.timers.values()):
+            timer.exit_app()
+        if self.timers:
+            # Someone chose not to exit while saves were pending
+            return
+        self.writer.shutdown(timeout=10)
+        self.root.quit()
+
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    app = Gym(root)
+    root.mainloop()
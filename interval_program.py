@@ -0,0 +1,242 @@
+"""Interval workouts (Tabata, EMOM, custom sets) that switch phases by themselves.
+
+A program is written as rounds of work/rest phases, nested as deep as
+needed:
+    
+    tabata                  8x(20w,10r)
+    emom 12                 12 rounds of 40 s work, 20 s rest
+    3x(5x(30w,15r),60r)     3 sets of 5 rounds, a minute of rest between sets
+
+IntervalRunner switches the WorkoutClock between exercise and rest at
+each phase deadline using a DeadlineScheduler, so the recorded switch
+times are the planned ones and never drift, however long the program.
+"""
+import queue
+import re
+import threading
+
+from deadline_scheduler import shared_scheduler
+
+WORK = "work"
+REST = "rest"
+TOKEN = re.compile(r"\s*(?:(\d+)\s*x\s*\(|(\))|(,)|(\d+(?:\.\d+)?)\s*([wr]))", re.IGNORECASE)
+
+
+class Phase:
+    """One stretch of work or rest"""
+    
+    def __init__(self, kind, seconds, label=""):
+        self.kind = kind
+        self.seconds = seconds
+        self.label = label
+    
+    def __repr__(self):
+        return f"Phase({self.kind!r}, {self.seconds}, {self.label!r})"
+
+
+def parse_items(text):
+    """'8x(20w,10r)' -> [(8, [("work", 20), ("rest", 10)])]"""
+    position = 0
+    
+    def parse_list(closing):
+        nonlocal position
+        items = []
+        while True:
+            match = TOKEN.match(text, position)
+            if match is None:
+                raise ValueError(f"can't read {text[position:]!r} (expected e.g. 20w, 10r or 3x(...))")
+            position = match.end()
+            rounds, close, comma, seconds, kind = match.groups()
+            if rounds:
+                items.append((int(rounds), parse_list(True)))
+            elif seconds:
+                items.append((WORK if kind.lower() == "w" else REST, float(seconds)))
+            elif close:
+                if not closing:
+                    raise ValueError("unexpected ')'")
+                return items
+            if comma:
+                continue
+            # After an item comes ',', ')' or the end
+            rest = text[position:].strip()
+            if not rest:
+                if closing:
+                    raise ValueError("missing ')'")
+                return items
+            if not rest.startswith((",", ")")):
+                raise ValueError(f"expected ',' or ')' before {rest!r}")
+    
+    items = parse_list(False)
+    if not items:
+        raise ValueError("empty program")
+    return items
+
+
+def parse_program(text):
+    """A program from text: 'tabata', 'emom 10 [work seconds]' or a round spec"""
+    words = text.strip().lower().split()
+    if not words:
+        raise ValueError("empty program")
+    if words[0] == "tabata":
+        return [(8, [(WORK, 20), (REST, 10)])]
+    if words[0] == "emom":
+        minutes = int(words[1]) if len(words) > 1 else 10
+        work = int(words[2]) if len(words) > 2 else 40
+        if not 0 < work < 60:
+            raise ValueError("EMOM work must be 1-59 seconds of each minute")
+        return [(minutes, [(WORK, work), (REST, 60 - work)])]
+    return parse_items(text)
+
+
+def expand(items, path=()):
+    """Flatten nested rounds into the list of phases, labelled with their round"""
+    phases = []
+    for item in items:
+        if item[0] in (WORK, REST):
+            label = ", ".join(f"{i}/{n}" for i, n in path)
+            if item[1] > 0:
+                phases.append(Phase(item[0], item[1], label))
+        else:
+            rounds, inner = item
+            for i in range(1, rounds + 1):
+                phases.extend(expand(inner, path + ((i, rounds),)))
+    return phases
+
+
+def describe(phases):
+    """'16 phases, 4:00' for a confirmation message"""
+    total = round(sum(phase.seconds for phase in phases))
+    return f"{len(phases)} phases, {total // 60}:{total % 60:02d}"
+
+
+class IntervalRunner:
+    """Drives a WorkoutClock through a list of phases
+    
+    Phase i ends at origin + the summed length of phases 0..i; pausing
+    moves the origin by the time spent paused. Only the next deadline is
+    ever scheduled. The scheduler thread makes the switches; the window
+    collects the cues (phase changes, finish) with take_cues() when it
+    draws, so no Tk call happens off the main thread; ns_to_switch()
+    tells it when to draw next so the cue isn't left for a later frame. All clock changes
+    go through the lock, which the window's pause/resume also takes.
+    """
+    
+    def __init__(self, clock, phases, scheduler=None):
+        self.clock = clock
+        self.phases = phases
+        self.scheduler = scheduler or shared_scheduler()
+        self.ends = []
+        total_ns = 0
+        for phase in phases:
+            total_ns += round(phase.seconds * 1e9)
+            self.ends.append(total_ns)
+        self.lock = threading.Lock()
+        self.cues = queue.Queue()
+        self.index = -1
+        self.origin_ns = None
+        self.paused_at = None
+        self.handle = None
+        self.finished = False
+        
+        # How late the phase switches ran
+        self.switches = 0
+        self.max_late_ns = 0
+    
+    @property
+    def running(self):
+        return self.handle is not None
+    
+    def start(self):
+        """Start the first phase now (the workout starts too if it hasn't)"""
+        with self.lock:
+            now = self.clock.clock()
+            self.origin_ns = now
+            self.clock.start(now)
+            self._enter(0, now)
+    
+    def _enter(self, index, now):
+        phase = self.phases[index]
+        self.index = index
+        if phase.kind == WORK:
+            self.clock.start_exercise(now)
+        else:
+            self.clock.start_rest(now)
+        self.cues.put((phase.kind, phase, now))
+        self.handle = self.scheduler.call_at(self.origin_ns + self.ends[index],
+                                             self._phase_over, index)
+    
+    def _phase_over(self, deadline_ns, index):
+        """Scheduler thread: phase `index` is over, switch at its deadline"""
+        with self.lock:
+            if self.handle is None or index != self.index:
+                return
+            late_ns = self.clock.clock() - deadline_ns
+            self.switches += 1
+            self.max_late_ns = max(self.max_late_ns, late_ns)
+            if index + 1 < len(self.phases):
+                self._enter(index + 1, deadline_ns)
+            else:
+                self.handle = None
+                self.finished = True
+                self.clock.pause(deadline_ns)
+                self.cues.put(("done", None, deadline_ns))
+    
+    def pause(self):
+        """Pause the program and the workout together"""
+        with self.lock:
+            if self.handle is None:
+                return
+            now = self.clock.clock()
+            self.scheduler.cancel(self.handle)
+            self.handle = None
+            self.paused_at = now
+            self.clock.pause(now)
+    
+    def resume(self):
+        """Carry on with the interrupted phase for the time it had left"""
+        with self.lock:
+            if self.paused_at is None or self.finished:
+                return
+            now = self.clock.clock()
+            self.origin_ns += now - self.paused_at
+            self.paused_at = None
+            self.clock.start(now)
+            if self.phases[self.index].kind == WORK:
+                self.clock.start_exercise(now)
+            else:
+                self.clock.start_rest(now)
+            self.handle = self.scheduler.call_at(self.origin_ns + self.ends[self.index],
+                                                 self._phase_over, self.index)
+    
+    def stop(self):
+        """Stop switching phases (the clock is left as it is)"""
+        with self.lock:
+            if self.handle is not None:
+                self.scheduler.cancel(self.handle)
+                self.handle = None
+            self.finished = True
+    
+    def phase_left(self):
+        """(phase, whole seconds left in it), or (None, 0) once finished"""
+        with self.lock:
+            if self.finished or self.index < 0:
+                return None, 0
+            now = self.paused_at if self.paused_at is not None else self.clock.clock()
+            left_ns = self.origin_ns + self.ends[self.index] - now
+            return self.phases[self.index], max(0, -(-left_ns // 1_000_000_000))
+    
+    def ns_to_switch(self):
+        """Nanoseconds until the current phase ends, or None if paused or finished"""
+        with self.lock:
+            if self.handle is None:
+                return None
+            return self.origin_ns + self.ends[self.index] - self.clock.clock()
+    
+    def take_cues(self):
+        """Cues since the last call: (kind, phase, time_ns), kind work/rest/done"""
+        cues = []
+        while True:
+            try:
+                cues.append(self.cues.get_nowait())
+            except queue.Empty:
+                return cues
@@ -0,0 +1,258 @@
+"""Counters, latency histograms and spans for finding where the time goes.
+
+Off by default. Everything that is instrumented checks one module flag
+first, so with metrics off a span costs a function call and returns a
+shared do-nothing object. Turn them on with WORKOUT_METRICS=1, with
+enable(), from Tools > Diagnostics in the window or with
+`workout_cli --metrics FILE ...`.
+    
+    with metrics.span("report.render"):
+        ...
+    
+    @metrics.timed("store.append")
+    def append_many(self, workouts): ...
+    
+    metrics.observe("timer.tick_late", seconds)   # measured elsewhere
+    metrics.inc("save.workouts", len(batch))
+
+Histograms keep Prometheus-style buckets for the export and the last
+RECENT values for p50/p99. The most recent spans are kept as a trace
+(name, parent, thread, start, duration) in the JSON snapshot.
+"""
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Histogram bucket bounds in seconds, 10 us to 10 s
+BOUNDS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+          0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT = 2048
+TRACE_LENGTH = 500
+
+enabled = os.environ.get("WORKOUT_METRICS", "") not in ("", "0")
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_trace = deque(maxlen=TRACE_LENGTH)
+_local = threading.local()
+_started = time.time()
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+class Counter:
+    def __init__(self, name):
+        self.name = name
+        self.value = 0
+        self.lock = threading.Lock()
+    
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+
+class Histogram:
+    """Latencies in seconds: bucket counts, sum, max and the recent values"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.counts = [0] * (len(BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=RECENT)
+        self.lock = threading.Lock()
+    
+    def observe(self, seconds):
+        with self.lock:
+            self.counts[bisect_left(BOUNDS, seconds)] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+            self.recent.append(seconds)
+    
+    def percentile(self, p):
+        """p-th percentile of the recent values (0.0 if there are none)"""
+        with self.lock:
+            values = sorted(self.recent)
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, len(values) * p // 100)]
+
+
+def counter(name):
+    found = _counters.get(name)
+    if found is None:
+        with _lock:
+            found = _counters.setdefault(name, Counter(name))
+    return found
+
+
+def histogram(name):
+    found = _histograms.get(name)
+    if found is None:
+        with _lock:
+            found = _histograms.setdefault(name, Histogram(name))
+    return found
+
+
+def inc(name, amount=1):
+    if enabled:
+        counter(name).inc(amount)
+
+
+def observe(name, seconds):
+    if enabled:
+        histogram(name).observe(seconds)
+
+
+class Span:
+    """Times a block into the histogram of its name and the trace"""
+    
+    __slots__ = ("name", "parent", "started")
+    
+    def __init__(self, name):
+        self.name = name
+    
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        stack.append(self.name)
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.started
+        _local.stack.pop()
+        histogram(self.name).observe(seconds)
+        _trace.append((self.name, self.parent, threading.current_thread().name,
+                       self.started, seconds))
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name):
+    """Context manager timing a block (does nothing while metrics are off)"""
+    if not enabled:
+        return _NO_SPAN
+    return Span(name)
+
+
+def timed(name):
+    """Decorator: a span around every call of the function"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def reset():
+    """Forget everything recorded so far"""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _trace.clear()
+
+
+def _sorted_items(table):
+    """(name, metric) pairs of _counters or _histograms, copied under _lock"""
+    with _lock:
+        return sorted(table.items())
+
+
+def _histogram_rows():
+    """[(operation, count, sum s, p50 s, p99 s, max s)] sorted by operation"""
+    rows = []
+    for name, found in _sorted_items(_histograms):
+        with found.lock:
+            count, total, most = found.count, found.sum, found.max
+        rows.append((name, count, total, found.percentile(50), found.percentile(99), most))
+    return rows
+
+
+def latency_table():
+    """[(operation, count, p50 s, p99 s, max s)] sorted by operation"""
+    return [(name, count, p50, p99, most)
+            for name, count, _, p50, p99, most in _histogram_rows()]
+
+
+def snapshot():
+    """Everything recorded, as a JSON-ready dict"""
+    clock_offset = time.time() - time.perf_counter()
+    return {
+        "enabled": enabled,
+        "taken_at": time.time(),
+        "uptime_s": round(time.time() - _started, 1),
+        "counters": {name: found.value for name, found in _sorted_items(_counters)},
+        "histograms": {
+            name: {"count": count, "sum_s": round(total, 6),
+                   "p50_ms": round(p50 * 1000, 3), "p99_ms": round(p99 * 1000, 3),
+                   "max_ms": round(most * 1000, 3)}
+            for name, count, total, p50, p99, most in _histogram_rows()
+        },
+        "trace": [{"name": name, "parent": parent, "thread": thread,
+                   "start": round(clock_offset + started, 6), "ms": round(seconds * 1000, 3)}
+                  for name, parent, thread, started, seconds in list(_trace)],
+    }
+
+
+def prom_name(name):
+    """'store.append' -> 'workout_store_append'"""
+    return "workout_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def prometheus_text():
+    """The counters and histograms in the Prometheus text format"""
+    lines = []
+    for name, found in _sorted_items(_counters):
+        metric = prom_name(name) + "_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {found.value}"]
+    for name, found in _sorted_items(_histograms):
+        metric = prom_name(name) + "_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        with found.lock:
+            counts = list(found.counts)
+            total, count = found.sum, found.count
+        cumulative = 0
+        for bound, bucket in zip(BOUNDS + (None,), counts):
+            cumulative += bucket
+            le = "+Inf" if bound is None else repr(bound)
+            lines.append(f'{metric}_bucket{{le="{le}"}} {cumulative}')
+        lines += [f"{metric}_sum {total}", f"{metric}_count {count}"]
+    return "\n".join(lines) + "\n"
+
+
+def write(path):
+    """Export to path: JSON for *.json, Prometheus text otherwise"""
+    import json
+    text = json.dumps(snapshot(), indent=2) if path.endswith(".json") else prometheus_text()
+    temp_file = path + ".tmp"
+    with open(temp_file, 'w') as f:
+        f.write(text)
+    os.replace(temp_file, path)
@@ -0,0 +1,351 @@
+import bisect
+import json
+import os
+import re
+import threading
+
+from workout_core import archive_month, find_archives, is_month_archive
+
+WORD = re.compile(r"[\w-]+")
+DATE_FILTER = re.compile(r"^\d{4}(-\d{2})?$")
+VERSION = 1
+CURRENT = "current"
+# Saves logged since the current segment file was last written
+MERGE_EVERY = 200
+
+
+def words(text):
+    """Lower-case search words of a note"""
+    return WORD.findall(text.lower())
+
+
+def parse_query(query):
+    """'squat 2025' -> (['squat'], '2025-01-01', '2025-12-31')
+    
+    A year or YYYY-MM in the query limits the dates instead of being a word.
+    """
+    terms = []
+    first_date = last_date = None
+    for part in query.split():
+        if DATE_FILTER.match(part):
+            first_date = part + ("-01-01" if len(part) == 4 else "-01")
+            last_date = part + ("-12-31" if len(part) == 4 else "-31")
+        else:
+            terms.extend(words(part))
+    return terms, first_date, last_date
+
+
+class Segment:
+    """Notes of one group of workouts (the current ones or one archived month)
+    
+    docs are [date, start_time, notes] and terms maps each word to the
+    docs using it. Prefix search walks a sorted copy of the words.
+    """
+    
+    def __init__(self, docs=None, terms=None):
+        self.docs = []
+        self.terms = {}
+        self.vocabulary = None
+        self.first_date = ""
+        self.last_date = ""
+        if terms is None:
+            for doc in docs or []:
+                self.add(*doc)
+        else:
+            self.docs = docs
+            self.terms = terms
+            dates = [doc[0] for doc in docs]
+            if dates:
+                self.first_date, self.last_date = min(dates), max(dates)
+    
+    def add(self, day, start_time, notes):
+        doc_id = len(self.docs)
+        self.docs.append([day, start_time, notes])
+        for word in set(words(notes)):
+            ids = self.terms.get(word)
+            if ids is None:
+                ids = self.terms[word] = []
+                self.vocabulary = None
+            ids.append(doc_id)
+        if not self.first_date or day < self.first_date:
+            self.first_date = day
+        if day > self.last_date:
+            self.last_date = day
+    
+    def add_workout(self, workout):
+        self.add(workout.get("date", ""), workout.get("start_time", "") or "",
+                 workout.get("notes", "") or "")
+    
+    def overlaps(self, first_date, last_date):
+        if not self.docs:
+            return False
+        if first_date and self.last_date < first_date:
+            return False
+        return not (last_date and self.first_date > last_date)
+    
+    def match(self, terms, first_date=None, last_date=None):
+        """Docs having every term as a word prefix, within the dates"""
+        if not self.overlaps(first_date, last_date):
+            return []
+        if self.vocabulary is None:
+            self.vocabulary = sorted(self.terms)
+        found = None
+        for term in terms:
+            ids = set()
+            i = bisect.bisect_left(self.vocabulary, term)
+            while i < len(self.vocabulary) and self.vocabulary[i].startswith(term):
+                ids.update(self.terms[self.vocabulary[i]])
+                i += 1
+            found = ids if found is None else found & ids
+            if not found:
+                return []
+        docs = self.docs if found is None else [self.docs[i] for i in sorted(found)]
+        return [doc for doc in docs
+                if (not first_date or doc[0] >= first_date) and (not last_date or doc[0] <= last_date)]
+    
+    def to_json(self, stamp):
+        return {"version": VERSION, "stamp": stamp, "docs": self.docs,
+                "terms": {word: self.terms[word] for word in sorted(self.terms)}}
+
+
+class NotesIndex:
+    """Full-text index of workout notes, kept in notes_index/ next to the data
+    
+    One segment file per archived month, one per earlier month still in
+    the store and one for the current month. Archived segments are written
+    once (when the month is archived, or on the first search for older
+    archives) and a small manifest keeps their date ranges, so a search
+    only opens the months it needs and never reads the archives
+    themselves. A month archive (workout_data_2025-03.wka) whose month is
+    still in the store is left out, and a hit in an older archive that
+    is also a hit in the store is only returned once. The current segment follows the store like
+    SummaryCache does: extended on each save and rebuilt only if the
+    store's generation moved on without it; the other stored months are
+    rebuilt when their partition's generation changes.
+    
+    A save doesn't rewrite the current segment: its notes are appended to
+    current.jsonl, each line naming the generation it follows, and
+    replayed on load. The log is merged into current.json every
+    MERGE_EVERY saves, on compact() and whenever the segment is rebuilt
+    (the month rolled over or the store changed without us).
+    """
+    
+    def __init__(self, folder, store, archive_folder):
+        self.folder = folder
+        self.store = store
+        self.archive_folder = archive_folder
+        self.lock = threading.RLock()
+        self.current = None
+        self.generation = None
+        self.log_entries = 0
+        self.loaded = {}            # source -> (stamp, Segment)
+        self.stored_months = {}     # month -> (partition generation, Segment)
+        os.makedirs(folder, exist_ok=True)
+        self.manifest = self._read(self._path("manifest")) or {"version": VERSION, "archives": {}}
+        if self.manifest.get("version") != VERSION:
+            self.manifest = {"version": VERSION, "archives": {}}
+    
+    def _path(self, name):
+        return os.path.join(self.folder, f"{name}.json")
+    
+    def _read(self, path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+    
+    def _write(self, path, data):
+        temp_file = path + ".tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(temp_file, path)
+    
+    def _log_path(self):
+        return os.path.join(self.folder, f"{CURRENT}.jsonl")
+    
+    def _load_current(self):
+        """Read the current workouts' segment file and its log on first use"""
+        if self.current is not None:
+            return
+        data = self._read(self._path(CURRENT))
+        if not data or data.get("version") != VERSION:
+            return
+        self.current = Segment(data["docs"], data["terms"])
+        self.generation = data["stamp"]
+        self.log_entries = 0
+        torn = False
+        try:
+            with open(self._log_path(), 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        torn = True
+                        break
+                    # Lines written before the segment file was are already in it
+                    if entry["after"] != self.generation:
+                        continue
+                    for doc in entry["docs"]:
+                        self.current.add(*doc)
+                    self.generation = entry["stamp"]
+                    self.log_entries += 1
+        except FileNotFoundError:
+            pass
+        if torn:
+            # Saves appended after a torn line could never be replayed
+            self._write_current()
+    
+    def _write_current(self):
+        """Write the whole current segment and start an empty log"""
+        self._write(self._path(CURRENT), self.current.to_json(self.generation))
+        if os.path.exists(self._log_path()):
+            os.remove(self._log_path())
+        self.log_entries = 0
+    
+    def _current_segment(self):
+        """The current workouts' segment, rebuilt from the store if stale"""
+        self._load_current()
+        if self.current is None or self.generation != self.store.generation():
+            self.current = Segment()
+            for workout in self.store.iter_workouts():
+                self.current.add_workout(workout)
+            self.generation = self.store.generation()
+            self._write_current()
+        return self.current
+    
+    def compact(self):
+        """Merge the save log into the current segment file"""
+        with self.lock:
+            self._load_current()
+            if self.current is not None and self.log_entries:
+                self._write_current()
+    
+    def _month_segment(self, month):
+        """Segment of an earlier month in the store, rebuilt if its partition changed"""
+        partition = self.store.partition(month)
+        generation = partition.generation()
+        cached = self.stored_months.get(month)
+        if cached is None:
+            data = self._read(self._path(f"month_{month}"))
+            if data and data.get("version") == VERSION:
+                cached = (data["stamp"], Segment(data["docs"], data["terms"]))
+        if cached is None or cached[0] != generation:
+            segment = Segment()
+            for workout in partition.iter_workouts():
+                segment.add_workout(workout)
+            cached = (generation, segment)
+            self._write(self._path(f"month_{month}"), segment.to_json(generation))
+        self.stored_months[month] = cached
+        return cached[1]
+    
+    def extend(self, workouts, generation_before):
+        """Add just-saved workouts if the index was current before the save"""
+        with self.lock:
+            self._load_current()
+            if self.current is None or self.generation != generation_before:
+                return
+            docs = []
+            for workout in workouts:
+                self.current.add_workout(workout)
+                docs.append(self.current.docs[-1])
+            self.generation = self.store.generation()
+            if self.log_entries + 1 >= MERGE_EVERY:
+                self._write_current()
+                return
+            # Only the new notes are written; cost doesn't grow with the month
+            with open(self._log_path(), 'a') as f:
+                f.write(json.dumps({"after": generation_before, "stamp": self.generation,
+                                    "docs": docs}, separators=(",", ":")) + "\n")
+            self.log_entries += 1
+    
+    def add_archive(self, archive_path):
+        """Index one archived month (called right after archiving it)"""
+        from archive_format import archive_name, iter_archive
+        with self.lock:
+            source = archive_name(archive_path)
+            stamp = _file_stamp(archive_path)
+            segment = Segment()
+            for workout in iter_archive(archive_path):
+                segment.add_workout(workout)
+            self._write(self._path(f"archive_{source}"), segment.to_json(stamp))
+            self.manifest["archives"][source] = {
+                "stamp": stamp, "docs": len(segment.docs),
+                "first_date": segment.first_date, "last_date": segment.last_date,
+            }
+            self._write(self._path("manifest"), self.manifest)
+            self.loaded[source] = (stamp, segment)
+    
+    def refresh_archives(self):
+        """Index archives that are new or changed, forget removed ones"""
+        from archive_format import archive_name
+        with self.lock:
+            present = set()
+            for _, path in find_archives(self.archive_folder):
+                source = archive_name(path)
+                present.add(source)
+                entry = self.manifest["archives"].get(source)
+                if entry is None or entry["stamp"] != _file_stamp(path):
+                    self.add_archive(path)
+            for source in set(self.manifest["archives"]) - present:
+                del self.manifest["archives"][source]
+                self.loaded.pop(source, None)
+                self._write(self._path("manifest"), self.manifest)
+    
+    def _archive_segment(self, source):
+        entry = self.manifest["archives"][source]
+        cached = self.loaded.get(source)
+        if cached is None or cached[0] != entry["stamp"]:
+            data = self._read(self._path(f"archive_{source}"))
+            cached = (data["stamp"], Segment(data["docs"], data["terms"]))
+            self.loaded[source] = cached
+        return cached[1]
+    
+    def search(self, query, include_archives=True):
+        """Workouts whose notes match the query, oldest first
+        
+        Returns (date, start_time, notes, source) tuples, source being
+        "current" or the archived month like "March_2025".
+        """
+        terms, first_date, last_date = parse_query(query)
+        hits = []
+        with self.lock:
+            segments = [(CURRENT, self._current_segment())]
+            stored = self.store.months()
+            for month in stored:
+                if month == self.store.current_month:
+                    continue
+                if first_date and month < first_date[:7]:
+                    continue
+                if last_date and month > last_date[:7]:
+                    continue
+                segments.append((month, self._month_segment(month)))
+            archives = []
+            if include_archives and os.path.isdir(self.archive_folder):
+                self.refresh_archives()
+                for source, entry in self.manifest["archives"].items():
+                    if not entry["docs"] or archive_month(f"workout_data_{source}") in stored \
+                            and is_month_archive(f"workout_data_{source}"):
+                        continue
+                    if first_date and entry["last_date"] < first_date:
+                        continue
+                    if last_date and entry["first_date"] > last_date:
+                        continue
+                    archives.append((source, self._archive_segment(source)))
+            for source, segment in segments:
+                for day, start_time, notes in segment.match(terms, first_date, last_date):
+                    hits.append((day, start_time, notes, source))
+            # Older archives can hold months the store has too
+            seen = {hit[:3] for hit in hits}
+            for source, segment in archives:
+                for day, start_time, notes in segment.match(terms, first_date, last_date):
+                    if (day, start_time, notes) not in seen:
+                        seen.add((day, start_time, notes))
+                        hits.append((day, start_time, notes, source))
+        hits.sort()
+        return hits
+
+
+def _file_stamp(path):
+    st = os.stat(path)
+    return f"{st.st_mtime_ns}:{st.st_size}"
@@ -0,0 +1,193 @@
+import os
+import re
+import threading
+from datetime import datetime
+
+from workout_store import WorkoutStore
+from write_behind import PartialSaveError
+
+PARTITION_FILE = re.compile(r"^workout_data_(\d{4}-\d{2})\.jsonl?$")
+
+
+def this_month():
+    return datetime.now().strftime("%Y-%m")
+
+
+def month_of(workout):
+    """'2025-03-14' -> '2025-03'"""
+    return workout.get("date", "")[:7]
+
+
+class PartitionedStore:
+    """Workouts split by month at write time, one partition per month
+    
+    Every saved workout goes to the partition of its own date, so months
+    never get mixed. The store-level methods (load, iter_workouts,
+    generation, ...) work on the current month's partition, which is what
+    the window shows. Rolling over to a new month only changes
+    current_month; it happens by itself when a workout from a later month
+    is saved. Reports for any month read partition(month) and leave the
+    data alone.
+    
+    open_partition(month) returns the store of one month (a WorkoutStore
+    for the JSON backend, an SQLiteMonth for SQLite).
+    """
+    
+    def __init__(self, open_partition, months=(), current_month=None, on_archive=None):
+        self.open_partition = open_partition
+        self.on_archive = on_archive
+        self.lock = threading.RLock()
+        self.partitions = {}
+        self.known_months = set(months)
+        self.current_month = current_month or max(self.known_months | {this_month()})
+    
+    def partition(self, month):
+        """The store of one month like '2025-03'"""
+        with self.lock:
+            store = self.partitions.get(month)
+            if store is None:
+                store = self.partitions[month] = self.open_partition(month)
+            return store
+    
+    @property
+    def current(self):
+        return self.partition(self.current_month)
+    
+    def months(self):
+        """Months that have workouts, oldest first"""
+        with self.lock:
+            return sorted(self.known_months)
+    
+    def rollover(self, month=None):
+        """Make `month` (default: this month) the current partition"""
+        with self.lock:
+            self.current_month = month or this_month()
+    
+    def append(self, workout):
+        self.append_many([workout])
+    
+    def append_many(self, workouts):
+        """Save workouts, each to the partition of its month
+        
+        The months are written one after the other. If one fails after
+        others were written, PartialSaveError names the workouts of the
+        months still to write.
+        """
+        by_month = {}
+        for workout in workouts:
+            by_month.setdefault(month_of(workout) or self.current_month, []).append(workout)
+        months = sorted(by_month)
+        count = 0
+        for i, month in enumerate(months):
+            try:
+                count += self.partition(month).append_many(by_month[month])
+            except Exception as e:
+                later = [workout for other in months[i + 1:] for workout in by_month[other]]
+                if isinstance(e, PartialSaveError):
+                    # This month is in the log, just maybe not synced
+                    self._add_month(month)
+                    unsaved = e.unsaved + later
+                elif i:
+                    unsaved = by_month[month] + later
+                else:
+                    raise
+                raise PartialSaveError(f"{len(unsaved)} of {len(workouts)} workouts not saved: {e}",
+                                       unsaved) from e
+            self._add_month(month)
+        return count
+    
+    def _add_month(self, month):
+        with self.lock:
+            self.known_months.add(month)
+            # A workout from a later month starts that month
+            if month > self.current_month:
+                self.current_month = month
+    
+    def in_current(self, workouts):
+        """True if all the workouts belong to the current month
+        
+        Only then may caches of the current month add them one by one;
+        otherwise they rebuild, which for one month is cheap.
+        """
+        return all((month_of(workout) or self.current_month) == self.current_month
+                   for workout in workouts)
+    
+    def note_archived(self, archive_path):
+        """Tell the backend a month was written to archive/"""
+        if self.on_archive is not None:
+            self.on_archive(archive_path)
+    
+    # The current month's partition
+    
+    def exists(self):
+        return self.current.exists()
+    
+    def load(self):
+        return self.current.load()
+    
+    def iter_workouts(self):
+        return self.current.iter_workouts()
+    
+    def sorted_runs(self):
+        return self.current.sorted_runs()
+    
+    def generation(self):
+        """Changes on every write to the current month and on rollover"""
+        return f"{self.current_month}/{self.current.generation()}"
+    
+    def needs_compaction(self):
+        return self.current.needs_compaction()
+    
+    def compact(self):
+        self.current.compact()
+
+
+def partition_path(folder, month):
+    return os.path.join(folder, f"workout_data_{month}.json")
+
+
+def partition_months(folder):
+    """Months that have a partition file in folder"""
+    months = set()
+    for name in os.listdir(folder):
+        match = PARTITION_FILE.match(name)
+        if match:
+            months.add(match.group(1))
+    return months
+
+
+def split_legacy_store(data_file, folder):
+    """Move a single workout_data.json (+ log) into monthly partitions
+    
+    The partitions are written to a temporary folder that is renamed into
+    place, then the old files are renamed to *.migrated (not deleted). A
+    crash part way leaves either the old layout or a finished one.
+    """
+    legacy = WorkoutStore(data_file)
+    if not os.path.exists(folder):
+        temp_folder = folder + ".tmp"
+        if os.path.exists(temp_folder):
+            for name in os.listdir(temp_folder):
+                os.remove(os.path.join(temp_folder, name))
+        else:
+            os.makedirs(temp_folder)
+        by_month = {}
+        for workout in legacy.iter_workouts():
+            by_month.setdefault(month_of(workout) or this_month(), []).append(workout)
+        for month, workouts in by_month.items():
+            store = WorkoutStore(partition_path(temp_folder, month))
+            store.append_many(workouts)
+            store.compact()
+        os.replace(temp_folder, folder)
+    for path in (legacy.data_file, legacy.log_file):
+        if os.path.exists(path):
+            os.replace(path, path + ".migrated")
+
+
+def open_json_partitions(data_file, folder):
+    """PartitionedStore over WorkoutStore files in folder"""
+    if os.path.exists(data_file) or os.path.exists(os.path.splitext(data_file)[0] + ".jsonl"):
+        split_legacy_store(data_file, folder)
+    os.makedirs(folder, exist_ok=True)
+    return PartitionedStore(lambda month: WorkoutStore(partition_path(folder, month)),
+                            partition_months(folder))
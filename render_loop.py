@@ -0,0 +1,116 @@
+import math
+import time
+
+import metrics
+
+
+def format_clock(seconds):
+    """Format seconds as MM:SS like the timer labels"""
+    mins, secs = divmod(seconds, 60)
+    return f"{mins:02d}:{secs:02d}"
+
+
+class RenderLoop:
+    """Redraws timer labels from the main thread using root.after
+    
+    Every frame reads the state once and only calls label.config() for the
+    labels whose value changed. While is_running() is true a frame is
+    scheduled every interval_ms; otherwise the loop stops after drawing
+    and waits for wake(). next_due() can give the nanoseconds until
+    something happens that has to be drawn at once (None if nothing is
+    coming); the next frame is then brought forward to just after it.
+    """
+    
+    def __init__(self, root, read_state, labels, is_running,
+                 format_value=format_clock, interval_ms=100, next_due=None):
+        self.root = root
+        self.read_state = read_state
+        self.labels = labels
+        self.is_running = is_running
+        self.format_value = format_value
+        self.interval_ms = interval_ms
+        self.next_due = next_due
+        self.job = None
+        self.due_ns = None
+        self.last_values = [None] * len(labels)
+        
+        # Instrumentation
+        self.frames = 0
+        self.redraws = 0
+        self.skipped_redraws = 0
+        self.total_frame_ns = 0
+        self.max_frame_ns = 0
+    
+    def wake(self):
+        """Draw now and keep going while the state says it is running"""
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+        self.due_ns = None
+        self.frame()
+    
+    def stop(self):
+        """Cancel the next frame (the window is going away)"""
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+    
+    def frame(self):
+        """Draw one frame and schedule the next one if needed"""
+        started = time.perf_counter_ns()
+        self.job = None
+        # How far behind its slot Tk ran this tick
+        if self.due_ns is not None:
+            metrics.observe("timer.tick_late", max(0, started - self.due_ns) / 1e9)
+            self.due_ns = None
+        
+        values = self.read_state()
+        for i, value in enumerate(values):
+            if value == self.last_values[i]:
+                self.skipped_redraws += 1
+                continue
+            self.labels[i].config(text=self.format_value(value))
+            self.last_values[i] = value
+            self.redraws += 1
+        
+        if self.is_running():
+            delay_ms = self.delay_ms()
+            self.job = self.root.after(delay_ms, self.frame)
+            self.due_ns = started + delay_ms * 1_000_000
+        
+        cost = time.perf_counter_ns() - started
+        metrics.observe("timer.frame", cost / 1e9)
+        self.frames += 1
+        self.total_frame_ns += cost
+        if cost > self.max_frame_ns:
+            self.max_frame_ns = cost
+    
+    def delay_ms(self):
+        """Milliseconds to the next frame: interval_ms, or sooner if next_due() says so"""
+        due_ns = self.next_due() if self.next_due is not None else None
+        if due_ns is None:
+            return self.interval_ms
+        # A millisecond past the deadline, so the thing due has happened by then
+        return max(1, min(self.interval_ms, math.ceil(due_ns / 1_000_000) + 1))
+    
+    def stats(self):
+        """Frame counters as a dict"""
+        average_us = self.total_frame_ns / self.frames / 1000 if self.frames else 0.0
+        return {
+            "frames": self.frames,
+            "redraws": self.redraws,
+            "skipped_redraws": self.skipped_redraws,
+            "average_frame_us": round(average_us, 1),
+            "max_frame_us": round(self.max_frame_ns / 1000, 1),
+            "running": self.job is not None,
+        }
+    
+    def stats_text(self):
+        """Frame counters as text for a messagebox"""
+        stats = self.stats()
+        return (f"Frames drawn: {stats['frames']}\n"
+                f"Label redraws: {stats['redraws']}\n"
+                f"Skipped redraws (unchanged): {stats['skipped_redraws']}\n"
+                f"Average frame cost: {stats['average_frame_us']} us\n"
+                f"Slowest frame: {stats['max_frame_us']} us\n"
+                f"Loop active: {'yes' if stats['running'] else 'no (paused)'}")
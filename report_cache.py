@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+from report_writer import TEMPLATE_VERSION, ReportStats
+from workout_record import as_dict
+
+HASH_CHUNK = 1024 * 1024
+
+
+def hash_file(path):
+    """sha256 of a file's bytes (an archive is its own content hash)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_workouts(workouts):
+    """sha256 of workouts in order, independent of dict key order"""
+    digest = hashlib.sha256()
+    for workout in workouts:
+        digest.update(json.dumps(as_dict(workout), sort_keys=True, separators=(",", ":")).encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def report_key(content_hash, report_month, analytics=False):
+    """Cache key: input content + everything else that changes the report text"""
+    text = f"{TEMPLATE_VERSION}|{report_month}|{int(bool(analytics))}|{content_hash}"
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def file_stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+class ReportCache:
+    """Rendered reports stored by the hash of what went into them
+    
+    Each entry is a copy of the report text (report_cache/<key>.txt) with
+    its summary numbers. get() serves a hit by copying that text to the
+    report path, or by doing nothing at all when the file there is still
+    the one the cache put there. The cache keeps at most max_bytes of
+    report text and drops the least recently used entries beyond that.
+    
+    Lookups only change the recency order and counters in memory; the
+    index file is written by put() and close().
+    """
+    
+    def __init__(self, folder, max_bytes=64 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.index_file = os.path.join(folder, "index.json")
+        self.lock = threading.RLock()
+        self.entries = OrderedDict()    # key -> entry, least recently used first
+        self.file_hashes = {}           # path -> [stamp, sha256] of hashed input files
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.dirty = False              # lookups not written to the index yet
+        os.makedirs(folder, exist_ok=True)
+        self.load()
+    
+    def load(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        for key, entry in data.get("entries", []):
+            if os.path.exists(self._blob(key)):
+                self.entries[key] = entry
+        self.file_hashes = data.get("file_hashes", {})
+        self.hits = data.get("hits", 0)
+        self.misses = data.get("misses", 0)
+        self.evictions = data.get("evictions", 0)
+    
+    def save(self):
+        with self.lock:
+            temp_file = self.index_file + ".tmp"
+            with open(temp_file, 'w') as f:
+                json.dump({"entries": list(self.entries.items()), "file_hashes": self.file_hashes,
+                           "hits": self.hits,
+                           "misses": self.misses, "evictions": self.evictions}, f)
+            os.replace(temp_file, self.index_file)
+            self.dirty = False
+    
+    def close(self):
+        """Write what lookups changed since the last put()"""
+        with self.lock:
+            if self.dirty:
+                self.save()
+    
+    def hash_file(self, path):
+        """hash_file(), skipped while the file's size and mtime are unchanged"""
+        with self.lock:
+            stamp = file_stamp(path)
+            known = self.file_hashes.get(path)
+            if known is None or known[0] != stamp:
+                known = self.file_hashes[path] = [stamp, hash_file(path)]
+                self.dirty = True
+            return known[1]
+    
+    def _blob(self, key):
+        return os.path.join(self.folder, f"{key}.txt")
+    
+    def get(self, key, report_path):
+        """Put the cached report at report_path; its ReportStats, or None on a miss"""
+        with self.lock:
+            entry = self.entries.get(key)
+            self.dirty = True
+            if entry is None:
+                self.misses += 1
+                return None
+            # Nothing to copy if the file there is the one we put there
+            outputs = entry.setdefault("outputs", {})
+            stamp = outputs.get(report_path)
+            if stamp is None or stamp != file_stamp(report_path):
+                shutil.copyfile(self._blob(key), report_path)
+                outputs[report_path] = file_stamp(report_path)
+            self.entries.move_to_end(key)
+            self.hits += 1
+            
+            stats = ReportStats()
+            stats.total_workouts = entry["total_workouts"]
+            stats.total_hours = entry["total_hours"]
+            stats.exercise_hours = entry["exercise_hours"]
+            return stats
+    
+    def put(self, key, report_path, stats):
+        """Remember a freshly written report and the stats it was built from"""
+        with self.lock:
+            shutil.copyfile(report_path, self._blob(key))
+            self.entries[key] = {
+                "size": os.path.getsize(report_path),
+                "total_workouts": stats.total_workouts,
+                "total_hours": stats.total_hours,
+                "exercise_hours": stats.exercise_hours,
+                "outputs": {report_path: file_stamp(report_path)},
+            }
+            self.entries.move_to_end(key)
+            self._evict()
+            self.save()
+    
+    def _evict(self):
+        total = sum(entry["size"] for entry in self.entries.values())
+        while total > self.max_bytes and len(self.entries) > 1:
+            key, entry = self.entries.popitem(last=False)
+            total -= entry["size"]
+            self.evictions += 1
+            try:
+                os.remove(self._blob(key))
+            except FileNotFoundError:
+                pass
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": sum(entry["size"] for entry in self.entries.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+    
+    def stats_text(self):
+        stats = self.stats()
+        return (f"Cached reports: {stats['entries']} "
+                f"({stats['bytes'] / 1024:.0f} of {stats['max_bytes'] / 1024:.0f} KB)\n"
+                f"Hits: {stats['hits']}, misses: {stats['misses']} "
+                f"(hit rate {stats['hit_rate'] * 100:.0f}%)\n"
+                f"Evicted: {stats['evictions']}")
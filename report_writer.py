@@ -0,0 +1,125 @@
+import heapq
+import shutil
+import tempfile
+from datetime import datetime
+
+import metrics
+
+CHUNK_SIZE = 64 * 1024
+# Bump whenever the report text changes, so cached reports are re-rendered
+TEMPLATE_VERSION = 1
+
+
+def workout_sort_key(workout):
+    return workout.get("date", "")
+
+
+def merge_runs(runs):
+    """Merge already date-sorted runs of workouts into one date-sorted stream"""
+    return heapq.merge(*runs, key=workout_sort_key)
+
+
+class ReportStats:
+    """Summary numbers collected while the workouts stream past"""
+    
+    def __init__(self):
+        self.total_workouts = 0
+        self.total_hours = 0
+        self.exercise_hours = 0
+    
+    def add(self, workout):
+        self.total_workouts += 1
+        self.total_hours += workout.get("total_duration_hours", 0)
+        self.exercise_hours += workout.get("exercise_duration_hours", 0)
+
+
+def format_header(report_month, now, stats, extra_sections=""):
+    """Report title and summary statistics"""
+    header = "=" * 60 + "\n"
+    header += f"MONTHLY WORKOUT REPORT - {report_month.replace('_', ' ')}\n"
+    header += f"Generated: {now.strftime('%Y-%m-%d %H:%M:%S')}\n"
+    header += "=" * 60 + "\n\n"
+    
+    header += "SUMMARY STATISTICS:\n"
+    header += "-" * 30 + "\n"
+    header += f"Total workouts this month: {stats.total_workouts}\n"
+    header += f"Total time trained: {stats.total_hours:.2f} hours\n"
+    header += f"Total exercise time: {stats.exercise_hours:.2f} hours\n"
+    if stats.total_workouts > 0:
+        header += f"Average per workout: {stats.total_hours/stats.total_workouts:.2f} hours\n"
+    header += "\n"
+    header += extra_sections
+    
+    header += "DETAILED WORKOUT LOG:\n"
+    header += "-" * 60 + "\n"
+    return header
+
+
+def format_workout(i, workout):
+    """One entry of the detailed workout log"""
+    date_str = workout.get("date", "Unknown")
+    start_time = workout.get("start_time", "Unknown")
+    duration = workout.get("total_duration_hours", 0)
+    exercise = workout.get("exercise_duration_hours", 0)
+    notes = workout.get("notes", "")
+    manual = workout.get("manual_save", False)
+    
+    lines = [f"\n{i}. {date_str} at {start_time}\n",
+             f"   Total duration: {duration:.2f} hours\n",
+             f"   Exercise time: {exercise:.2f} hours\n"]
+    if manual:
+        lines.append("   [MANUAL ENTRY]\n")
+    if notes:
+        lines.append(f"   Notes: {notes}\n")
+    return "".join(lines)
+
+
+def format_footer():
+    return "\n" + "=" * 60 + "\n" + "End of Report\n" + "=" * 60
+
+
+@metrics.timed("report.render")
+def write_report(out, workouts, report_month, now=None, analytics=False):
+    """Write a report for date-sorted workouts to a file object
+    
+    The workouts are read once. The detailed log goes to a spooled temp
+    file (on disk once it gets big) while the stats are added up, then
+    the header, the log and the footer are copied to out in chunks, so
+    memory stays flat however many workouts there are.
+    
+    With analytics=True the workouts are also collected into compact
+    columns and a NumPy statistics section is added (see analytics.py).
+    """
+    if now is None:
+        now = datetime.now()
+    stats = ReportStats()
+    columns = None
+    if analytics:
+        from analytics import ColumnBuilder
+        columns = ColumnBuilder()
+    
+    with tempfile.SpooledTemporaryFile(max_size=CHUNK_SIZE * 16, mode="w+") as details:
+        chunk = []
+        chunk_size = 0
+        for i, workout in enumerate(workouts, 1):
+            stats.add(workout)
+            if columns is not None:
+                columns.add(workout)
+            entry = format_workout(i, workout)
+            chunk.append(entry)
+            chunk_size += len(entry)
+            if chunk_size >= CHUNK_SIZE:
+                details.write("".join(chunk))
+                chunk = []
+                chunk_size = 0
+        details.write("".join(chunk))
+        
+        extra_sections = ""
+        if columns is not None:
+            from analytics import analyze, format_section
+            extra_sections = format_section(analyze(columns.columns()))
+        out.write(format_header(report_month, now, stats, extra_sections))
+        details.seek(0)
+        shutil.copyfileobj(details, out, CHUNK_SIZE)
+        out.write(format_footer())
+    return stats
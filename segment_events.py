@@ -0,0 +1,206 @@
+"""Timestamped exercise/rest/pause transitions of a workout.
+
+WorkoutClock records every transition into an EventRing: preallocated
+array('q')/array('b') buffers, so recording allocates no containers
+however long the session runs. If the ring fills up, the oldest events
+are folded into a ReplayState instead of being lost, so the totals can
+always be rebuilt exactly.
+
+encode() packs the events into a short base64 string stored with the
+workout (as "events"); replay() turns that string back into the main,
+exercise and rest nanoseconds.
+"""
+import base64
+from array import array
+
+START = 1       # workout started or resumed
+PAUSE = 2       # workout paused (stops exercise/rest too)
+EXERCISE = 3    # switched to exercising
+REST = 4        # switched to resting
+END = 5         # workout saved (closes everything)
+
+FORMAT_VERSION = 1
+
+
+class ReplayState:
+    """Main/exercise/rest totals rebuilt by applying events in order"""
+    
+    __slots__ = ("main_ns", "exercise_ns", "rest_ns",
+                 "main_since", "exercise_since", "rest_since")
+    
+    def __init__(self):
+        self.main_ns = 0
+        self.exercise_ns = 0
+        self.rest_ns = 0
+        self.main_since = -1        # -1: not running
+        self.exercise_since = -1
+        self.rest_since = -1
+    
+    def apply(self, t, kind):
+        """Apply one event, the same way WorkoutClock moves its stopwatches"""
+        if kind == START:
+            if self.main_since < 0:
+                self.main_since = t
+        elif kind == EXERCISE:
+            self._stop_rest(t)
+            if self.exercise_since < 0:
+                self.exercise_since = t
+        elif kind == REST:
+            self._stop_exercise(t)
+            if self.rest_since < 0:
+                self.rest_since = t
+        elif kind == PAUSE or kind == END:
+            if self.main_since >= 0:
+                self.main_ns += t - self.main_since
+                self.main_since = -1
+            self._stop_exercise(t)
+            self._stop_rest(t)
+    
+    def _stop_exercise(self, t):
+        if self.exercise_since >= 0:
+            self.exercise_ns += t - self.exercise_since
+            self.exercise_since = -1
+    
+    def _stop_rest(self, t):
+        if self.rest_since >= 0:
+            self.rest_ns += t - self.rest_since
+            self.rest_since = -1
+    
+    def totals(self):
+        return self.main_ns, self.exercise_ns, self.rest_ns
+
+
+class EventRing:
+    """Fixed-size ring buffer of (monotonic ns, kind) events"""
+    
+    __slots__ = ("capacity", "times", "kinds", "start", "count", "base")
+    
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.times = array('q', bytes(8 * capacity))
+        self.kinds = array('b', bytes(capacity))
+        self.start = 0
+        self.count = 0
+        self.base = ReplayState()   # events pushed out of the ring
+    
+    def record(self, t, kind):
+        """Add an event, folding the oldest one into base when full"""
+        if self.count == self.capacity:
+            self.base.apply(self.times[self.start], self.kinds[self.start])
+            self.times[self.start] = t
+            self.kinds[self.start] = kind
+            self.start += 1
+            if self.start == self.capacity:
+                self.start = 0
+            return
+        i = self.start + self.count
+        if i >= self.capacity:
+            i -= self.capacity
+        self.times[i] = t
+        self.kinds[i] = kind
+        self.count += 1
+    
+    def clear(self):
+        self.start = 0
+        self.count = 0
+        self.base = ReplayState()
+    
+    def __len__(self):
+        return self.count
+    
+    def __iter__(self):
+        """Events from oldest to newest"""
+        for n in range(self.count):
+            i = self.start + n
+            if i >= self.capacity:
+                i -= self.capacity
+            yield self.times[i], self.kinds[i]
+    
+    def replay(self):
+        """(main, exercise, rest) nanoseconds up to the last event"""
+        state = ReplayState()
+        for name in ReplayState.__slots__:
+            setattr(state, name, getattr(self.base, name))
+        for t, kind in self:
+            state.apply(t, kind)
+        return state.totals()
+    
+    def encode(self):
+        """Compact text form: varints of the base state and the time deltas"""
+        base = self.base
+        open_times = [t for t in (base.main_since, base.exercise_since, base.rest_since) if t >= 0]
+        first = [self.times[self.start]] if self.count else []
+        origin = min(open_times + first) if open_times or first else 0
+        
+        out = bytearray([FORMAT_VERSION])
+        for value in (base.main_ns, base.exercise_ns, base.rest_ns):
+            _put_varint(out, value)
+        # Open segments of the base state, stored as offset + 1 (0 = closed)
+        for since in (base.main_since, base.exercise_since, base.rest_since):
+            _put_varint(out, since - origin + 1 if since >= 0 else 0)
+        _put_varint(out, self.count)
+        previous = origin
+        for t, kind in self:
+            out.append(kind)
+            _put_varint(out, t - previous)
+            previous = t
+        return base64.b64encode(bytes(out)).decode("ascii")
+
+
+def _put_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data, position):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def decode(encoded):
+    """Turn encode() output back into (base ReplayState, [(t, kind), ...])"""
+    data = base64.b64decode(encoded)
+    if data[0] != FORMAT_VERSION:
+        raise ValueError(f"unknown event format {data[0]}")
+    position = 1
+    state = ReplayState()
+    state.main_ns, position = _get_varint(data, position)
+    state.exercise_ns, position = _get_varint(data, position)
+    state.rest_ns, position = _get_varint(data, position)
+    since = []
+    for _ in range(3):
+        value, position = _get_varint(data, position)
+        since.append(value - 1 if value else -1)
+    state.main_since, state.exercise_since, state.rest_since = since
+    count, position = _get_varint(data, position)
+    
+    events = []
+    t = 0
+    for _ in range(count):
+        kind = data[position]
+        delta, position = _get_varint(data, position + 1)
+        t += delta
+        events.append((t, kind))
+    return state, events
+
+
+def replay(encoded):
+    """(main, exercise, rest) nanoseconds from a workout's "events" string"""
+    state, events = decode(encoded)
+    for t, kind in events:
+        state.apply(t, kind)
+    return state.totals()
+
+
+def replay_seconds(encoded):
+    """(main, exercise, rest) whole seconds, as save_workout stores them"""
+    return tuple(ns // 1_000_000_000 for ns in replay(encoded))
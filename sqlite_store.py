@@ -0,0 +1,358 @@
+import glob
+import json
+import os
+import sqlite3
+import threading
+from datetime import date
+
+import metrics
+from archive_format import archive_name, iter_archive
+from partitioned_store import partition_months, partition_path
+from workout_core import workout_key, workout_seconds
+from workout_record import as_dict, decode
+from workout_store import WorkoutStore
+from write_behind import PartialSaveError
+
+# Workouts that have not been archived by a monthly report yet
+CURRENT = "current"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workouts (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    start_time TEXT,
+    saved_at TEXT,
+    total_seconds INTEGER NOT NULL DEFAULT 0,
+    exercise_seconds INTEGER NOT NULL DEFAULT 0,
+    total_hours REAL NOT NULL DEFAULT 0,
+    exercise_hours REAL NOT NULL DEFAULT 0,
+    source TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS workouts_date ON workouts (date);
+CREATE INDEX IF NOT EXISTS workouts_saved_at ON workouts (saved_at);
+CREATE INDEX IF NOT EXISTS workouts_source_date ON workouts (source, date);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+INSERT_SQL = ("INSERT INTO workouts (date, start_time, saved_at, total_seconds, "
+              "exercise_seconds, total_hours, exercise_hours, source, data) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+MONTH_SQL = "SELECT data FROM workouts WHERE date >= ? AND date < ? ORDER BY date, start_time"
+MONTH_BY_ID_SQL = "SELECT data FROM workouts WHERE date >= ? AND date < ? ORDER BY id"
+MONTH_GENERATION_SQL = "SELECT COUNT(*), COALESCE(MAX(id), 0) FROM workouts WHERE date >= ? AND date < ?"
+MONTHS_SQL = "SELECT DISTINCT substr(date, 1, 7) FROM workouts WHERE date != '' ORDER BY 1"
+TOTALS_SQL = ("SELECT COUNT(*), COALESCE(SUM(total_seconds), 0), "
+              "COALESCE(SUM(exercise_seconds), 0), COALESCE(SUM(total_hours), 0), "
+              "COALESCE(SUM(exercise_hours), 0) FROM workouts WHERE date >= ? AND date <= ?")
+CURRENT_SQL = "SELECT data FROM workouts WHERE source = ? ORDER BY id"
+CURRENT_BY_DATE_SQL = "SELECT data FROM workouts WHERE source = ? ORDER BY date, id"
+KEYS_SQL = "SELECT date, start_time, saved_at FROM workouts"
+BUMP_SQL = ("INSERT INTO meta (key, value) VALUES ('generation', '1') "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+
+
+def workout_row(workout, source):
+    """Turn a workout dict into the values for INSERT_SQL"""
+    total_hours = workout.get("total_duration_hours", 0) or 0
+    exercise_hours = workout.get("exercise_duration_hours", 0) or 0
+    total_seconds, exercise_seconds = workout_seconds(workout)
+    return (workout.get("date", ""), workout.get("start_time"), workout.get("saved_at"),
+            total_seconds, exercise_seconds, total_hours, exercise_hours,
+            source, json.dumps(as_dict(workout), separators=(",", ":")))
+
+
+def month_bounds(month):
+    """'2025-03' -> ('2025-03-01', '2025-04-01')"""
+    year, month_number = (int(part) for part in month.split("-"))
+    first = date(year, month_number, 1)
+    if month_number == 12:
+        following = date(year + 1, 1, 1)
+    else:
+        following = date(year, month_number + 1, 1)
+    return first.isoformat(), following.isoformat()
+
+
+def read_month(db_file, month):
+    """(generation, workouts) of one month, read without changing the database
+    
+    The connection is opened read-only, so no schema is created and no
+    migration runs; SQLiteMonth.generation() gives the same marker.
+    """
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        bounds = month_bounds(month)
+        count, last_id = conn.execute(MONTH_GENERATION_SQL, bounds).fetchone()
+        workouts = [json.loads(data) for (data,) in conn.execute(MONTH_BY_ID_SQL, bounds)]
+    finally:
+        conn.close()
+    return f"{count}:{last_id}", workouts
+
+
+class SQLiteStore:
+    """Optional SQLite storage backend with the same methods as WorkoutStore
+    
+    Rows are indexed on date and saved_at so month and date-range queries
+    don't need to read everything. Archived months stay in the same table
+    under their archive name, so they can be queried too.
+    
+    Saves come from the write-behind thread and reads from the window and
+    the server's store thread, so every thread gets its own connection
+    (`conn`) and no statement or transaction is ever shared between
+    threads. In WAL mode readers don't block the writer.
+    """
+    
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections = []
+        self.conn.executescript(SCHEMA)
+    
+    @property
+    def conn(self):
+        """This thread's connection, opened on first use"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            # Only close() touches a connection from another thread
+            conn = sqlite3.connect(self.db_file, cached_statements=64, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            with self.lock:
+                self.connections.append(conn)
+        return conn
+    
+    def close(self):
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for conn in connections:
+            conn.close()
+        self.local = threading.local()
+    
+    def exists(self):
+        """True if there is anything stored"""
+        return self.conn.execute("SELECT 1 FROM workouts LIMIT 1").fetchone() is not None
+    
+    def append(self, workout):
+        """Store one new workout"""
+        with self.conn:
+            self.conn.execute(INSERT_SQL, workout_row(workout, CURRENT))
+            self.conn.execute(BUMP_SQL)
+    
+    @metrics.timed("store.append")
+    def append_many(self, workouts, source=CURRENT, batch_size=5000):
+        """Insert workouts in batches, one transaction per batch
+        
+        If a later batch of a list fails, PartialSaveError names the
+        workouts that were not committed.
+        """
+        count = 0
+        batch = []
+        try:
+            for workout in workouts:
+                batch.append(workout_row(workout, source))
+                if len(batch) >= batch_size:
+                    with self.conn:
+                        self.conn.executemany(INSERT_SQL, batch)
+                        self.conn.execute(BUMP_SQL)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                with self.conn:
+                    self.conn.executemany(INSERT_SQL, batch)
+                    self.conn.execute(BUMP_SQL)
+                count += len(batch)
+        except Exception as e:
+            if not count or not isinstance(workouts, list):
+                raise
+            raise PartialSaveError(f"{len(workouts) - count} of {len(workouts)} workouts not saved: {e}",
+                                   workouts[count:]) from e
+        return count
+    
+    def iter_workouts(self):
+        """Yield the workouts that are not archived yet"""
+        for (data,) in self.conn.execute(CURRENT_SQL, (CURRENT,)):
+            yield decode(data)
+    
+    def sorted_runs(self):
+        """The current workouts as one date-sorted run, streamed from the index"""
+        def run():
+            for (data,) in self.conn.execute(CURRENT_BY_DATE_SQL, (CURRENT,)):
+                yield decode(data)
+        return [run()]
+    
+    def load(self):
+        """Return the current workouts in the original {"workouts": [...]} layout"""
+        return {"workouts": [json.loads(data) for (data,) in
+                             self.conn.execute(CURRENT_SQL, (CURRENT,))]}
+    
+    def generation(self):
+        """Change marker, bumped in the same transaction as every write"""
+        return self._meta("generation") or "0"
+    
+    def needs_compaction(self):
+        return False
+    
+    def compact(self):
+        """Fold the WAL back into the database file"""
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    
+    def workouts_in_month(self, month):
+        """All workouts (current and archived) dated in a month like '2025-03'"""
+        first, following = month_bounds(month)
+        return [json.loads(data) for (data,) in self.conn.execute(MONTH_SQL, (first, following))]
+    
+    def totals_between(self, start_date, end_date):
+        """Count and summed durations for workouts dated start_date..end_date (inclusive)"""
+        count, total_seconds, exercise_seconds, total_hours, exercise_hours = \
+            self.conn.execute(TOTALS_SQL, (start_date, end_date)).fetchone()
+        return {
+            "workouts": count,
+            "total_seconds": total_seconds,
+            "exercise_seconds": exercise_seconds,
+            "total_duration_hours": total_hours,
+            "exercise_duration_hours": exercise_hours,
+        }
+    
+    def migrate_json(self, data_file, archive_folder, partitions_folder=None):
+        """Import the JSON backend's data and every archived month (.json or .wka) once
+        
+        That is the monthly partitions in partitions_folder, a
+        workout_data.json from before them and the *.migrated copy that
+        splitting it into partitions left behind. Files that were already
+        imported are remembered in the meta table and skipped, so running
+        the migration twice adds nothing. A workout already in the
+        database (same workout_key) is not added again, so a month that
+        is both a partition and an archive comes in once.
+        """
+        pending = []
+        if partitions_folder and os.path.isdir(partitions_folder):
+            for month in sorted(partition_months(partitions_folder)):
+                path = partition_path(partitions_folder, month)
+                pending.append(("migrated:data/" + os.path.basename(path), path, CURRENT,
+                                lambda path=path: WorkoutStore(path).iter_workouts()))
+        legacy_log = os.path.splitext(data_file)[0] + ".jsonl"
+        if os.path.exists(data_file + ".migrated") or os.path.exists(legacy_log + ".migrated"):
+            pending.append(("migrated:" + os.path.basename(data_file) + ".migrated", data_file,
+                            CURRENT, lambda: WorkoutStore(data_file + ".migrated",
+                                                          log_file=legacy_log + ".migrated")
+                            .iter_workouts()))
+        pending.append(("migrated:" + os.path.basename(data_file), data_file, CURRENT,
+                        lambda: WorkoutStore(data_file).iter_workouts()))
+        archive_files = sorted(glob.glob(os.path.join(archive_folder, "workout_data_*.json")) +
+                               glob.glob(os.path.join(archive_folder, "workout_data_*.wka")))
+        for path in archive_files:
+            # An archive converted to .wka keeps the same rows as its JSON file
+            other = os.path.splitext(path)[0] + (".json" if path.endswith(".wka") else ".wka")
+            if self._meta("migrated:" + os.path.basename(other)):
+                self._set_meta("migrated:" + os.path.basename(path), "1")
+                continue
+            pending.append(("migrated:" + os.path.basename(path), path, archive_name(path),
+                            lambda path=path: iter_archive(path)))
+        pending = [entry for entry in pending if not self._meta(entry[0])]
+        if not pending:
+            return {}
+        
+        imported = {}
+        known = set(self.conn.execute(KEYS_SQL))
+        
+        def new_workouts(workouts):
+            for workout in workouts:
+                key = workout_key(workout)
+                if key not in known:
+                    known.add(key)
+                    yield workout
+        
+        for key, path, source, read in pending:
+            imported[path] = imported.get(path, 0) + self.append_many(new_workouts(read()), source)
+            self._set_meta(key, "1")
+        return imported
+    
+    def months(self):
+        """Months like '2025-03' that have workouts"""
+        return [month for (month,) in self.conn.execute(MONTHS_SQL)]
+    
+    def mark_migrated(self, archive_path):
+        """An archive written from this database must not be imported again"""
+        self._set_meta("migrated:" + os.path.basename(archive_path), "1")
+    
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                              (key, value))
+
+
+class SQLiteMonth:
+    """One month of an SQLiteStore, used as a PartitionedStore partition
+    
+    The workouts table is already indexed on date, so a month is just a
+    date range; archived and current rows are both included.
+    """
+    
+    def __init__(self, store, month):
+        self.store = store
+        self.month = month
+        self.bounds = month_bounds(month)
+    
+    def exists(self):
+        return self.store.conn.execute("SELECT 1 FROM workouts WHERE date >= ? AND date < ? LIMIT 1",
+                                       self.bounds).fetchone() is not None
+    
+    def append(self, workout):
+        self.store.append(workout)
+    
+    def append_many(self, workouts):
+        return self.store.append_many(workouts)
+    
+    def iter_workouts(self):
+        """The month's workouts in save order"""
+        for (data,) in self.store.conn.execute(MONTH_BY_ID_SQL, self.bounds):
+            yield decode(data)
+    
+    def sorted_runs(self):
+        def run():
+            for (data,) in self.store.conn.execute(MONTH_SQL, self.bounds):
+                yield decode(data)
+        return [run()]
+    
+    def load(self):
+        return {"workouts": [json.loads(data) for (data,) in
+                             self.store.conn.execute(MONTH_BY_ID_SQL, self.bounds)]}
+    
+    def generation(self):
+        """Changes when the month gets a workout (rows are only ever added), not on other months' saves"""
+        count, last_id = self.store.conn.execute(MONTH_GENERATION_SQL, self.bounds).fetchone()
+        return f"{count}:{last_id}"
+    
+    def needs_compaction(self):
+        return False
+    
+    def compact(self):
+        self.store.compact()
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Import the JSON workout data into SQLite")
+    parser.add_argument("--data-file", default=os.path.join(script_dir, "workout_data.json"))
+    parser.add_argument("--archive", default=os.path.join(script_dir, "archive"))
+    parser.add_argument("--db", default=os.path.join(script_dir, "workout_data.db"))
+    args = parser.parse_args()
+    
+    store = SQLiteStore(args.db)
+    results = store.migrate_json(args.data_file, args.archive)
+    for path, count in results.items():
+        print(f"{count:8d} workouts from {path}")
+    if not results:
+        print("Nothing new to import.")
+    store.close()
@@ -0,0 +1,132 @@
+import time
+
+from segment_events import END, EXERCISE, PAUSE, REST, START, EventRing
+
+
+class Stopwatch:
+    """Stopwatch built on time.monotonic_ns()
+    
+    Nothing counts in the background. start() and stop() record timestamps
+    for each segment and the elapsed time is worked out when asked for, so
+    there is no drift and no thread.
+    """
+    
+    def __init__(self, clock=time.monotonic_ns):
+        self.clock = clock
+        self.closed_ns = 0          # total of finished segments
+        self.started_ns = None      # start of the open segment
+    
+    @property
+    def running(self):
+        return self.started_ns is not None
+    
+    def start(self, now=None):
+        """Open a new segment (does nothing if already running)"""
+        if self.started_ns is None:
+            self.started_ns = self.clock() if now is None else now
+    
+    def stop(self, now=None):
+        """Close the open segment (does nothing if not running)"""
+        if self.started_ns is not None:
+            stop_ns = self.clock() if now is None else now
+            self.closed_ns += stop_ns - self.started_ns
+            self.started_ns = None
+    
+    def reset(self):
+        """Forget all segments"""
+        self.closed_ns = 0
+        self.started_ns = None
+    
+    def elapsed_ns(self, now=None):
+        """Total time in nanoseconds, including the open segment"""
+        # Read once: an interval program may stop the segment from its thread
+        started_ns = self.started_ns
+        if started_ns is None:
+            return self.closed_ns
+        if now is None:
+            now = self.clock()
+        return self.closed_ns + now - started_ns
+    
+    def seconds(self, now=None):
+        """Whole elapsed seconds"""
+        return self.elapsed_ns(now) // 1_000_000_000
+
+
+class WorkoutClock:
+    """The main, exercise and rest stopwatches of one workout
+    
+    Every transition reads the clock once and hands the same timestamp to
+    all stopwatches involved, so the three counters always stay in step.
+    The same timestamp goes into the events ring, so replaying the events
+    gives exactly the totals the stopwatches show.
+    """
+    
+    def __init__(self, clock=time.monotonic_ns, event_capacity=4096):
+        self.clock = clock
+        self.main = Stopwatch(clock)
+        self.exercise = Stopwatch(clock)
+        self.rest = Stopwatch(clock)
+        self.events = EventRing(event_capacity)
+    
+    def start(self, now=None):
+        """Start (or resume) the workout"""
+        if not self.main.running:
+            now = self.clock() if now is None else now
+            self.main.start(now)
+            self.events.record(now, START)
+    
+    def pause(self, now=None):
+        """Pause the workout along with exercise/rest"""
+        if self.main.running or self.exercise.running or self.rest.running:
+            self._stop_all(self.clock() if now is None else now, PAUSE)
+    
+    def start_exercise(self, now=None):
+        """Switch from resting (or nothing) to exercising"""
+        if not self.exercise.running:
+            now = self.clock() if now is None else now
+            self.rest.stop(now)
+            self.exercise.start(now)
+            self.events.record(now, EXERCISE)
+    
+    def start_rest(self, now=None):
+        """Switch from exercising (or nothing) to resting"""
+        if not self.rest.running:
+            now = self.clock() if now is None else now
+            self.exercise.stop(now)
+            self.rest.start(now)
+            self.events.record(now, REST)
+    
+    def finish(self):
+        """Stop everything for saving; returns (main, exercise, rest) seconds"""
+        self._stop_all(self.clock(), END)
+        return self.seconds()
+    
+    def _stop_all(self, now, kind):
+        self.main.stop(now)
+        self.exercise.stop(now)
+        self.rest.stop(now)
+        self.events.record(now, kind)
+    
+    def reset(self):
+        """Clear all three stopwatches and the recorded events"""
+        self.main.reset()
+        self.exercise.reset()
+        self.rest.reset()
+        self.events.clear()
+    
+    def restore(self, main_ns, exercise_ns, rest_ns):
+        """Start over, paused, from totals recovered after a crash"""
+        self.reset()
+        self.main.closed_ns = main_ns
+        self.exercise.closed_ns = exercise_ns
+        self.rest.closed_ns = rest_ns
+        # Replaying the events starts from the recovered totals
+        self.events.base.main_ns = main_ns
+        self.events.base.exercise_ns = exercise_ns
+        self.events.base.rest_ns = rest_ns
+    
+    def seconds(self):
+        """(main, exercise, rest) whole seconds read at a single instant"""
+        now = self.clock()
+        return (self.main.seconds(now), self.exercise.seconds(now),
+                self.rest.seconds(now))
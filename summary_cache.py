@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+
+import metrics
+from write_behind import AfterSaveError
+
+
+def empty_totals():
+    return {"count": 0, "total_seconds": 0, "exercise_seconds": 0, "total_hours": 0.0}
+
+
+def add_to_totals(totals, workout):
+    """Add one workout to a totals dict"""
+    totals["count"] += 1
+    totals["total_seconds"] += workout.get("total_seconds", 0) or 0
+    totals["exercise_seconds"] += workout.get("exercise_seconds", 0) or 0
+    totals["total_hours"] += workout.get("total_duration_hours", 0) or 0
+
+
+def count_partition(partition):
+    """Totals of every workout in one month's partition"""
+    totals = empty_totals()
+    for workout in partition.iter_workouts():
+        add_to_totals(totals, workout)
+    return totals
+
+
+class SummaryCache:
+    """Running totals per month, kept in a small JSON file
+    
+    Each save adds the new workout to the totals instead of re-reading
+    every workout. `totals` are the current month's (what the window
+    shows) and `months` holds every stored month. The cache remembers the
+    store's generation and each month's partition generation; when they
+    don't match (data changed behind our back, an import, compaction)
+    only the months whose partition changed are counted again.
+    
+    A lock guards the totals because saves may come from the write-behind
+    thread while the window reads the summary.
+    """
+    
+    def __init__(self, cache_file, store):
+        self.cache_file = cache_file
+        self.store = store
+        self.generation = None
+        self.totals = empty_totals()
+        self.months = {}
+        self.month_generations = {}
+        self.lock = threading.RLock()
+        self.load()
+    
+    def load(self):
+        """Read the cache file if there is one"""
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            self.generation = data["generation"]
+            self.totals = data["totals"]
+            self.months = data["months"]
+            # Files from before months were tracked per partition recount them once
+            self.month_generations = data.get("month_generations", {})
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            self.generation = None
+    
+    def save(self):
+        """Write the cache file (temp file + rename)"""
+        temp_file = self.cache_file + ".tmp"
+        with open(temp_file, 'w') as f:
+            json.dump({"generation": self.generation, "totals": self.totals,
+                       "months": self.months, "month_generations": self.month_generations}, f)
+        os.replace(temp_file, self.cache_file)
+    
+    def _refresh_month(self, month):
+        """Count one month again if its partition changed; True if it did"""
+        partition = self.store.partition(month)
+        generation = partition.generation()
+        if month in self.months and self.month_generations.get(month) == generation:
+            return False
+        self.months[month] = count_partition(partition)
+        self.month_generations[month] = generation
+        return True
+    
+    @metrics.timed("summary.rebuild")
+    def rebuild(self):
+        """Bring every month up to date, counting only the partitions that changed"""
+        months = self.store.months()
+        for month in set(self.months) - set(months):
+            del self.months[month]
+            self.month_generations.pop(month, None)
+        for month in months:
+            self._refresh_month(month)
+        self.totals = dict(self.months.get(self.store.current_month, empty_totals()))
+        self.generation = self.store.generation()
+        self.save()
+    
+    def _add(self, workout):
+        add_to_totals(self.totals, workout)
+        month = workout.get("date", "")[:7]
+        if month not in self.months:
+            self.months[month] = empty_totals()
+        add_to_totals(self.months[month], workout)
+    
+    def append(self, workout):
+        """Save a workout to the store and add it to the totals"""
+        self.append_many([workout])
+    
+    @metrics.timed("summary.append")
+    def append_many(self, workouts):
+        """Save a batch of workouts to the store and add them to the totals
+        
+        Raises AfterSaveError if the workouts were stored but the totals
+        could not be updated; they are counted again on the next summary().
+        """
+        with self.lock:
+            up_to_date = (self.generation == self.store.generation()
+                          and self.store.in_current(workouts))
+            self.store.append_many(workouts)
+            try:
+                if up_to_date:
+                    for workout in workouts:
+                        self._add(workout)
+                    self.generation = self.store.generation()
+                    self.month_generations[self.store.current_month] = self.store.current.generation()
+                    self.save()
+                else:
+                    self.rebuild()
+            except Exception as e:
+                self.generation = None
+                self.month_generations.pop(self.store.current_month, None)
+                raise AfterSaveError(f"summary not updated: {e}") from e
+    
+    def summary(self):
+        """Totals of the current month's workouts, brought up to date first if stale"""
+        with self.lock:
+            if self.generation != self.store.generation():
+                self.rebuild()
+            return dict(self.totals)
+    
+    def month(self, month):
+        """Totals for one month like '2025-03'"""
+        with self.lock:
+            self.summary()
+            # Other months may have changed without touching the current one
+            if month in self.store.months() and self._refresh_month(month):
+                self.save()
+            return dict(self.months.get(month, empty_totals()))
@@ -0,0 +1,22 @@
+"""Column statistics over workouts with missing or empty dates."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("numpy")
+
+from analytics import ColumnBuilder, analyze
+
+
+def test_undated_workouts_are_skipped():
+    builder = ColumnBuilder()
+    for day in ("2025-02-03", "", None, "2025-02-04"):
+        builder.add({"date": day, "total_seconds": 3600, "exercise_seconds": 1800})
+    builder.add({"total_seconds": 60})
+    columns = builder.columns()
+    assert len(columns) == 2
+    assert builder.skipped == 3
+    assert analyze(columns)["workouts"] == 2
@@ -0,0 +1,107 @@
+"""Monthly .wka archives next to the older report-time JSON archives."""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import workout_core
+from archive_format import write_archive
+
+
+def workout(day, notes=""):
+    return {"date": day, "start_time": "07:00:00", "total_duration_hours": 1.0,
+            "exercise_duration_hours": 0.5, "total_seconds": 3600, "exercise_seconds": 1800,
+            "notes": notes, "saved_at": f"{day}T08:00:00"}
+
+
+def legacy_and_month_archive(folder):
+    """What the old window archived in March (February's workouts), then a March archive"""
+    os.makedirs(folder)
+    with open(os.path.join(folder, "workout_data_March_2025.json"), 'w') as f:
+        json.dump({"workouts": [workout("2025-02-10", "legday"), workout("2025-02-20")],
+                   "archived_at": "2025-03-01T09:00:00"}, f)
+    write_archive(os.path.join(folder, "workout_data_2025-03.wka"), [workout("2025-03-05")])
+
+
+def test_legacy_archive_is_not_hidden_by_the_month_archive(tmp_path):
+    folder = str(tmp_path / "archive")
+    legacy_and_month_archive(folder)
+    found = [os.path.basename(path) for _, path in workout_core.find_archives(folder)]
+    assert found == ["workout_data_2025-03.wka", "workout_data_March_2025.json"]
+    # The March file can hold February
+    found = workout_core.find_archives(folder, "2025-02", "2025-02")
+    assert [os.path.basename(path) for _, path in found] == ["workout_data_March_2025.json"]
+
+
+def test_sqlite_migration_reads_both_archives(tmp_path):
+    from sqlite_store import SQLiteStore
+    folder = str(tmp_path / "archive")
+    legacy_and_month_archive(folder)
+    store = SQLiteStore(str(tmp_path / "workout_data.db"))
+    store.migrate_json(str(tmp_path / "workout_data.json"), folder)
+    assert store.months() == ["2025-02", "2025-03"]
+    store.close()
+
+
+def test_notes_in_a_legacy_archive_of_a_stored_month_are_found(tmp_path):
+    from notes_index import NotesIndex
+    folder = str(tmp_path / "archive")
+    legacy_and_month_archive(folder)
+    write_archive(os.path.join(folder, "workout_data_2025-03.wka"), [workout("2025-03-05", "legday")])
+    store = workout_core.open_store(str(tmp_path))
+    store.append_many([workout("2025-03-05", "legday")])
+    index = NotesIndex(str(tmp_path / "notes_index"), store, folder)
+    assert [(day, source) for day, _, _, source in index.search("legday")] == \
+        [("2025-02-10", "March_2025"), ("2025-03-05", "2025-03")]
+    
+    # A workout both stored and in an older archive is found once
+    store.append_many([workout("2025-02-10", "legday")])
+    assert [(day, source) for day, _, _, source in index.search("legday")] == \
+        [("2025-02-10", "2025-02"), ("2025-03-05", "2025-03")]
+
+
+def test_sqlite_migration_reads_the_json_partitions(tmp_path):
+    base = str(tmp_path)
+    data_file = workout_core.data_paths(base)["data_file"]
+    with open(data_file, 'w') as f:
+        json.dump({"workouts": [workout("2025-02-10"), workout("2025-03-05")]}, f)
+    json_store = workout_core.open_store(base, "json")
+    assert json_store.months() == ["2025-02", "2025-03"]
+    assert os.path.exists(data_file + ".migrated")
+    # Archived from the JSON backend too: the same March workout twice
+    os.makedirs(os.path.join(base, "archive"))
+    write_archive(os.path.join(base, "archive", "workout_data_2025-03.wka"), [workout("2025-03-05")])
+    
+    store = workout_core.open_store(base, "sqlite")
+    assert store.months() == ["2025-02", "2025-03"]
+    assert [w["date"] for w in store.partition("2025-03").iter_workouts()] == ["2025-03-05"]
+    # Opening again imports nothing more
+    store = workout_core.open_store(base, "sqlite")
+    assert sum(1 for _ in store.partition("2025-02").iter_workouts()) == 1
+
+
+def test_export_reads_every_archive_once(tmp_path):
+    from bulk_io import export_file
+    folder = str(tmp_path / "archive")
+    legacy_and_month_archive(folder)
+    store = workout_core.open_store(str(tmp_path))
+    store.append_many([workout("2025-03-05")])
+    out = str(tmp_path / "all.jsonl")
+    count, _ = export_file(store, out, archive_folder=folder)
+    with open(out, 'r') as f:
+        assert [json.loads(line)["date"] for line in f] == ["2025-02-10", "2025-02-20", "2025-03-05"]
+    assert count == 3
+
+
+def test_workouts_a_record_cannot_hold_are_kept_as_json(tmp_path):
+    from archive_format import ArchiveReader
+    odd = [{"date": "2025-02-03", "total_seconds": 3600.0, "exercise_seconds": 10},
+           {"date": "2025-02-04", "total_seconds": 2**40, "exercise_seconds": 5},
+           {"date": "2025-02-05", "total_duration_hours": "1.5", "notes": "x"}]
+    path = str(tmp_path / "workout_data_2025-02.wka")
+    write_archive(path, odd)
+    with ArchiveReader(path) as reader:
+        back = list(reader)
+    assert back == odd
+    assert [type(w["total_seconds"]) for w in back[:2]] == [float, int]
@@ -0,0 +1,67 @@
+"""Phase switches of interval programs and when the window draws their cues."""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+from deadline_scheduler import DeadlineScheduler
+from interval_program import IntervalRunner, expand, parse_program
+from render_loop import RenderLoop
+from stopwatch import WorkoutClock
+
+
+class FakeRoot:
+    def __init__(self):
+        self.delays = []
+    
+    def after(self, delay_ms, callback):
+        self.delays.append(delay_ms)
+        return len(self.delays)
+    
+    def after_cancel(self, job):
+        pass
+
+
+def test_frame_is_brought_forward_to_the_phase_switch():
+    scheduler = DeadlineScheduler()
+    try:
+        clock = WorkoutClock()
+        runner = IntervalRunner(clock, expand(parse_program("2x(0.03w,10r)")), scheduler)
+        runner.start()
+        root = FakeRoot()
+        loop = RenderLoop(root, lambda: (), [], is_running=lambda: True,
+                          next_due=runner.ns_to_switch)
+        loop.frame()
+        # The 30 ms work phase ends before the next 100 ms frame
+        assert 1 <= root.delays[-1] <= 31
+        
+        runner.pause()
+        assert runner.ns_to_switch() is None
+        loop.frame()
+        assert root.delays[-1] == 100
+    finally:
+        scheduler.stop()
+
+
+
+def test_callback_error_is_counted_and_the_scheduler_goes_on(capsys):
+    was_enabled = metrics.enabled
+    metrics.reset()
+    metrics.enable()
+    scheduler = DeadlineScheduler()
+    try:
+        ran = threading.Event()
+        
+        def broken(deadline_ns):
+            raise RuntimeError("bad program")
+        
+        scheduler.call_later(1_000_000, broken)
+        scheduler.call_later(2_000_000, lambda deadline_ns: ran.set())
+        assert ran.wait(5)
+        assert metrics.counter("interval.callback_error").value == 1
+        assert "bad program" in capsys.readouterr().err
+    finally:
+        scheduler.stop()
+        metrics.enable(was_enabled)
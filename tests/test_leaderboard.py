@@ -0,0 +1,75 @@
+"""Leaderboards for months other than the current one."""
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import workout_core
+from summary_cache import SummaryCache
+
+THIS_MONTH = date.today().strftime("%Y-%m")
+EARLIER = "2025-02"
+
+
+def workout(day, seconds):
+    return {"date": day, "start_time": "07:00:00",
+            "total_duration_hours": round(seconds / 3600.0, 2),
+            "exercise_duration_hours": round(seconds / 7200.0, 2),
+            "total_seconds": seconds, "exercise_seconds": seconds // 2,
+            "notes": "", "saved_at": f"{day}T08:00:00"}
+
+
+def save(base, user, workouts):
+    folder = workout_core.user_dir(str(base), user)
+    os.makedirs(folder)
+    store = workout_core.open_store(folder)
+    cache = SummaryCache(workout_core.data_paths(folder)["summary_file"], store)
+    cache.append_many(workouts)
+    cache.rebuild()
+    return store
+
+
+def test_past_month_after_summary_rebuild(tmp_path):
+    save(tmp_path, "ana", [workout(f"{EARLIER}-03", 3600), workout(f"{THIS_MONTH}-01", 600)])
+    save(tmp_path, "ben", [workout(f"{EARLIER}-04", 7200), workout(f"{EARLIER}-09", 3600)])
+    
+    board = workout_core.leaderboard(str(tmp_path), EARLIER)
+    assert [(user, totals["count"], totals["total_seconds"]) for user, totals in board] == \
+        [("ben", 2, 10800), ("ana", 1, 3600)]
+    assert [user for user, totals in workout_core.leaderboard(str(tmp_path)) if totals["count"]] == ["ana"]
+
+
+def test_month_changed_since_the_summary(tmp_path):
+    store = save(tmp_path, "ana", [workout(f"{THIS_MONTH}-01", 600)])
+    # Imported later without the window: the summary file doesn't know yet
+    store.append_many([workout(f"{EARLIER}-03", 3600)])
+    board = workout_core.leaderboard(str(tmp_path), EARLIER)
+    assert board[0][1]["count"] == 1
+
+
+def test_leaderboard_changes_no_files(tmp_path, monkeypatch):
+    store = save(tmp_path, "ana", [workout(f"{EARLIER}-03", 3600)])
+    log_file = store.partition(EARLIER).log_file
+    # A save the window is still in the middle of writing
+    with open(log_file, 'ab') as f:
+        f.write(b'{"date": "2025-02-0')
+    # An athlete whose old single data file was never split
+    legacy = workout_core.user_dir(str(tmp_path), "ben")
+    os.makedirs(legacy)
+    workout_core.WorkoutStore(workout_core.data_paths(legacy)["data_file"]).append_many(
+        [workout(f"{EARLIER}-04", 7200), workout(f"{THIS_MONTH}-01", 600)])
+    before = {path: os.path.getsize(path) for path in tmp_path.rglob("*") if path.is_file()}
+    
+    board = workout_core.leaderboard(str(tmp_path), EARLIER)
+    assert [(user, totals["count"]) for user, totals in board] == [("ben", 1), ("ana", 1)]
+    monkeypatch.setenv("WORKOUT_BACKEND", "sqlite")
+    assert [user for user, totals in workout_core.leaderboard(str(tmp_path), EARLIER)] == ["ben", "ana"]
+    assert {path: os.path.getsize(path) for path in tmp_path.rglob("*") if path.is_file()} == before
+
+
+def test_leaderboard_reads_the_sqlite_database(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORKOUT_BACKEND", "sqlite")
+    save(tmp_path, "ana", [workout(f"{EARLIER}-03", 3600), workout(f"{EARLIER}-05", 600)])
+    board = workout_core.leaderboard(str(tmp_path), EARLIER)
+    assert board[0][1]["count"] == 2 and board[0][1]["total_seconds"] == 4200
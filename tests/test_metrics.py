@@ -0,0 +1,43 @@
+"""Reading the metrics while other threads add new ones."""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+
+
+def test_exports_while_metrics_are_added():
+    was_enabled = metrics.enabled
+    metrics.reset()
+    metrics.enable()
+    errors = []
+    done = threading.Event()
+    
+    def add():
+        for i in range(3000):
+            metrics.inc(f"test.counter{i}")
+            metrics.observe(f"test.histogram{i}", 0.001)
+        done.set()
+    
+    def read():
+        try:
+            while not done.is_set():
+                metrics.snapshot()
+                metrics.prometheus_text()
+                metrics.latency_table()
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=add), threading.Thread(target=read)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+    finally:
+        metrics.enable(was_enabled)
+    assert errors == []
+    assert len(metrics.snapshot()["histograms"]) == 3000
+    metrics.reset()
@@ -0,0 +1,56 @@
+"""Retrying a batch that was only partly stored writes nothing twice."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import workout_core
+from partitioned_store import PartitionedStore, partition_path
+from workout_store import WorkoutStore
+from write_behind import AfterSaveError, write_with_retries
+
+
+def workout(day):
+    return {"date": day, "start_time": "07:00:00", "total_duration_hours": 1.0,
+            "exercise_duration_hours": 0.5, "total_seconds": 3600, "exercise_seconds": 1800,
+            "notes": "", "saved_at": f"{day}T08:00:00"}
+
+
+class FlakyMonth(WorkoutStore):
+    """A partition whose first write fails"""
+    fail = {"2025-03": 1}
+    
+    def append_many(self, workouts):
+        month = workouts[0]["date"][:7]
+        if self.fail.get(month):
+            self.fail[month] -= 1
+            raise OSError("disk busy")
+        return super().append_many(workouts)
+
+
+def test_only_the_months_not_written_are_retried(tmp_path):
+    folder = str(tmp_path)
+    store = PartitionedStore(lambda month: FlakyMonth(partition_path(folder, month)))
+    batch = [workout("2025-02-03"), workout("2025-03-04"), workout("2025-03-05")]
+    error, retries = write_with_retries(store.append_many, batch, retry_delay=0.001)
+    assert (error, retries) == (None, 1)
+    assert [len(list(store.partition(month).iter_workouts())) for month in ("2025-02", "2025-03")] == [1, 2]
+
+
+def test_failed_sync_is_not_written_again(tmp_path, monkeypatch):
+    store = workout_core.open_store(str(tmp_path))
+    calls = []
+    
+    def write_batch(workouts):
+        calls.append(len(workouts))
+        store.append_many(workouts)
+    
+    def broken_fsync(fd):
+        raise OSError("I/O error")
+    
+    monkeypatch.setattr(os, "fsync", broken_fsync)
+    error, retries = write_with_retries(write_batch, [workout("2025-02-03")], retry_delay=0.001)
+    monkeypatch.undo()
+    assert isinstance(error, AfterSaveError) and retries == 0
+    assert calls == [1]
+    assert len(list(store.partition("2025-02").iter_workouts())) == 1
@@ -0,0 +1,64 @@
+"""Summary and notes search over every stored month, not just the current one."""
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import workout_core
+from notes_index import NotesIndex
+from summary_cache import SummaryCache
+
+THIS_MONTH = date.today().strftime("%Y-%m")
+EARLIER = "2025-02"
+
+
+def workout(day, notes, seconds=3600):
+    return {"date": day, "start_time": "07:00:00",
+            "total_duration_hours": round(seconds / 3600.0, 2),
+            "exercise_duration_hours": round(seconds / 7200.0, 2),
+            "total_seconds": seconds, "exercise_seconds": seconds // 2,
+            "notes": notes, "saved_at": f"{day}T08:00:00"}
+
+
+def open_folder(folder, backend):
+    store = workout_core.open_store(str(folder), backend)
+    paths = workout_core.data_paths(str(folder))
+    return (store, SummaryCache(paths["summary_file"], store),
+            NotesIndex(paths["notes_index_folder"], store, paths["archive_folder"]))
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_rebuild_keeps_earlier_months(tmp_path, backend):
+    store, summary, notes = open_folder(tmp_path, backend)
+    summary.append_many([workout(f"{EARLIER}-03", "squat heavy"), workout(f"{EARLIER}-05", "easy run")])
+    summary.append_many([workout(f"{THIS_MONTH}-01", "deadlift", 1800)])
+    assert store.current_month == THIS_MONTH
+    
+    # Rebuild from scratch, as after a restart with a stale cache file
+    os.remove(workout_core.data_paths(str(tmp_path))["summary_file"])
+    store, summary, notes = open_folder(tmp_path, backend)
+    summary.rebuild()
+    assert summary.summary()["count"] == 1
+    assert summary.month(EARLIER)["count"] == 2
+    assert summary.month(EARLIER)["total_seconds"] == 7200
+    assert summary.month(THIS_MONTH)["total_seconds"] == 1800
+    
+    assert [hit[:2] for hit in notes.search("squat")] == [(f"{EARLIER}-03", "07:00:00")]
+    assert [hit[0] for hit in notes.search("deadlift")] == [f"{THIS_MONTH}-01"]
+    assert notes.search(f"run {THIS_MONTH}") == []
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_earlier_month_changed_behind_the_cache(tmp_path, backend):
+    store, summary, notes = open_folder(tmp_path, backend)
+    summary.append_many([workout(f"{THIS_MONTH}-01", "deadlift")])
+    summary.summary()
+    assert notes.search("squat") == []
+    
+    # An import into a finished month doesn't touch the current one
+    store.append_many([workout(f"{EARLIER}-10", "front squat")])
+    assert summary.month(EARLIER)["count"] == 1
+    assert [hit[0] for hit in notes.search("squat")] == [f"{EARLIER}-10"]
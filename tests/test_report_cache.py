@@ -0,0 +1,36 @@
+"""Cache hits are kept in memory until put() or close()."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_cache import ReportCache
+from report_writer import ReportStats
+
+
+def put_report(cache, folder, key):
+    report_path = os.path.join(folder, f"{key}.txt")
+    with open(report_path, 'w') as f:
+        f.write(f"report {key}\n")
+    stats = ReportStats()
+    stats.total_workouts = 3
+    cache.put(key, report_path, stats)
+    return report_path
+
+
+def test_hits_write_the_index_only_on_close(tmp_path):
+    cache = ReportCache(str(tmp_path / "cache"))
+    old = put_report(cache, str(tmp_path), "old")
+    put_report(cache, str(tmp_path), "new")
+    with open(cache.index_file, 'rb') as f:
+        written = f.read()
+    
+    assert cache.get("old", old).total_workouts == 3
+    assert cache.get("missing", old) is None
+    with open(cache.index_file, 'rb') as f:
+        assert f.read() == written
+    
+    cache.close()
+    reopened = ReportCache(str(tmp_path / "cache"))
+    assert list(reopened.entries) == ["new", "old"]
+    assert (reopened.hits, reopened.misses) == (1, 1)
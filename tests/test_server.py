@@ -0,0 +1,102 @@
+"""Streamed responses of the HTTP API: HTTP/1.0 clients and failures part way."""
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workout_server import WorkoutServer
+
+WORKOUT = json.dumps({"start": "2025-02-03T07:00:00", "total_seconds": 3600,
+                      "exercise_seconds": 1800, "notes": "squat"}).encode()
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = WorkoutServer(str(tmp_path), "json")
+    ready = threading.Event()
+    ports = []
+    
+    def on_ready(port):
+        ports.append(port)
+        ready.set()
+    
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(server.serve("127.0.0.1", 0, on_ready))
+    
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+    
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert ready.wait(5)
+    server.port = ports[0]
+    yield server
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(5)
+
+
+def exchange(server, request):
+    """Send one raw request and read until the server closes the connection"""
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as s:
+        s.sendall(request)
+        data = b""
+        while True:
+            try:
+                part = s.recv(65536)
+            except ConnectionResetError:
+                break
+            if not part:
+                break
+            data += part
+    return data
+
+
+def post(server):
+    return exchange(server, b"POST /workouts HTTP/1.1\r\nConnection: close\r\n"
+                    b"Content-Length: %d\r\n\r\n" % len(WORKOUT) + WORKOUT)
+
+
+def test_http_10_gets_a_body_without_chunks(server):
+    assert post(server).startswith(b"HTTP/1.1 202")
+    head, _, body = exchange(server, b"GET /workouts?from=2025-02 HTTP/1.0\r\n\r\n").partition(b"\r\n\r\n")
+    assert b"Transfer-Encoding" not in head
+    assert b"Connection: close" in head
+    assert json.loads(body)["count"] == 1
+
+
+def test_failure_after_headers_cuts_the_connection(server):
+    assert post(server).startswith(b"HTTP/1.1 202")
+    
+    def fail(*args):
+        raise RuntimeError("disk went away")
+    
+    server.encode_month = fail
+    response = exchange(server, b"GET /workouts?from=2025-02 HTTP/1.1\r\n\r\n")
+    assert response.count(b"HTTP/1.1 ") == 1
+    assert not response.endswith(b"0\r\n\r\n")
+
+
+def test_failed_save_is_listed_by_status(server, capsys):
+    def broken(workouts):
+        raise OSError("disk full")
+    
+    server.writer.write_batch = broken
+    server.writer.retries = 0
+    assert post(server).startswith(b"HTTP/1.1 202")
+    assert server.writer.flush(timeout=5)
+    body = exchange(server, b"GET /status HTTP/1.1\r\nConnection: close\r\n\r\n").partition(b"\r\n\r\n")[2]
+    status = json.loads(body)
+    [failure] = status["save_failures"]
+    assert (failure["stored"], failure["error"], len(failure["workouts"])) == (False, "disk full", 1)
+    assert status["writer"]["failed_batches"] == 1
+    assert server.writer.failed == []
+    assert "Could not save 1 workout(s): disk full" in capsys.readouterr().err
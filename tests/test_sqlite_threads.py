@@ -0,0 +1,52 @@
+"""The SQLite backend used from several threads at once."""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlite_store import SQLiteMonth, SQLiteStore
+
+
+def workout(i):
+    return {"date": f"2025-02-{i % 28 + 1:02d}", "start_time": "07:00:00",
+            "total_duration_hours": 1.0, "exercise_duration_hours": 0.5,
+            "total_seconds": 3600, "exercise_seconds": 1800,
+            "notes": f"set {i}", "saved_at": f"2025-02-01T08:00:{i % 60:02d}"}
+
+
+def test_writer_and_readers_on_their_own_connections(tmp_path):
+    store = SQLiteStore(str(tmp_path / "workout_data.db"))
+    month = SQLiteMonth(store, "2025-02")
+    errors = []
+    done = threading.Event()
+    
+    def write():
+        try:
+            for i in range(0, 400, 4):
+                store.append_many([workout(i + j) for j in range(4)])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+    
+    def read():
+        try:
+            while not done.is_set():
+                counted = sum(1 for _ in month.iter_workouts())
+                assert counted % 4 == 0     # never half a batch
+                store.generation()
+                month.generation()
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    assert errors == []
+    assert sum(1 for _ in month.iter_workouts()) == 400
+    assert len(store.connections) == 4
+    store.close()
+    assert store.connections == []
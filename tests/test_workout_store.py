@@ -0,0 +1,79 @@
+"""Recovering the append log after a crash or a damaged line, and reading during compaction."""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workout_store import WorkoutStore
+
+
+def workout(day):
+    return {"date": day, "start_time": "07:00:00", "total_duration_hours": 1.0,
+            "exercise_duration_hours": 0.5, "notes": "", "saved_at": f"{day}T08:00:00"}
+
+
+def saved_store(tmp_path):
+    store = WorkoutStore(str(tmp_path / "workout_data.json"))
+    store.append_many([workout(f"2025-02-{day:02d}") for day in range(1, 5)])
+    return store
+
+
+def test_torn_last_line_is_cut(tmp_path):
+    store = saved_store(tmp_path)
+    with open(store.log_file, 'ab') as f:
+        f.write(b'{"date": "2025-02-0')
+    store = WorkoutStore(store.data_file)
+    assert [w["date"] for w in store.load()["workouts"]] == [f"2025-02-{day:02d}" for day in range(1, 5)]
+    assert not os.path.exists(store.bad_file)
+
+
+def test_damaged_middle_line_keeps_the_rest(tmp_path):
+    store = saved_store(tmp_path)
+    with open(store.log_file, 'rb') as f:
+        lines = f.readlines()
+    lines[2] = b'{"date": "2025-02-02", garbage\n'
+    with open(store.log_file, 'wb') as f:
+        f.writelines(lines)
+    
+    store = WorkoutStore(store.data_file)
+    assert [w["date"] for w in store.load()["workouts"]] == ["2025-02-01", "2025-02-03", "2025-02-04"]
+    assert store.log_records == 3
+    with open(store.bad_file, 'rb') as f:
+        assert f.read() == lines[2]
+    store.append(workout("2025-02-05"))
+    assert len(WorkoutStore(store.data_file).load()["workouts"]) == 4
+
+
+def test_damaged_header_keeps_the_records(tmp_path):
+    store = saved_store(tmp_path)
+    with open(store.log_file, 'rb') as f:
+        lines = f.readlines()
+    with open(store.log_file, 'wb') as f:
+        f.writelines([b'{"log_i\x00\n'] + lines[1:])
+    
+    store = WorkoutStore(store.data_file)
+    assert len(store.load()["workouts"]) == 4
+    assert store.log_id is not None
+
+
+def test_reads_while_another_thread_compacts(tmp_path):
+    store = saved_store(tmp_path)
+    done = threading.Event()
+    
+    def write():
+        for day in range(5, 29):
+            store.append_many([workout(f"2025-02-{day:02d}")])
+            store.compact()
+        done.set()
+    
+    thread = threading.Thread(target=write)
+    thread.start()
+    seen = 4
+    while not done.is_set():
+        days = [w["date"] for w in store.load()["workouts"]]
+        # Every workout once, and none lost to a compaction in between
+        assert len(days) == len(set(days)) >= seen
+        seen = len(days)
+    thread.join()
+    assert len(list(store.iter_workouts())) == 28
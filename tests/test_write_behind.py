@@ -0,0 +1,54 @@
+"""Retries and failure counting of the background save queue."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from write_behind import AfterSaveError, WriteBehindQueue
+
+
+def test_failed_write_is_retried():
+    calls = []
+    
+    def flaky(workouts):
+        calls.append(len(workouts))
+        if len(calls) < 3:
+            raise OSError("disk busy")
+    
+    writer = WriteBehindQueue(flaky, retry_delay=0.001)
+    writer.submit({"date": "2025-02-03"})
+    assert writer.flush(timeout=5)
+    assert calls == [1, 1, 1]
+    assert writer.take_failures() == []
+    assert writer.stats()["written"] == 1
+    assert writer.stats()["retries"] == 2
+
+
+def test_failures_stay_counted_after_take_failures():
+    def broken(workouts):
+        raise OSError("gone")
+    
+    writer = WriteBehindQueue(broken, retries=1, retry_delay=0.001)
+    for _ in range(2):
+        writer.submit({"date": "2025-02-03"})
+        assert writer.flush(timeout=5)
+        assert len(writer.take_failures()) == 1
+    assert writer.stats()["failed_batches"] == 2
+    assert writer.stats()["written"] == 0
+
+
+def test_after_save_error_is_not_retried():
+    calls = []
+    
+    def stored_but_index_failed(workouts):
+        calls.append(len(workouts))
+        raise AfterSaveError("notes index not updated: disk full")
+    
+    writer = WriteBehindQueue(stored_but_index_failed, retry_delay=0.001)
+    writer.submit({"date": "2025-02-03"})
+    assert writer.flush(timeout=5)
+    assert calls == [1]
+    stats = writer.stats()
+    assert (stats["written"], stats["failed_batches"], stats["after_save_errors"]) == (1, 0, 1)
+    [(workouts, error)] = writer.take_failures()
+    assert isinstance(error, AfterSaveError)
@@ -1,31 +1,64 @@
 import tkinter as tk
-import time
-import threading
-import json
 import os
+import threading
+from contextlib import nullcontext
 from datetime import datetime
 from tkinter import messagebox, simpledialog
+import analytics
+import metrics
+import workout_core
+from checkpoint import SessionCheckpoint
+from data_browser import DataBrowser
+from goals import GoalTracker, parse_goal
+from interval_program import IntervalRunner, describe, expand, parse_program
+from notes_index import NotesIndex
+from report_cache import ReportCache
+from render_loop import RenderLoop
+from stopwatch import WorkoutClock
+from summary_cache import SummaryCache
+from workout_index import WorkoutIndex
+from write_behind import AfterSaveError, WriteBehindQueue
 
 class WorkoutTimer:
-    def __init__(self, root):
+    def __init__(self, root, user=None, gym=None):
         self.root = root
-        self.root.title("Workout Timer")
-        self.root.geometry("500x650")
+        self.user = user
+        self.gym = gym
+        self.root.title(f"Workout Timer - {user}" if user else "Workout Timer")
+        self.root.geometry("500x680")
         
         # Timer variables
-        self.main_running = False
-        self.main_seconds = 0
-        self.exercise_running = False
-        self.exercise_seconds = 0
-        self.rest_running = False
-        self.rest_seconds = 0
+        self.clock = WorkoutClock()
         
         # Data storage
         script_dir = os.path.dirname(os.path.abspath(__file__))
-        self.data_file = os.path.join(script_dir, "workout_data.json")
-        self.archive_folder = os.path.join(script_dir, "archive")
-        self.reports_folder = os.path.join(script_dir, "reports")
+        if user:
+            # Each athlete has their own folder, so nothing grows with the number of athletes
+            script_dir = workout_core.user_dir(script_dir, user)
+            os.makedirs(script_dir, exist_ok=True)
+        paths = workout_core.data_paths(script_dir)
+        self.data_file = paths["data_file"]
+        self.archive_folder = paths["archive_folder"]
+        self.reports_folder = paths["reports_folder"]
+        self.metrics_file = paths["metrics_file"]
         self.setup_folders()
+        self.store = workout_core.open_store(script_dir)
+        self.summary_cache = SummaryCache(paths["summary_file"], self.store)
+        self.goals = GoalTracker(paths["goals_file"], self.store)
+        self.checkpoint = SessionCheckpoint(paths["checkpoint_file"])
+        self.workout_index = WorkoutIndex(self.store)
+        self.notes_index = NotesIndex(paths["notes_index_folder"], self.store, self.archive_folder)
+        self.notes_index.compact()
+        self.report_cache = ReportCache(paths["report_cache_folder"])
+        threading.Thread(target=self.warm_index, name="index-warmup", daemon=True).start()
+        
+        # Saves are written by a background worker (shared by all athletes in a gym)
+        if gym is not None:
+            self.writer = gym.attach(user, self.write_batch)
+        else:
+            self.writer = WriteBehindQueue(self.write_batch)
+        self.writer_job = None
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_app)
         
         # Create menu bar
         self.create_menu()
@@ -108,15 +141,29 @@ class WorkoutTimer:
         # Display total workouts this month
         self.summary_label = tk.Label(root, text="", font=("Arial", 10))
         self.summary_label.pack(pady=5)
+        
+        # Progress towards the goals (Tools > Goals...)
+        self.goals_label = tk.Label(root, text="", font=("Arial", 9), fg="purple", wraplength=480)
+        self.goals_label.pack()
         self.update_summary()
         
-        # Timer threads
-        self.main_timer_thread = None
-        self.exercise_timer_thread = None
-        self.rest_timer_thread = None
+        # One main-thread loop redraws the timer labels
+        self.render_loop = RenderLoop(
+            root, self.read_clock,
+            [self.main_timer_label, self.exercise_display, self.rest_display],
+            is_running=lambda: (self.clock.main.running
+                                or (self.program is not None and self.program.paused_at is None)),
+            next_due=self.program_due)
         
         # Track start time
         self.workout_start_time = None
+        
+        # Running interval program (switches exercise/rest by itself)
+        self.program = None
+        self.program_status = None
+        
+        # Offer to bring back a workout the app didn't get to save
+        self.recover_session()
     
     def setup_folders(self):
         """Create necessary folders if they don't exist"""
@@ -136,51 +183,222 @@ class WorkoutTimer:
         file_menu.add_command(label="View Current Data", command=self.view_current_data)
         file_menu.add_command(label="View Reports", command=self.view_reports)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Exit", command=self.exit_app)
         
         # Tools menu
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Tools", menu=tools_menu)
         tools_menu.add_command(label="Quick Save Workout", command=self.quick_save_workout)
+        tools_menu.add_command(label="Interval Program...", command=self.start_program)
+        tools_menu.add_command(label="Search Notes", command=self.search_notes)
+        tools_menu.add_command(label="Goals...", command=self.show_goals)
         tools_menu.add_command(label="Generate Test Report", command=self.generate_test_report)
+        tools_menu.add_command(label="Display Stats", command=self.show_display_stats)
+        tools_menu.add_command(label="Save Queue Stats", command=self.show_save_queue_stats)
+        tools_menu.add_command(label="Checkpoint Stats", command=self.show_checkpoint_stats)
+        tools_menu.add_command(label="Diagnostics...", command=self.show_diagnostics)
+    
+    def show_display_stats(self):
+        """Show frame cost and skipped redraws of the timer display loop"""
+        messagebox.showinfo("Display Stats", self.render_loop.stats_text())
+    
+    def show_save_queue_stats(self):
+        """Show queue depth and commit latency of the background saves"""
+        messagebox.showinfo("Save Queue Stats", self.writer.stats_text())
+    
+    def show_checkpoint_stats(self):
+        """Show how often and how fast the live session is checkpointed"""
+        messagebox.showinfo("Checkpoint Stats", self.checkpoint.stats_text())
+    
+    def show_diagnostics(self):
+        """p50/p99 per operation and the counters, with export to a file"""
+        diagnostics_window = tk.Toplevel(self.root)
+        diagnostics_window.title("Diagnostics")
+        diagnostics_window.geometry("560x420")
+        
+        collecting = tk.BooleanVar(value=metrics.enabled)
+        tk.Checkbutton(diagnostics_window, text="Collect metrics (a little slower)", variable=collecting,
+                       command=lambda: metrics.enable(collecting.get())).pack(anchor="w", padx=10, pady=5)
+        
+        table = tk.Text(diagnostics_window, font=("Courier", 9), wrap="none")
+        table.pack(fill="both", expand=True, padx=10)
+        
+        def refresh():
+            lines = [f"{'operation':28s} {'count':>7s} {'p50 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}"]
+            for name, count, p50, p99, most in metrics.latency_table():
+                lines.append(f"{name:28s} {count:7d} {p50 * 1000:9.2f} {p99 * 1000:9.2f} {most * 1000:9.2f}")
+            counters = metrics.snapshot()["counters"]
+            if counters:
+                lines.append("")
+                lines += [f"{name:28s} {value:7d}" for name, value in counters.items()]
+            if len(lines) == 1 and not metrics.enabled:
+                lines.append("Nothing collected yet - tick the box above, then use the timer.")
+            table.config(state="normal")
+            table.delete("1.0", tk.END)
+            table.insert(tk.END, "\n".join(lines))
+            table.config(state="disabled")
+        
+        def export(path):
+            try:
+                metrics.write(path)
+                messagebox.showinfo("Diagnostics", f"Written to:\n{path}", parent=diagnostics_window)
+            except OSError as e:
+                messagebox.showerror("Diagnostics", f"Failed to write: {e}", parent=diagnostics_window)
+        
+        buttons = tk.Frame(diagnostics_window)
+        buttons.pack(pady=10)
+        tk.Button(buttons, text="Refresh", width=10, command=refresh).grid(row=0, column=0, padx=4)
+        tk.Button(buttons, text="Export Prometheus", width=15,
+                  command=lambda: export(self.metrics_file)).grid(row=0, column=1, padx=4)
+        tk.Button(buttons, text="Export JSON", width=11,
+                  command=lambda: export(os.path.splitext(self.metrics_file)[0] + ".json")).grid(row=0, column=2, padx=4)
+        tk.Button(buttons, text="Close", width=8, command=diagnostics_window.destroy).grid(row=0, column=3, padx=4)
+        refresh()
+    
+    def clock_lock(self):
+        """The running program's lock (its thread switches the clock), else nothing"""
+        program = self.program
+        return program.lock if program is not None else nullcontext()
+    
+    def read_clock(self):
+        """Timer values for the display; checkpoints every few seconds while running"""
+        with self.clock_lock():
+            if self.clock.main.running:
+                self.checkpoint.maybe_write(self.clock, self.workout_start_time)
+            seconds = self.clock.seconds()
+        if self.program is not None:
+            self.show_program()
+        return seconds
+    
+    def recover_session(self):
+        """Resume, save or discard a session left in the checkpoint file"""
+        session = self.checkpoint.read()
+        if session is None:
+            return
+        
+        start = datetime.fromtimestamp(session["start_time"])
+        duration = session["main_ns"] // 1_000_000_000
+        answer = messagebox.askyesnocancel(
+            "Recover Workout",
+            f"A workout from {start.strftime('%Y-%m-%d %H:%M')} was not saved "
+            f"({duration // 3600}h {duration % 3600 // 60:02d}m).\n\n"
+            f"Yes: resume it\nNo: save it now\nCancel: discard it")
+        if answer is None:
+            self.checkpoint.clear()
+            return
+        
+        self.clock.restore(session["main_ns"], session["exercise_ns"], session["rest_ns"])
+        self.workout_start_time = start
+        if answer:
+            # Back to where it was, paused
+            self.render_loop.wake()
+            self.save_button.config(state="normal")
+            self.status_label.config(text="Status: Recovered (paused)")
+        else:
+            self.save_workout()
+    
+    def warm_index(self):
+        """Build the data browser's index in the background after startup"""
+        try:
+            self.workout_index.refresh()
+        except Exception:
+            # View Current Data tries again and reports the error
+            pass
+    
+    def write_batch(self, workouts):
+        """Runs on the writer thread: store a batch, keep summary, goals and index current
+        
+        Only a failed store write raises a plain error (the queue tries it
+        again). Once the workouts are stored, problems with the summary,
+        goals, indexes or compacting the log are collected into one
+        AfterSaveError; each of them is done again later.
+        """
+        generation = self.store.generation()
+        in_current = self.store.in_current(workouts)
+        problems = []
+        try:
+            self.summary_cache.append_many(workouts)
+        except AfterSaveError as e:
+            problems.append(str(e))
+        updates = [("goals", lambda: self.goals.observe(workouts, generation))]
+        # Saves to another month leave the indexes of this month to rebuild
+        if in_current:
+            updates.append(("data index", lambda: self.workout_index.extend(workouts, generation)))
+            updates.append(("notes index", lambda: self.notes_index.extend(workouts, generation)))
+        # Fold a long log into the snapshot here rather than on the window's thread
+        if self.store.needs_compaction():
+            updates.append(("log compaction", self.store.compact))
+        for name, update in updates:
+            try:
+                update()
+            except Exception as e:
+                problems.append(f"{name} not updated: {e}")
+        if problems:
+            raise AfterSaveError("; ".join(problems))
+    
+    def show_write_failures(self):
+        """Tell the user about batches the writer gave up on or only half finished"""
+        for workouts, error in self.writer.take_failures():
+            if isinstance(error, AfterSaveError):
+                messagebox.showwarning("Warning", f"{len(workouts)} workout(s) saved, but: {error}")
+            else:
+                messagebox.showerror("Error", f"Could not save {len(workouts)} workout(s): {error}")
     
-    def update_main_timer(self):
-        """Update main timer display"""
-        while self.main_running:
-            time.sleep(1)
-            self.main_seconds += 1
-            mins, secs = divmod(self.main_seconds, 60)
-            self.main_timer_label.config(text=f"{mins:02d}:{secs:02d}")
-    
-    def update_exercise_timer(self):
-        """Update exercise timer display"""
-        while self.exercise_running:
-            time.sleep(1)
-            self.exercise_seconds += 1
-            mins, secs = divmod(self.exercise_seconds, 60)
-            self.exercise_display.config(text=f"{mins:02d}:{secs:02d}")
-    
-    def update_rest_timer(self):
-        """Update rest timer display"""
-        while self.rest_running:
-            time.sleep(1)
-            self.rest_seconds += 1
-            mins, secs = divmod(self.rest_seconds, 60)
-            self.rest_display.config(text=f"{mins:02d}:{secs:02d}")
+    def watch_writer(self):
+        """Refresh the summary once queued saves are written, report failures"""
+        self.writer_job = None
+        self.show_write_failures()
+        
+        if self.writer.pending():
+            self.writer_job = self.root.after(50, self.watch_writer)
+        else:
+            self.update_summary()
+    
+    def exit_app(self):
+        """Finish writing queued saves, then quit"""
+        if not self.writer.flush(timeout=10):
+            if not messagebox.askyesno("Exit", "Workouts are still being saved.\nExit anyway?"):
+                return
+        self.writer.shutdown(timeout=1)
+        self.show_write_failures()
+        
+        # An unsaved workout is offered again next time
+        if self.workout_start_time is not None:
+            with self.clock_lock():
+                self.checkpoint.write(self.clock, self.workout_start_time)
+        self.checkpoint.close()
+        self.report_cache.close()
+        self.stop_program()
+        self.render_loop.stop()
+        if self.writer_job is not None:
+            self.root.after_cancel(self.writer_job)
+            self.writer_job = None
+        if self.gym is not None:
+            # Only this athlete's window closes
+            self.gym.detach(self.user)
+            self.root.destroy()
+        else:
+            self.root.quit()
     
     def start_main_timer(self):
         """Start the main timer"""
-        if not self.main_running:
-            self.main_running = True
-            self.workout_start_time = datetime.now()
+        if not self.clock.main.running:
+            if self.program is not None:
+                # Resumes the interrupted phase too
+                self.program.resume()
+            else:
+                self.clock.start()
+            if self.workout_start_time is None:
+                self.workout_start_time = datetime.now()
+            self.checkpoint.write(self.clock, self.workout_start_time)
             
-            # Start main timer thread
-            self.main_timer_thread = threading.Thread(target=self.update_main_timer, daemon=True)
-            self.main_timer_thread.start()
+            # Redraw the displays while running
+            self.render_loop.wake()
             
-            # Enable exercise/rest buttons and save button
-            self.exercise_button.config(state="normal")
-            self.rest_button.config(state="normal")
+            # Enable exercise/rest buttons (unless a program switches them) and save button
+            manual = "disabled" if self.program is not None else "normal"
+            self.exercise_button.config(state=manual)
+            self.rest_button.config(state=manual)
             self.save_button.config(state="normal")
             self.start_button.config(state="disabled")
             self.pause_button.config(state="normal")
@@ -188,14 +406,14 @@ class WorkoutTimer:
     
     def pause_main_timer(self):
         """Pause the main timer"""
-        if self.main_running:
-            self.main_running = False
-            
-            # Also pause exercise/rest timers
-            if self.exercise_running:
-                self.exercise_running = False
-            if self.rest_running:
-                self.rest_running = False
+        if self.clock.main.running:
+            # Also pauses exercise/rest timers
+            if self.program is not None:
+                self.program.pause()
+            else:
+                self.clock.pause()
+            self.checkpoint.write(self.clock, self.workout_start_time)
+            self.render_loop.wake()
             
             # Update button states
             self.start_button.config(state="normal")
@@ -206,20 +424,14 @@ class WorkoutTimer:
     
     def reset_all(self):
         """Reset all timers"""
-        self.main_running = False
-        self.exercise_running = False
-        self.rest_running = False
-        
         # Reset all times
-        self.main_seconds = 0
-        self.exercise_seconds = 0
-        self.rest_seconds = 0
+        self.stop_program()
+        self.clock.reset()
         self.workout_start_time = None
+        self.checkpoint.clear()
         
         # Reset all displays
-        self.main_timer_label.config(text="00:00")
-        self.exercise_display.config(text="00:00")
-        self.rest_display.config(text="00:00")
+        self.render_loop.wake()
         
         # Reset button states
         self.exercise_button.config(state="disabled")
@@ -234,15 +446,10 @@ class WorkoutTimer:
     
     def start_exercise(self):
         """Start exercise timer"""
-        if self.main_running and not self.exercise_running:
-            # Stop rest timer if running
-            if self.rest_running:
-                self.rest_running = False
-            
-            # Start exercise timer
-            self.exercise_running = True
-            self.exercise_timer_thread = threading.Thread(target=self.update_exercise_timer, daemon=True)
-            self.exercise_timer_thread.start()
+        if self.clock.main.running and not self.clock.exercise.running:
+            # Stops the rest timer and starts exercise at the same instant
+            self.clock.start_exercise()
+            self.checkpoint.write(self.clock, self.workout_start_time)
             
             # Update button states
             self.exercise_button.config(state="disabled")
@@ -251,78 +458,118 @@ class WorkoutTimer:
     
     def start_rest(self):
         """Start rest timer"""
-        if self.main_running and not self.rest_running:
-            # Stop exercise timer if running
-            if self.exercise_running:
-                self.exercise_running = False
-            
-            # Start rest timer
-            self.rest_running = True
-            self.rest_timer_thread = threading.Thread(target=self.update_rest_timer, daemon=True)
-            self.rest_timer_thread.start()
+        if self.clock.main.running and not self.clock.rest.running:
+            # Stops the exercise timer and starts rest at the same instant
+            self.clock.start_rest()
+            self.checkpoint.write(self.clock, self.workout_start_time)
             
             # Update button states
             self.exercise_button.config(state="normal")
             self.rest_button.config(state="disabled")
             self.status_label.config(text="Status: Resting")
     
+    def start_program(self):
+        """Run an interval program that switches exercise/rest by itself"""
+        text = simpledialog.askstring("Interval Program",
+                                      "Program:\n\n"
+                                      "  tabata\n"
+                                      "  emom 10   (emom 10 45 for 45 s work a minute)\n"
+                                      "  3x(5x(30w,15r),60r)   (w = work, r = rest, seconds)",
+                                      initialvalue="tabata")
+        if not text:
+            return
+        try:
+            phases = expand(parse_program(text))
+        except ValueError as e:
+            messagebox.showerror("Error", f"Could not read the program: {e}")
+            return
+        if not phases:
+            messagebox.showerror("Error", "The program has no phases.")
+            return
+        
+        self.stop_program()
+        if self.workout_start_time is None:
+            self.workout_start_time = datetime.now()
+        self.program = IntervalRunner(self.clock, phases)
+        self.program.start()
+        self.checkpoint.write(self.clock, self.workout_start_time)
+        self.render_loop.wake()
+        
+        # The program switches exercise/rest now
+        self.exercise_button.config(state="disabled")
+        self.rest_button.config(state="disabled")
+        self.save_button.config(state="normal")
+        self.start_button.config(state="disabled")
+        self.pause_button.config(state="normal")
+        self.status_label.config(text=f"Status: Program started ({describe(phases)})")
+    
+    def stop_program(self):
+        if self.program is not None:
+            self.program.stop()
+            self.program = None
+            self.program_status = None
+    
+    def program_due(self):
+        """Nanoseconds to the program's next phase switch, so its cue is drawn on time"""
+        program = self.program
+        return program.ns_to_switch() if program is not None else None
+    
+    def show_program(self):
+        """Per frame while a program runs: cues and the phase countdown"""
+        for kind, phase, _ in self.program.take_cues():
+            self.root.bell()
+            if kind == "done":
+                self.program = None
+                self.program_status = None
+                self.start_button.config(state="normal")
+                self.pause_button.config(state="disabled")
+                self.status_label.config(text="Status: Program finished - save your workout")
+                return
+        
+        phase, left = self.program.phase_left()
+        if phase is None:
+            return
+        status = f"Status: {phase.kind.upper()} {left}s"
+        if phase.label:
+            status += f" (round {phase.label})"
+        if status != self.program_status:
+            self.status_label.config(text=status)
+            self.program_status = status
+    
+    @metrics.timed("ui.save_workout")
     def save_workout(self):
         """Save current workout to JSON file"""
         if not self.workout_start_time:
             messagebox.showerror("Error", "No workout to save!")
             return
         
-        # Calculate workout duration in hours
-        total_seconds = self.main_seconds
-        total_hours = total_seconds / 3600.0
-        
-        # Calculate exercise time
-        exercise_hours = self.exercise_seconds / 3600.0
+        # Stop the clock and calculate workout duration
+        self.stop_program()
+        total_seconds, exercise_seconds, rest_seconds = self.clock.finish()
         
         # Get notes
         notes = self.notes_entry.get("1.0", tk.END).strip()
         
         # Create workout data
-        workout_date = self.workout_start_time.date().isoformat()
-        start_time = self.workout_start_time.strftime("%H:%M:%S")
-        
-        workout_data = {
-            "date": workout_date,
-            "start_time": start_time,
-            "total_duration_hours": round(total_hours, 2),
-            "exercise_duration_hours": round(exercise_hours, 2),
-            "total_seconds": total_seconds,
-            "exercise_seconds": self.exercise_seconds,
-            "notes": notes,
-            "saved_at": datetime.now().isoformat()
-        }
-        
-        # Load existing data
-        try:
-            with open(self.data_file, 'r') as f:
-                data = json.load(f)
-        except FileNotFoundError:
-            data = {"workouts": []}
-        except json.JSONDecodeError:
-            data = {"workouts": []}
-        
-        # Add new workout
-        data["workouts"].append(workout_data)
+        workout_data = workout_core.build_workout(self.workout_start_time, total_seconds,
+                                                  exercise_seconds, notes,
+                                                  events=self.clock.events.encode(),
+                                                  user=self.user)
         
-        # Save to file
-        with open(self.data_file, 'w') as f:
-            json.dump(data, f, indent=4)
+        # Hand it to the background writer
+        self.writer.submit(workout_data)
         
         # Show success message
         messagebox.showinfo("Workout Saved", 
                            f"Workout saved!\n"
-                           f"Date: {workout_date}\n"
-                           f"Time: {start_time}\n"
-                           f"Duration: {round(total_hours, 2)} hours\n"
-                           f"Exercise time: {round(exercise_hours, 2)} hours")
+                           f"Date: {workout_data['date']}\n"
+                           f"Time: {workout_data['start_time']}\n"
+                           f"Duration: {workout_data['total_duration_hours']} hours\n"
+                           f"Exercise time: {workout_data['exercise_duration_hours']} hours")
         
-        # Update summary
-        self.update_summary()
+        # Update summary once it is written
+        if self.writer_job is None:
+            self.watch_writer()
         
         # Reset timers for next workout
         self.reset_all()
@@ -335,153 +582,80 @@ class WorkoutTimer:
                 notes = ""
             
             # Create workout data
-            now = datetime.now()
-            workout_data = {
-                "date": now.date().isoformat(),
-                "start_time": now.strftime("%H:%M:%S"),
-                "total_duration_hours": 0,
-                "exercise_duration_hours": 0,
-                "total_seconds": 0,
-                "exercise_seconds": 0,
-                "notes": notes,
-                "saved_at": now.isoformat(),
-                "manual_save": True
-            }
+            workout_data = workout_core.build_manual_workout(datetime.now(), notes, user=self.user)
             
-            # Load existing data
-            try:
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-            except FileNotFoundError:
-                data = {"workouts": []}
-            except json.JSONDecodeError:
-                data = {"workouts": []}
-            
-            # Add new workout
-            data["workouts"].append(workout_data)
-            
-            # Save to file
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=4)
+            # Hand it to the background writer
+            self.writer.submit(workout_data)
             
             messagebox.showinfo("Saved", "Workout manually saved!")
-            self.update_summary()
+            if self.writer_job is None:
+                self.watch_writer()
     
     def generate_monthly_report(self):
-        """Generate monthly report and reset data"""
-        if not os.path.exists(self.data_file):
+        """Generate a report for one month (the data itself is kept)"""
+        # Reports must include every queued save
+        self.writer.flush()
+        months = self.store.months()
+        if not months:
             messagebox.showwarning("No Data", "No workout data found to generate report!")
             return
         
+        # Ask which month, this month by default
+        month = simpledialog.askstring("Monthly Report",
+                                       f"Month to report (YYYY-MM):\n\n"
+                                       f"Months with workouts: {', '.join(months[-12:])}",
+                                       initialvalue=self.store.current_month)
+        if not month:
+            return
+        month = month.strip()
+        
         try:
-            # Load current data
-            with open(self.data_file, 'r') as f:
-                data = json.load(f)
-            
-            if "workouts" not in data or len(data["workouts"]) == 0:
-                messagebox.showwarning("No Data", "No workouts found to generate report!")
-                return
-            
-            # Get current month and year for report name
+            report_month = datetime.strptime(month, "%Y-%m").strftime("%B_%Y")
+        except ValueError:
+            messagebox.showerror("Error", f"'{month}' is not a month like 2025-03")
+            return
+        if month not in months:
+            messagebox.showwarning("No Data", f"No workouts found for {month}!")
+            return
+        
+        try:
+            partition = self.store.partition(month)
             now = datetime.now()
-            report_month = now.strftime("%B_%Y")
             
-            # Create report content
-            report_content = self.create_report_content(data, report_month)
-            
-            # Save report to file
+            # Stream the report to file straight from the month's partition
             report_filename = f"workout_report_{report_month}.txt"
             report_path = os.path.join(self.reports_folder, report_filename)
             
-            with open(report_path, 'w') as f:
-                f.write(report_content)
-            
-            # Archive current data
-            archive_filename = f"workout_data_{report_month}.json"
-            archive_path = os.path.join(self.archive_folder, archive_filename)
+            workout_core.write_store_report(partition, report_path, report_month,
+                                            analytics=analytics.available(),
+                                            cache=self.report_cache)
             
-            # Add metadata to archived data
-            data["archived_at"] = now.isoformat()
-            data["report_generated"] = True
-            
-            with open(archive_path, 'w') as f:
-                json.dump(data, f, indent=4)
-            
-            # Clear current data file
-            with open(self.data_file, 'w') as f:
-                json.dump({"workouts": [], "last_report": report_month}, f, indent=4)
+            # Finished months are also copied to the compact archive the
+            # command line tools and notes search read
+            archive_note = ""
+            if month < self.store.current_month:
+                archive_filename = f"workout_data_{month}.wka"
+                archive_path = os.path.join(self.archive_folder, archive_filename)
+                workout_core.archive_store(partition, archive_path,
+                                           {"archived_at": now.isoformat(), "report_generated": True})
+                self.store.note_archived(archive_path)
+                self.notes_index.add_archive(archive_path)
+                archive_note = f"Data archived to: {archive_path}\n"
             
             # Show success message
             messagebox.showinfo("Report Generated", 
                               f"Monthly report created!\n\n"
                               f"Report saved to: {report_path}\n"
-                              f"Data archived to: {archive_path}\n\n"
-                              f"Data has been reset for next month.")
-            
-            # Update summary
-            self.update_summary()
+                              f"{archive_note}\n"
+                              f"Your workout data is kept.")
             
             # Show report preview
-            self.show_report_preview(report_content)
-            
+            with open(report_path, 'r') as f:
+                self.show_report_preview(f.read())
+                
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate report: {str(e)}")
     
-    def create_report_content(self, data, report_month):
-        """Create formatted report content"""
-        now = datetime.now()
-        workouts = data.get("workouts", [])
-        
-        # Sort workouts by date
-        workouts.sort(key=lambda x: x.get("date", ""))
-        
-        # Calculate statistics
-        total_hours = sum(w.get("total_duration_hours", 0) for w in workouts)
-        exercise_hours = sum(w.get("exercise_duration_hours", 0) for w in workouts)
-        total_workouts = len(workouts)
-        
-        # Create report header
-        report = "=" * 60 + "\n"
-        report += f"MONTHLY WORKOUT REPORT - {report_month.replace('_', ' ')}\n"
-        report += f"Generated: {now.strftime('%Y-%m-%d %H:%M:%S')}\n"
-        report += "=" * 60 + "\n\n"
-        
-        # Add summary statistics
-        report += "SUMMARY STATISTICS:\n"
-        report += "-" * 30 + "\n"
-        report += f"Total workouts this month: {total_workouts}\n"
-        report += f"Total time trained: {total_hours:.2f} hours\n"
-        report += f"Total exercise time: {exercise_hours:.2f} hours\n"
-        if total_workouts > 0:
-            report += f"Average per workout: {total_hours/total_workouts:.2f} hours\n"
-        report += "\n"
-        
-        # Add detailed workout list
-        report += "DETAILED WORKOUT LOG:\n"
-        report += "-" * 60 + "\n"
-        
-        for i, workout in enumerate(workouts, 1):
-            date_str = workout.get("date", "Unknown")
-            start_time = workout.get("start_time", "Unknown")
-            duration = workout.get("total_duration_hours", 0)
-            exercise = workout.get("exercise_duration_hours", 0)
-            notes = workout.get("notes", "")
-            manual = workout.get("manual_save", False)
-            
-            report += f"\n{i}. {date_str} at {start_time}\n"
-            report += f"   Total duration: {duration:.2f} hours\n"
-            report += f"   Exercise time: {exercise:.2f} hours\n"
-            if manual:
-                report += f"   [MANUAL ENTRY]\n"
-            if notes:
-                report += f"   Notes: {notes}\n"
-        
-        report += "\n" + "=" * 60 + "\n"
-        report += "End of Report\n"
-        report += "=" * 60
-        
-        return report
-    
     def show_report_preview(self, report_content):
         """Show a preview of the generated report"""
         preview_window = tk.Toplevel(self.root)
@@ -507,19 +681,19 @@ class WorkoutTimer:
         tk.Button(preview_window, text="Close", 
                  command=preview_window.destroy).pack(pady=10)
     
+    @metrics.timed("ui.update_summary")
     def update_summary(self):
         """Update the summary label with current month's data"""
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                
-                workouts = data.get("workouts", [])
-                total_workouts = len(workouts)
+            # A new month has no partition yet, but earlier months may
+            if self.store.exists() or self.store.months():
+                # Running totals, only recounted when the data changed
+                totals = self.summary_cache.summary()
+                total_workouts = totals["count"]
                 
                 if total_workouts > 0:
-                    total_hours = sum(w.get("total_duration_hours", 0) for w in workouts)
-                    month = datetime.now().strftime("%B")
+                    total_hours = totals["total_hours"]
+                    month = datetime.strptime(self.store.current_month, "%Y-%m").strftime("%B")
                     
                     self.summary_label.config(
                         text=f"This month ({month}): {total_workouts} workouts, {total_hours:.1f} total hours",
@@ -537,37 +711,101 @@ class WorkoutTimer:
                 )
         except:
             self.summary_label.config(text="Error loading data", fg="red")
+        
+        try:
+            self.goals_label.config(text=self.goals.summary_text())
+        except Exception as e:
+            self.goals_label.config(text=f"Goals unavailable: {e}")
+    
+    def show_goals(self):
+        """List the goals with their progress; add and remove goals"""
+        self.writer.flush()
+        goals_window = tk.Toplevel(self.root)
+        goals_window.title("Goals")
+        goals_window.geometry("450x350")
+        
+        listbox = tk.Listbox(goals_window, font=("Arial", 10))
+        listbox.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        def refresh():
+            listbox.delete(0, tk.END)
+            for goal, done, target in self.goals.progress():
+                mark = "  reached!" if done >= target else ""
+                listbox.insert(tk.END, goal.text(done, target) + mark)
+            self.update_summary()
+        
+        def add():
+            text = simpledialog.askstring("Add Goal",
+                                          "e.g. 12 workouts per month, 15 exercise hours per month,\n"
+                                          "3 hours per week, 4 week streak, 30 day streak:",
+                                          parent=goals_window)
+            if not text:
+                return
+            try:
+                self.goals.add_goal(parse_goal(text))
+            except ValueError as e:
+                messagebox.showerror("Add Goal", str(e), parent=goals_window)
+                return
+            refresh()
+        
+        def remove():
+            selection = listbox.curselection()
+            if selection:
+                self.goals.remove_goal(self.goals.goals[selection[0]].name)
+                refresh()
+        
+        buttons = tk.Frame(goals_window)
+        buttons.pack(pady=10)
+        tk.Button(buttons, text="Add Goal", width=12, command=add).grid(row=0, column=0, padx=5)
+        tk.Button(buttons, text="Remove", width=12, command=remove).grid(row=0, column=1, padx=5)
+        tk.Button(buttons, text="Close", width=12, command=goals_window.destroy).grid(row=0, column=2, padx=5)
+        refresh()
     
     def view_current_data(self):
-        """View current workout data"""
+        """Browse current workout data"""
+        self.writer.flush()
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                
-                # Create a simple display
-                display_text = "Current Workout Data:\n" + "="*40 + "\n\n"
-                
-                if "workouts" in data and len(data["workouts"]) > 0:
-                    for i, workout in enumerate(data["workouts"], 1):
-                        display_text += f"{i}. {workout['date']} at {workout['start_time']}\n"
-                        display_text += f"   Duration: {workout['total_duration_hours']:.2f} hours\n"
-                        if workout.get('notes'):
-                            display_text += f"   Notes: {workout['notes']}\n"
-                        display_text += "\n"
-                    
-                    total = len(data["workouts"])
-                    display_text += f"Total workouts: {total}\n"
-                else:
-                    display_text += "No workouts saved yet.\n"
-                
-                # Show in messagebox
-                messagebox.showinfo("Current Data", display_text)
-            else:
-                messagebox.showinfo("Current Data", "No workout data file found.")
+            # Only reads the store if it changed since the last time
+            self.workout_index.refresh()
+            if len(self.workout_index) == 0:
+                messagebox.showinfo("Current Data", "No workouts saved yet.")
+                return
+            DataBrowser(self.root, self.workout_index)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load data: {str(e)}")
     
+    def search_notes(self):
+        """Find workouts by words in their notes, archived months included"""
+        query = simpledialog.askstring("Search Notes",
+                                       "Words to look for (a year like 2025 or a month\n"
+                                       "like 2025-03 narrows the dates):")
+        if not query:
+            return
+        self.writer.flush()
+        try:
+            hits = self.notes_index.search(query)
+        except Exception as e:
+            messagebox.showerror("Error", f"Search failed: {str(e)}")
+            return
+        
+        lines = [f"{len(hits)} workouts found for \"{query}\"", ""]
+        for day, start_time, notes, source in hits[:1000]:
+            where = "" if source == "current" else f"  [{source}]"
+            lines.append(f"{day} {start_time}{where}: {notes}")
+        if len(hits) > 1000:
+            lines.append(f"... and {len(hits) - 1000} more")
+        
+        results_window = tk.Toplevel(self.root)
+        results_window.title("Search Notes")
+        results_window.geometry("600x400")
+        scrollbar = tk.Scrollbar(results_window)
+        scrollbar.pack(side="right", fill="y")
+        text_widget = tk.Text(results_window, wrap="word", yscrollcommand=scrollbar.set)
+        text_widget.pack(side="left", fill="both", expand=True)
+        text_widget.insert("1.0", "\n".join(lines))
+        text_widget.config(state="disabled")
+        scrollbar.config(command=text_widget.yview)
+    
     def view_reports(self):
         """View existing reports"""
         try:
@@ -576,7 +814,8 @@ class WorkoutTimer:
                 reports_list = "\n".join(reports)
                 messagebox.showinfo("Available Reports", 
                                   f"Reports found:\n\n{reports_list}\n\n"
-                                  f"Reports are saved in the '{self.reports_folder}' folder.")
+                                  f"Reports are saved in the '{self.reports_folder}' folder.\n\n"
+                                  f"{self.report_cache.stats_text()}")
             else:
                 messagebox.showinfo("Available Reports", 
                                   f"No reports found yet.\n"
@@ -619,14 +858,12 @@ class WorkoutTimer:
                 ]
             }
             
-            # Create test report
+            # Create and save test report (served from the cache when unchanged)
             report_month = "Test_Report"
-            report_content = self.create_report_content(sample_data, report_month)
-            
-            # Save test report
             report_path = os.path.join(self.reports_folder, f"TEST_report.txt")
-            with open(report_path, 'w') as f:
-                f.write(report_content)
+            workouts = sorted(sample_data["workouts"], key=workout_core.workout_sort_key)
+            workout_core.write_cached_report(report_path, report_month, lambda: workouts,
+                                             cache=self.report_cache)
             
             messagebox.showinfo("Test Report", 
                               f"Test report created at:\n{report_path}\n\n"
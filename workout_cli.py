@@ -0,0 +1,258 @@
+"""Headless command line mode, no tkinter needed.
+
+Rebuild the monthly reports from the archive folder, e.g. from cron:
+    
+    python -m workout_cli reports --from 2024-01 --to 2024-12
+
+Slow-to-import modules are imported inside the functions that use them;
+benchmarks/bench_import_time.py checks the import stays fast.
+"""
+import os
+import sys
+import time
+
+import workout_core
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def render_archive(archive_path, reports_folder, analytics=False):
+    """Write the report for one archived month (runs in a worker process)"""
+    from archive_format import ArchiveReader, archive_name, iter_archive
+    started = time.perf_counter()
+    report_month = archive_name(archive_path)
+    report_path = os.path.join(reports_folder, f"workout_report_{report_month}.txt")
+    
+    with open(report_path, 'w') as f:
+        if archive_path.endswith(".wka"):
+            # .wka archives are written date-sorted, so they stream straight through
+            with ArchiveReader(archive_path) as reader:
+                stats = workout_core.write_report(f, reader, report_month, analytics=analytics)
+        else:
+            workouts = sorted(iter_archive(archive_path), key=workout_core.workout_sort_key)
+            stats = workout_core.write_report(f, workouts, report_month, analytics=analytics)
+    return report_path, stats, time.perf_counter() - started
+
+
+def command_reports(args):
+    from concurrent.futures import ProcessPoolExecutor
+    from archive_format import archive_name
+    from report_cache import ReportCache, report_key
+    
+    archives = workout_core.find_archives(args.archive, args.first_month, args.last_month)
+    if not archives:
+        print("No archived months found in that range.")
+        return 1
+    os.makedirs(args.reports, exist_ok=True)
+    
+    started = time.perf_counter()
+    cache = None if args.no_cache else ReportCache(args.cache)
+    total_workouts = 0
+    keys = {}
+    misses = []
+    for month, path in archives:
+        # Unchanged months are served from the cache; only the rest are rendered
+        if cache is not None:
+            report_month = archive_name(path)
+            keys[path] = report_key(cache.hash_file(path), report_month, args.analytics)
+            report_path = os.path.join(args.reports, f"workout_report_{report_month}.txt")
+            stats = cache.get(keys[path], report_path)
+            if stats is not None:
+                total_workouts += stats.total_workouts
+                print(f"{month}  {stats.total_workouts:8d} workouts      cached  {report_path}")
+                continue
+        misses.append((month, path))
+    
+    if misses:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(render_archive, path, args.reports, args.analytics)
+                       for _, path in misses]
+            for (month, path), future in zip(misses, futures):
+                report_path, stats, seconds = future.result()
+                total_workouts += stats.total_workouts
+                if cache is not None:
+                    cache.put(keys[path], report_path, stats)
+                print(f"{month}  {stats.total_workouts:8d} workouts  {seconds * 1000:8.1f} ms  {report_path}")
+    if cache is not None:
+        cache.close()
+    elapsed = time.perf_counter() - started
+    
+    print(f"{len(archives)} reports ({len(archives) - len(misses)} cached), "
+          f"{total_workouts} workouts in {elapsed:.2f} s")
+    return 0
+
+
+def command_stats(args):
+    import json
+    from analytics import ColumnBuilder, analyze, concat_columns
+    from archive_format import ArchiveReader, iter_archive
+    
+    started = time.perf_counter()
+    parts = []
+    builder = ColumnBuilder()
+    for _, path in workout_core.find_archives(args.archive, args.first_month, args.last_month):
+        if path.endswith(".wka"):
+            # Mapped straight from the file, no parsing
+            parts.append(ArchiveReader(path).columns())
+        else:
+            for workout in iter_archive(path):
+                builder.add(workout)
+    parts.append(builder.columns())
+    loaded = time.perf_counter()
+    result = analyze(concat_columns(parts))
+    done = time.perf_counter()
+    
+    print(json.dumps(result, indent=2))
+    print(f"loaded in {loaded - started:.2f} s, analysed in {(done - loaded) * 1000:.1f} ms",
+          file=sys.stderr)
+    return 0
+
+
+def command_search(args):
+    from notes_index import NotesIndex
+    
+    paths = workout_core.data_paths(SCRIPT_DIR)
+    index = NotesIndex(paths["notes_index_folder"], workout_core.open_store(SCRIPT_DIR), args.archive)
+    started = time.perf_counter()
+    hits = index.search(" ".join(args.query))
+    elapsed = time.perf_counter() - started
+    
+    for day, start_time, notes, source in hits:
+        print(f"{day} {start_time}  {source:15s} {notes}")
+    print(f"{len(hits)} workouts in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+def command_leaderboard(args):
+    board = workout_core.leaderboard(args.base, args.month, args.metric)
+    if not board:
+        print("No athletes yet.")
+        return 1
+    for place, (user, totals) in enumerate(board, 1):
+        print(f"{place:3d}. {user:20s} {totals['count']:5d} workouts  {totals['total_hours']:8.1f} hours")
+    return 0
+
+
+def data_folder(args):
+    """The data folder of --base, or of one athlete with --user"""
+    base_dir = workout_core.user_dir(args.base, args.user) if args.user else args.base
+    os.makedirs(base_dir, exist_ok=True)
+    return base_dir
+
+
+def command_serve(args):
+    from workout_server import run
+    
+    run(data_folder(args), args.host, args.port, args.backend)
+    return 0
+
+
+def command_import(args):
+    from bulk_io import import_file
+    
+    store = workout_core.open_store(data_folder(args), args.backend)
+    
+    def progress(stats):
+        print(f"\r{stats.rows} rows, {stats.rows_per_second} rows/s", end="", file=sys.stderr)
+    
+    stats = import_file(store, args.file, args.format, args.workers, progress=progress)
+    print(file=sys.stderr)
+    for line, message in stats.errors:
+        print(f"line {line}: {message}")
+    if stats.invalid > len(stats.errors):
+        print(f"... and {stats.invalid - len(stats.errors)} more invalid rows")
+    print(stats)
+    return 0 if not stats.invalid else 2
+
+
+def command_export(args):
+    from bulk_io import export_file
+    
+    base_dir = data_folder(args)
+    store = workout_core.open_store(base_dir, args.backend)
+    archive = None if args.no_archive else workout_core.data_paths(base_dir)["archive_folder"]
+    count, seconds = export_file(store, args.file, args.format, archive, args.first_month,
+                                 args.last_month)
+    print(f"{count} workouts written to {args.file} in {seconds:.2f} s "
+          f"({round(count / seconds) if seconds else 0} workouts/s)")
+    return 0
+
+
+def main(argv=None):
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="workout_cli", description="Workout tracker without the GUI")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="collect timings and write them to FILE on exit (.json, else Prometheus text)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    reports = commands.add_parser("reports", help="rebuild monthly reports from the archive")
+    reports.add_argument("--from", dest="first_month", help="first month, YYYY-MM")
+    reports.add_argument("--to", dest="last_month", help="last month, YYYY-MM")
+    reports.add_argument("--archive", default=os.path.join(SCRIPT_DIR, "archive"))
+    reports.add_argument("--reports", default=os.path.join(SCRIPT_DIR, "reports"))
+    reports.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    reports.add_argument("--analytics", action="store_true", help="add the NumPy statistics section")
+    reports.add_argument("--cache", default=workout_core.data_paths(SCRIPT_DIR)["report_cache_folder"],
+                         help="report cache folder")
+    reports.add_argument("--no-cache", action="store_true", help="render every report again")
+    reports.set_defaults(func=command_reports)
+    
+    stats = commands.add_parser("stats", help="statistics over every archived month (needs NumPy)")
+    stats.add_argument("--from", dest="first_month", help="first month, YYYY-MM")
+    stats.add_argument("--to", dest="last_month", help="last month, YYYY-MM")
+    stats.add_argument("--archive", default=os.path.join(SCRIPT_DIR, "archive"))
+    stats.set_defaults(func=command_stats)
+    
+    search = commands.add_parser("search", help="find workouts by their notes, e.g. squat 2025")
+    search.add_argument("query", nargs="+", help="words (prefixes work) and optionally a year or YYYY-MM")
+    search.add_argument("--archive", default=os.path.join(SCRIPT_DIR, "archive"))
+    search.set_defaults(func=command_search)
+    
+    leaderboard = commands.add_parser("leaderboard", help="rank the gym's athletes for a month")
+    leaderboard.add_argument("--month", help="YYYY-MM (default: this month)")
+    leaderboard.add_argument("--metric", default="total_hours",
+                             choices=["total_hours", "count", "total_seconds", "exercise_seconds"])
+    leaderboard.add_argument("--base", default=SCRIPT_DIR, help="folder holding users/")
+    leaderboard.set_defaults(func=command_leaderboard)
+    
+    serve = commands.add_parser("serve", help="local HTTP/JSON API (see workout_server.py)")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    serve.add_argument("--base", default=SCRIPT_DIR, help="data folder")
+    serve.add_argument("--user", help="serve this athlete's data (users/<name>/)")
+    serve.add_argument("--backend", choices=["json", "sqlite"], help="default: WORKOUT_BACKEND or json")
+    serve.set_defaults(func=command_serve)
+    
+    import_ = commands.add_parser("import", help="add workouts from a CSV or JSON Lines file")
+    import_.add_argument("file")
+    import_.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    import_.add_argument("--workers", type=int, default=None,
+                         help="parsing processes (default: CPU count, 0: parse in this process)")
+    export = commands.add_parser("export", help="write workouts to a CSV or JSON Lines file")
+    export.add_argument("file")
+    export.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    export.add_argument("--from", dest="first_month", help="first month, YYYY-MM")
+    export.add_argument("--to", dest="last_month", help="last month, YYYY-MM")
+    export.add_argument("--no-archive", action="store_true", help="leave out the archived months")
+    for command in (import_, export):
+        command.add_argument("--base", default=SCRIPT_DIR, help="data folder")
+        command.add_argument("--user", help="this athlete's data (users/<name>/)")
+        command.add_argument("--backend", choices=["json", "sqlite"],
+                             help="default: WORKOUT_BACKEND or json")
+    import_.set_defaults(func=command_import)
+    export.set_defaults(func=command_export)
+    
+    args = parser.parse_args(argv)
+    if not args.metrics:
+        return args.func(args)
+    import metrics
+    metrics.enable()
+    try:
+        return args.func(args)
+    finally:
+        metrics.write(args.metrics)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+"""Workout data and report logic without any GUI.
+
+Everything the Tk window does with data goes through here, so it can be
+used from scripts, the command line or benchmarks without a display.
+Storage and report modules are only imported when first used, which
+keeps `import workout_core` down to a few milliseconds.
+"""
+import os
+
+# Names served from other modules on first access
+_LAZY = {
+    "WorkoutStore": "workout_store",
+    "SQLiteStore": "sqlite_store",
+    "SummaryCache": "summary_cache",
+    "merge_runs": "report_writer",
+    "workout_sort_key": "report_writer",
+    "write_report": "report_writer",
+    "ReportStats": "report_writer",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def data_paths(base_dir):
+    """Where the data file, archive and reports live"""
+    return {
+        "data_file": os.path.join(base_dir, "workout_data.json"),
+        "partitions_folder": os.path.join(base_dir, "data"),
+        "db_file": os.path.join(base_dir, "workout_data.db"),
+        "summary_file": os.path.join(base_dir, "workout_summary.json"),
+        "goals_file": os.path.join(base_dir, "goals.json"),
+        "checkpoint_file": os.path.join(base_dir, "workout_session.chk"),
+        "notes_index_folder": os.path.join(base_dir, "notes_index"),
+        "report_cache_folder": os.path.join(base_dir, "report_cache"),
+        "archive_folder": os.path.join(base_dir, "archive"),
+        "reports_folder": os.path.join(base_dir, "reports"),
+        "metrics_file": os.path.join(base_dir, "workout_metrics.prom"),
+    }
+
+
+def user_dir(base_dir, user):
+    """Folder holding one athlete's data, reports and caches"""
+    safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in user.strip())
+    return os.path.join(base_dir, "users", safe_name)
+
+
+def list_users(base_dir):
+    """Athletes that have a folder under users/, sorted"""
+    users_folder = os.path.join(base_dir, "users")
+    if not os.path.isdir(users_folder):
+        return []
+    return sorted(name for name in os.listdir(users_folder)
+                  if os.path.isdir(os.path.join(users_folder, name)))
+
+
+def leaderboard(base_dir, month=None, metric="total_hours"):
+    """Athletes ranked by their totals for a month (default: this month)
+    
+    Each athlete's small summary file is used when its totals for the
+    month match that month's partition; otherwise (a month the window
+    hasn't counted, or one changed since) just that partition is read.
+    The athletes' windows may be saving meanwhile, so nothing is opened
+    for writing (see read_month). Returns (user, totals) pairs, best first.
+    """
+    import json
+    from datetime import datetime
+    from summary_cache import add_to_totals, empty_totals
+    if month is None:
+        month = datetime.now().strftime("%Y-%m")
+    board = []
+    for user in list_users(base_dir):
+        folder = user_dir(base_dir, user)
+        try:
+            with open(data_paths(folder)["summary_file"], 'r') as f:
+                summary = json.load(f)
+        except (FileNotFoundError, ValueError):
+            summary = {}
+        totals = summary.get("months", {}).get(month)
+        generation, read = read_month(folder, month)
+        if totals is None or generation is None or summary.get("month_generations", {}).get(month) != generation:
+            totals = empty_totals()
+            for workout in read():
+                add_to_totals(totals, workout)
+        board.append((user, totals))
+    board.sort(key=lambda entry: entry[1].get(metric, 0), reverse=True)
+    return board
+
+
+def read_month(base_dir, month, backend=None):
+    """(generation, read) for one month's workouts, without opening the store
+    
+    Unlike open_store this never recovers a log, splits an old data file
+    or migrates to SQLite, so it is safe while another process writes.
+    read() returns the month's workouts; generation matches that
+    partition's generation() and is None when there is nothing to match.
+    """
+    from partitioned_store import month_of, partition_path
+    from workout_store import log_path, read_workouts, store_generation
+    paths = data_paths(base_dir)
+    if backend is None:
+        backend = os.environ.get("WORKOUT_BACKEND", "json")
+    if backend.lower() == "sqlite" and os.path.exists(paths["db_file"]):
+        from sqlite_store import read_month as read_db_month
+        generation, workouts = read_db_month(paths["db_file"], month)
+        return generation, lambda: workouts
+    path = partition_path(paths["partitions_folder"], month)
+    if os.path.exists(path) or os.path.exists(log_path(path)):
+        return store_generation(path), lambda: read_workouts(path)
+    # Not split into partitions yet (or not yet migrated to SQLite)
+    data_file = paths["data_file"]
+    if os.path.exists(data_file) or os.path.exists(log_path(data_file)):
+        return None, lambda: [workout for workout in read_workouts(data_file)
+                              if month_of(workout) == month]
+    return None, lambda: []
+
+
+def open_store(base_dir, backend=None):
+    """Open the storage backend ("json" or "sqlite", default from WORKOUT_BACKEND)
+    
+    Either way the workouts are partitioned by month (see partitioned_store).
+    """
+    from partitioned_store import PartitionedStore, open_json_partitions
+    paths = data_paths(base_dir)
+    if backend is None:
+        backend = os.environ.get("WORKOUT_BACKEND", "json")
+    if backend.lower() == "sqlite":
+        from sqlite_store import SQLiteMonth, SQLiteStore
+        store = SQLiteStore(paths["db_file"])
+        # First run: bring in the existing JSON data and archives
+        store.migrate_json(paths["data_file"], paths["archive_folder"], paths["partitions_folder"])
+        return PartitionedStore(lambda month: SQLiteMonth(store, month), store.months(),
+                                on_archive=store.mark_migrated)
+    
+    # A single workout_data.json from before is split up on first run
+    return open_json_partitions(paths["data_file"], paths["partitions_folder"])
+
+
+def archive_month(path):
+    """'archive/workout_data_2025-03.wka' -> '2025-03' (None if not a month)
+    
+    Older archives are named like workout_data_March_2025.json after the
+    month the report was made in; they give that month too.
+    """
+    from datetime import datetime
+    name = os.path.splitext(os.path.basename(path))[0][len("workout_data_"):]
+    for form in ("%Y-%m", "%B_%Y"):
+        try:
+            return datetime.strptime(name, form).strftime("%Y-%m")
+        except ValueError:
+            pass
+    return None
+
+
+def is_month_archive(path):
+    """True for workout_data_2025-03.wka: exactly that month's workouts
+    
+    The older workout_data_March_2025.json archives hold whatever was
+    saved since the report before, which can be several earlier months.
+    """
+    name = os.path.splitext(os.path.basename(path))[0][len("workout_data_"):]
+    return archive_month(path) == name
+
+
+def find_archives(archive_folder, first_month=None, last_month=None):
+    """Archive files that can hold workouts of first_month..last_month, oldest first
+    
+    When an archive exists both as .json and as compact .wka (converted
+    by archive_format.py), the .wka is used. An older archive named after
+    a later month than last_month is still returned, as it can hold
+    earlier months.
+    """
+    found = {}
+    for name in sorted(os.listdir(archive_folder)):
+        base, extension = os.path.splitext(name)
+        if not (base.startswith("workout_data_") and extension in (".json", ".wka")):
+            continue
+        path = os.path.join(archive_folder, name)
+        month = archive_month(path)
+        if month is None:
+            continue
+        if first_month and month < first_month:
+            continue
+        if last_month and month > last_month and is_month_archive(path):
+            continue
+        if base not in found or extension == ".wka":
+            found[base] = (month, path)
+    return sorted(found.values())
+
+
+def build_workout(start, total_seconds, exercise_seconds, notes, saved_at=None, events=None,
+                  user=None):
+    """The dict save_workout stores for a timed workout
+    
+    events is the encoded exercise/rest/pause stream from segment_events;
+    user is the athlete's name when several share the app.
+    """
+    from datetime import datetime
+    if saved_at is None:
+        saved_at = datetime.now()
+    workout = {
+        "date": start.date().isoformat(),
+        "start_time": start.strftime("%H:%M:%S"),
+        "total_duration_hours": round(total_seconds / 3600.0, 2),
+        "exercise_duration_hours": round(exercise_seconds / 3600.0, 2),
+        "total_seconds": total_seconds,
+        "exercise_seconds": exercise_seconds,
+        "notes": notes,
+        "saved_at": saved_at.isoformat()
+    }
+    if events:
+        workout["events"] = events
+    if user:
+        workout["user"] = user
+    return workout
+
+
+def build_manual_workout(now, notes, user=None):
+    """The dict quick_save_workout stores (no timing)"""
+    workout = {
+        "date": now.date().isoformat(),
+        "start_time": now.strftime("%H:%M:%S"),
+        "total_duration_hours": 0,
+        "exercise_duration_hours": 0,
+        "total_seconds": 0,
+        "exercise_seconds": 0,
+        "notes": notes,
+        "saved_at": now.isoformat(),
+        "manual_save": True
+    }
+    if user:
+        workout["user"] = user
+    return workout
+
+
+def workout_key(workout):
+    """What tells saved workouts apart: date, start time and saved_at"""
+    return (workout.get("date", ""), workout.get("start_time"), workout.get("saved_at"))
+
+
+def workout_seconds(workout):
+    """(total, exercise) seconds, worked out from the hours for old entries"""
+    total_seconds = workout.get("total_seconds")
+    if total_seconds is None:
+        total_seconds = round((workout.get("total_duration_hours", 0) or 0) * 3600)
+    exercise_seconds = workout.get("exercise_seconds")
+    if exercise_seconds is None:
+        exercise_seconds = round((workout.get("exercise_duration_hours", 0) or 0) * 3600)
+    return total_seconds, exercise_seconds
+
+
+def archive_store(store, archive_path, meta):
+    """Write everything in the store to a compact .wka archive, date-sorted"""
+    from archive_format import write_archive
+    from report_writer import merge_runs
+    return write_archive(archive_path, merge_runs(store.sorted_runs()), meta)
+
+
+def write_cached_report(report_path, report_month, get_workouts, analytics=False, cache=None):
+    """Write a report for get_workouts() (date-sorted) to report_path
+    
+    get_workouts is called for a fresh iterable each time it is needed.
+    With a ReportCache the workouts are hashed first and a report already
+    rendered from the same workouts is served from the cache instead.
+    """
+    import metrics
+    from report_writer import write_report
+    if cache is not None:
+        from report_cache import hash_workouts, report_key
+        with metrics.span("report.hash"):
+            key = report_key(hash_workouts(get_workouts()), report_month, analytics)
+        stats = cache.get(key, report_path)
+        if stats is not None:
+            metrics.inc("report.cache_hits")
+            return stats
+        metrics.inc("report.cache_misses")
+    
+    with metrics.span("report.write"), open(report_path, 'w') as f:
+        stats = write_report(f, get_workouts(), report_month, analytics=analytics)
+    if cache is not None:
+        cache.put(key, report_path, stats)
+    return stats
+
+
+def write_store_report(store, report_path, report_month, analytics=False, cache=None):
+    """Stream a report for everything in the store to report_path"""
+    from report_writer import merge_runs
+    return write_cached_report(report_path, report_month,
+                               lambda: merge_runs(store.sorted_runs()), analytics, cache)
@@ -0,0 +1,138 @@
+import bisect
+import sys
+import threading
+from array import array
+
+from notes_index import words
+from workout_core import workout_seconds
+
+# Sortable columns of the data browser
+COLUMNS = ("date", "start_time", "total_seconds", "exercise_seconds", "notes")
+
+
+class WorkoutIndex:
+    """Compact columns of the current workouts for browsing and searching
+    
+    Built in one pass over the store and then kept up to date with
+    extend(), so the data browser never re-reads the store. Rows are kept
+    in save order; sort orders are permutations of row numbers worked out
+    once per column, and search looks words up in a word -> rows table
+    instead of scanning the notes.
+    """
+    
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.RLock()
+        self.generation = None
+        self._clear()
+    
+    def _clear(self):
+        self.dates = []
+        self.start_times = []
+        self.total_seconds = array('i')
+        self.exercise_seconds = array('i')
+        self.notes = []
+        self.postings = {}          # word -> array of row numbers
+        self.vocabulary = None      # sorted words, built on the first search
+        self.orders = {}            # column -> rows sorted by that column
+        self.known_notes = {}       # note text -> (shared copy, its words); notes repeat a lot
+    
+    def __len__(self):
+        return len(self.dates)
+    
+    def refresh(self):
+        """Rebuild if the store changed in a way extend() didn't see"""
+        with self.lock:
+            if self.generation != self.store.generation():
+                self._clear()
+                for workout in self.store.iter_workouts():
+                    self._add(workout)
+                self.generation = self.store.generation()
+    
+    def extend(self, workouts, generation_before):
+        """Add just-saved workouts if the index was current before the save"""
+        with self.lock:
+            if self.generation != generation_before:
+                return
+            for workout in workouts:
+                self._add(workout)
+            self.generation = self.store.generation()
+    
+    def _add(self, workout):
+        row = len(self.dates)
+        day = sys.intern(workout.get("date", ""))
+        total_seconds, exercise_seconds = workout_seconds(workout)
+        notes = workout.get("notes", "") or ""
+        known = self.known_notes.get(notes)
+        if known is None:
+            known = self.known_notes[notes] = (notes, tuple(set(words(notes))))
+        notes, note_words = known
+        self.dates.append(day)
+        self.start_times.append(sys.intern(workout.get("start_time", "") or ""))
+        self.total_seconds.append(total_seconds)
+        self.exercise_seconds.append(exercise_seconds)
+        self.notes.append(notes)
+        
+        # Dates are searchable too, so "2025-03" finds a month
+        for word in note_words + (day,):
+            rows = self.postings.get(word)
+            if rows is None:
+                rows = self.postings[word] = array('i')
+                self.vocabulary = None
+            rows.append(row)
+        self.orders.clear()
+    
+    def _column(self, column):
+        if column == "date":
+            # Same-day workouts by start time
+            return lambda row: (self.dates[row], self.start_times[row])
+        if column == "notes":
+            return lambda row: self.notes[row].lower()
+        return getattr(self, column).__getitem__
+    
+    def order(self, column):
+        """Row numbers sorted by a column, worked out once per column"""
+        with self.lock:
+            rows = self.orders.get(column)
+            if rows is None:
+                rows = array('i', sorted(range(len(self.dates)), key=self._column(column)))
+                self.orders[column] = rows
+            return rows
+    
+    def search(self, query):
+        """Rows having every query word as a prefix of one of their words"""
+        with self.lock:
+            if self.vocabulary is None:
+                self.vocabulary = sorted(self.postings)
+            found = None
+            for term in words(query):
+                matches = set()
+                i = bisect.bisect_left(self.vocabulary, term)
+                while i < len(self.vocabulary) and self.vocabulary[i].startswith(term):
+                    matches.update(self.postings[self.vocabulary[i]])
+                    i += 1
+                found = matches if found is None else found & matches
+                if not found:
+                    return []
+            return sorted(found) if found is not None else list(range(len(self.dates)))
+    
+    def sorted_rows(self, column, descending=False, query=""):
+        """Rows to show: all or the search hits, ordered by a column"""
+        if not query.strip():
+            rows = self.order(column)
+        else:
+            hits = self.search(query)
+            if len(hits) * 8 > len(self.dates):
+                # Many hits: filtering the cached order beats sorting them
+                wanted = set(hits)
+                rows = [row for row in self.order(column) if row in wanted]
+            else:
+                rows = sorted(hits, key=self._column(column))
+        if descending:
+            rows = rows[::-1]
+        return rows
+    
+    def row(self, row):
+        """(date, start time, total seconds, exercise seconds, notes) of one row"""
+        return (self.dates[row], self.start_times[row], self.total_seconds[row],
+                self.exercise_seconds[row], self.notes[row])
@@ -0,0 +1,279 @@
+"""Compact stand-in for the stored workout dicts.
+
+A stored workout is a dict of eight to ten string keys with float hours
+next to integer seconds, and the store used to hand out a fresh one for
+every workout on every read. Workout keeps just the values in __slots__:
+the date, start time and user are interned (a month has only ~30
+different dates), saved_at is an integer of microseconds and the hours
+are worked out from the integer seconds when asked for. The events
+string of a timed save gets a slot too. It still reads like the
+dict (workout.get("notes"), workout["date"], "user" in workout), so the
+report, summary and index code takes either, and to_dict() gives back
+exactly the dict it came from.
+"""
+import json
+import sys
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Which keys the original dict had
+HAS_DATE = 1
+HAS_START = 2
+HAS_TOTAL_HOURS = 4
+HAS_EXERCISE_HOURS = 8
+HAS_TOTAL_SECONDS = 16
+HAS_EXERCISE_SECONDS = 32
+HAS_NOTES = 64
+HAS_SAVED_AT = 128
+MANUAL = 256
+HAS_EVENTS = 512
+HAS_USER = 1024
+# Not keys: the hours were written as ints (quick saves store 0)
+INT_TOTAL_HOURS = 2048
+INT_EXERCISE_HOURS = 4096
+
+# Key order of build_workout / build_manual_workout, with the flag and the
+# slot of each key
+FIELDS = (("date", HAS_DATE, "date"), ("start_time", HAS_START, "start_time"),
+          ("total_duration_hours", HAS_TOTAL_HOURS, None),
+          ("exercise_duration_hours", HAS_EXERCISE_HOURS, None),
+          ("total_seconds", HAS_TOTAL_SECONDS, "total_seconds"),
+          ("exercise_seconds", HAS_EXERCISE_SECONDS, "exercise_seconds"),
+          ("notes", HAS_NOTES, "notes"), ("saved_at", HAS_SAVED_AT, None),
+          ("manual_save", MANUAL, None), ("events", HAS_EVENTS, "events"),
+          ("user", HAS_USER, "user"))
+CORE_KEYS = frozenset(key for key, _, _ in FIELDS)
+KEY_FLAGS = sum(flag for _, flag, _ in FIELDS)
+SAVED_KEYS = tuple(key for key, _, _ in FIELDS[:8])
+SAVED_FLAGS = HAS_DATE | HAS_START | HAS_TOTAL_SECONDS | HAS_EXERCISE_SECONDS | \
+    HAS_NOTES | HAS_SAVED_AT
+# The keys save_workout and quick_save_workout write after SAVED_KEYS
+LAYOUTS = {(): 0, ("events",): HAS_EVENTS, ("user",): HAS_USER,
+           ("events", "user"): HAS_EVENTS | HAS_USER,
+           ("manual_save",): MANUAL, ("manual_save", "user"): MANUAL | HAS_USER}
+_FIELD = {key: (flag, slot) for key, flag, slot in FIELDS}
+_MISSING = object()
+_HOURS = {}
+
+
+def hours(seconds):
+    """Seconds as the rounded hours save_workout writes"""
+    # round() is slow and workouts come in a few thousand lengths
+    value = _HOURS.get(seconds)
+    if value is None:
+        value = round(seconds / 3600.0, 2)
+        if len(_HOURS) < 100000:
+            _HOURS[seconds] = value
+    return value
+
+
+def hours_flags(value, seconds, flag, int_flag):
+    """flag if value is the hours of seconds as save_workout writes them,
+    plus int_flag if it was written as an int; 0 if it can't be rebuilt"""
+    if type(value) is float:
+        return flag if value == hours(seconds) else 0
+    if type(value) is int:
+        return flag | int_flag if value == hours(seconds) else 0
+    return 0
+
+
+def pack_saved_at(text):
+    """'2025-03-01T18:04:05.123456' -> microseconds since 1970, or None"""
+    # Only the two forms isoformat() writes, so formatting gives the text back
+    if type(text) is not str or len(text) not in (19, 26) or text[10] != "T":
+        return None
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if moment.tzinfo is not None or (len(text) == 19) != (moment.microsecond == 0):
+        return None
+    since = moment - EPOCH
+    return (since.days * 86400 + since.seconds) * 1000000 + since.microseconds
+
+
+def unpack_saved_at(micros):
+    return (EPOCH + micros * MICROSECOND).isoformat()
+
+
+class Workout(Mapping):
+    """One stored workout, read-only, with the dict's keys"""
+    
+    __slots__ = ("date", "start_time", "total_seconds", "exercise_seconds", "notes",
+                 "saved_at", "events", "user", "flags", "extra")
+    
+    @classmethod
+    def from_dict(cls, workout):
+        """Decode a workout dict in the stored JSON layout"""
+        self = cls.__new__(cls)
+        keys = tuple(workout)
+        layout = LAYOUTS.get(keys[8:]) if keys[:8] == SAVED_KEYS else None
+        if layout is not None:
+            # What save_workout writes: take the values as they are
+            values = tuple(workout.values())
+            date, start_time, total_hours, exercise_hours, total_seconds, \
+                exercise_seconds, notes, saved_at = values[:8]
+            micros = pack_saved_at(saved_at)
+            if (type(date) is str and type(start_time) is str and type(total_seconds) is int
+                    and type(exercise_seconds) is int and type(notes) is str
+                    and micros is not None):
+                flags = SAVED_FLAGS | layout \
+                    | hours_flags(total_hours, total_seconds, HAS_TOTAL_HOURS, INT_TOTAL_HOURS) \
+                    | hours_flags(exercise_hours, exercise_seconds, HAS_EXERCISE_HOURS,
+                                  INT_EXERCISE_HOURS)
+                events = workout.get("events") if layout & HAS_EVENTS else None
+                user = workout.get("user") if layout & HAS_USER else None
+                if (flags & HAS_TOTAL_HOURS and flags & HAS_EXERCISE_HOURS
+                        and (not layout & MANUAL or workout["manual_save"] is True)
+                        and (events is None or type(events) is str)
+                        and (user is None or type(user) is str)):
+                    self.date = sys.intern(date)
+                    self.start_time = sys.intern(start_time)
+                    self.total_seconds = total_seconds
+                    self.exercise_seconds = exercise_seconds
+                    self.notes = notes
+                    self.saved_at = micros
+                    self.events = events
+                    self.user = user if user is None else sys.intern(user)
+                    self.flags = flags
+                    self.extra = None
+                    return self
+        self._decode(workout)
+        return self
+    
+    def _decode(self, workout):
+        """Any other layout (older saves, hand-edited files, extra keys)
+        
+        Whatever the slots can't give back exactly goes into `extra`.
+        """
+        flags = 0
+        extra = {}
+        self.date = self.start_time = self.saved_at = self.events = self.user = None
+        self.notes = ""
+        for key in ("date", "start_time", "notes", "events", "user"):
+            value = workout.get(key, _MISSING)
+            if type(value) is str:
+                setattr(self, key, value if key in ("notes", "events") else sys.intern(value))
+                flags |= _FIELD[key][0]
+            elif value is not _MISSING:
+                extra[key] = value
+        
+        # Seconds are the source of truth; older saves only had hours
+        for seconds_key, hours_key, int_flag in (
+                ("total_seconds", "total_duration_hours", INT_TOTAL_HOURS),
+                ("exercise_seconds", "exercise_duration_hours", INT_EXERCISE_HOURS)):
+            seconds = workout.get(seconds_key, _MISSING)
+            if type(seconds) is int:
+                flags |= _FIELD[seconds_key][0]
+            else:
+                if seconds is not _MISSING:
+                    extra[seconds_key] = seconds
+                hours_value = workout.get(hours_key)
+                seconds = round(hours_value * 3600) if type(hours_value) in (int, float) else 0
+            setattr(self, seconds_key, seconds)
+            hours_value = workout.get(hours_key, _MISSING)
+            hours_flag = hours_flags(hours_value, seconds, _FIELD[hours_key][0], int_flag)
+            if hours_flag:
+                flags |= hours_flag
+            elif hours_value is not _MISSING:
+                extra[hours_key] = hours_value
+        
+        saved_at = workout.get("saved_at", _MISSING)
+        if saved_at is not _MISSING:
+            self.saved_at = pack_saved_at(saved_at)
+            if self.saved_at is None:
+                extra["saved_at"] = saved_at
+            else:
+                flags |= HAS_SAVED_AT
+        manual = workout.get("manual_save", _MISSING)
+        if manual is True:
+            flags |= MANUAL
+        elif manual is not _MISSING:
+            extra["manual_save"] = manual
+        
+        for key, value in workout.items():
+            if key not in CORE_KEYS:
+                extra[key] = value
+        self.flags = flags
+        self.extra = extra or None
+    
+    def get(self, key, default=None):
+        field = _FIELD.get(key)
+        extra = self.extra
+        if field is None or extra is not None and key in extra:
+            return default if extra is None else extra.get(key, default)
+        flag, slot = field
+        if not self.flags & flag:
+            return default
+        if slot is not None:
+            return getattr(self, slot)
+        if flag == HAS_TOTAL_HOURS:
+            value = hours(self.total_seconds)
+            return int(value) if self.flags & INT_TOTAL_HOURS else value
+        if flag == HAS_EXERCISE_HOURS:
+            value = hours(self.exercise_seconds)
+            return int(value) if self.flags & INT_EXERCISE_HOURS else value
+        if flag == HAS_SAVED_AT:
+            return unpack_saved_at(self.saved_at)
+        return True
+    
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def __contains__(self, key):
+        field = _FIELD.get(key)
+        if field is not None and self.flags & field[0]:
+            return True
+        return self.extra is not None and key in self.extra
+    
+    def __iter__(self):
+        flags = self.flags
+        extra = self.extra or {}
+        for key, flag, _ in FIELDS:
+            if flags & flag or key in extra:
+                yield key
+        for key in extra:
+            if key not in CORE_KEYS:
+                yield key
+    
+    def __len__(self):
+        # A key is either flagged or kept in extra, never both
+        return bin(self.flags & KEY_FLAGS).count("1") + len(self.extra or ())
+    
+    def to_dict(self):
+        """The workout as the dict it was decoded from"""
+        return {key: self[key] for key in self}
+    
+    def __repr__(self):
+        return f"Workout({self.to_dict()!r})"
+
+
+def as_dict(workout):
+    """A plain dict for json.dumps, whichever of the two it is"""
+    return workout if type(workout) is dict else workout.to_dict()
+
+
+def _record_hook(value):
+    # Workouts are the objects with a date; the top level has "workouts"
+    if "date" in value and "workouts" not in value:
+        return Workout.from_dict(value)
+    return value
+
+
+def load_records(f):
+    """json.load() that turns each workout into a Workout as soon as it is read
+    
+    The dicts are dropped one by one, so only the records are kept.
+    """
+    return json.load(f, object_hook=_record_hook)
+
+
+def decode(line):
+    """One JSON line of the log as a Workout"""
+    return Workout.from_dict(json.loads(line))
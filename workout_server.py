@@ -0,0 +1,477 @@
+"""Local HTTP/JSON API over the workout data, for dashboards and scripts.
+    
+    python -m workout_cli serve --port 8765
+    
+    POST /workouts               record workouts: one object or a list of
+                                 {"start", "total_seconds", "exercise_seconds", "notes"}
+    GET  /workouts?from=&to=     workouts between two dates (YYYY-MM-DD or YYYY-MM),
+                                 streamed month by month
+    GET  /summary?from=&to=      totals per month (default: this month)
+    GET  /months                 months that have workouts
+    GET  /reports/<YYYY-MM>      render that month's report and return its text
+    GET  /metrics                request, store and save timings in the Prometheus
+                                 text format (collected once enabled, see metrics.py)
+    GET  /status                 the save queue's counters and the saves that failed
+                                 after their POST was answered (the last FAILURES_KEPT)
+
+Runs on one asyncio event loop with HTTP/1.1 keep-alive. Saves go through
+a WriteBehindQueue like in the window, so concurrent POSTs share one disk
+write; every read waits for queued saves first. Store reads run on one
+worker thread so the loop keeps serving other connections meanwhile; a
+lock keeps them from reading a log the writer is appending to or
+compacting. Streamed responses are chunked, or for HTTP/1.0 clients sent
+until the connection closes.
+A POST is answered once its workouts are queued, so a save that fails
+later is printed to stderr and listed by /status.
+Don't point the server and the window at the same data folder at once.
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import metrics
+import workout_core
+from workout_record import as_dict
+
+MAX_BODY = 1024 * 1024
+IDLE_TIMEOUT = 30
+STREAM_CHUNK = 1000         # workouts per chunk of a streamed response
+FAILURES_KEPT = 100         # failed saves listed by /status
+REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    def __init__(self, method, target, headers, body, version="HTTP/1.1"):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = unquote(parts.path)
+        self.query = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+        # HTTP/1.0 has no chunked encoding: stream until the connection closes
+        self.chunked = version != "HTTP/1.0"
+        self.response_started = False   # headers sent, an error can't be sent any more
+        self.close_connection = False    # the body ends with the connection
+    
+    def json(self):
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError as e:
+            raise HTTPError(400, f"invalid JSON: {e}")
+
+
+def parse_date(text, last=False):
+    """'2025-03-14' as is, '2025-03' as its first (or last) day"""
+    try:
+        if len(text) == 7:
+            datetime.strptime(text, "%Y-%m")
+            return text + ("-31" if last else "-01")
+        datetime.strptime(text, "%Y-%m-%d")
+        return text
+    except ValueError:
+        raise HTTPError(400, f"'{text}' is not a date like 2025-03-14 or a month like 2025-03")
+
+
+def parse_month(text):
+    try:
+        datetime.strptime(text, "%Y-%m")
+    except ValueError:
+        raise HTTPError(400, f"'{text}' is not a month like 2025-03")
+    return text
+
+
+def workout_from_json(item, now):
+    """The dict save_workout would store, from a POSTed object"""
+    if not isinstance(item, dict):
+        raise HTTPError(400, "each workout must be a JSON object")
+    try:
+        start = datetime.fromisoformat(item["start"]) if item.get("start") else now
+        total_seconds = int(item.get("total_seconds", 0))
+        exercise_seconds = int(item.get("exercise_seconds", 0))
+    except (TypeError, ValueError) as e:
+        raise HTTPError(400, f"bad workout field: {e}")
+    if not 0 <= exercise_seconds <= total_seconds:
+        raise HTTPError(400, "need 0 <= exercise_seconds <= total_seconds")
+    notes = str(item.get("notes", "") or "")
+    if total_seconds == 0:
+        return workout_core.build_manual_workout(start, notes, user=item.get("user"))
+    return workout_core.build_workout(start, total_seconds, exercise_seconds, notes,
+                                      saved_at=now, user=item.get("user"))
+
+
+class WorkoutServer:
+    """The API over one data folder (the app's, or one athlete's)"""
+    
+    def __init__(self, base_dir, backend=None):
+        from report_cache import ReportCache
+        from summary_cache import SummaryCache
+        from write_behind import WriteBehindQueue
+        paths = workout_core.data_paths(base_dir)
+        self.reports_folder = paths["reports_folder"]
+        os.makedirs(self.reports_folder, exist_ok=True)
+        self.store = workout_core.open_store(base_dir, backend)
+        self.summary_cache = SummaryCache(paths["summary_file"], self.store)
+        self.report_cache = ReportCache(paths["report_cache_folder"])
+        # Saves (writer thread) and reads (store thread) take turns on the store
+        self.store_lock = threading.Lock()
+        self.writer = WriteBehindQueue(self.write_batch)
+        self.store_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="store")
+        self.month_totals = {}      # month -> (partition generation, totals)
+        self.save_failures = deque(maxlen=FAILURES_KEPT)
+        self.requests = 0
+        self.routes = {
+            ("POST", "/workouts"): self.post_workouts,
+            ("GET", "/workouts"): self.get_workouts,
+            ("GET", "/summary"): self.get_summary,
+            ("GET", "/months"): self.get_months,
+            ("GET", "/metrics"): self.get_metrics,
+            ("GET", "/status"): self.get_status,
+        }
+    
+    def write_batch(self, workouts):
+        """Writer thread: store a batch of POSTed workouts, compacting the log when it is long"""
+        from write_behind import AfterSaveError
+        with self.store_lock:
+            self.summary_cache.append_many(workouts)
+            if self.store.needs_compaction():
+                try:
+                    self.store.compact()
+                except OSError as e:
+                    raise AfterSaveError(f"log not compacted: {e}") from e
+    
+    def drain_failures(self):
+        """Print the saves the writer gave up on (or only half finished) and keep them for /status"""
+        from write_behind import AfterSaveError
+        for workouts, error in self.writer.take_failures():
+            stored = isinstance(error, AfterSaveError)
+            if stored:
+                print(f"{len(workouts)} workout(s) saved, but: {error}", file=sys.stderr, flush=True)
+            else:
+                print(f"Could not save {len(workouts)} workout(s): {error}", file=sys.stderr, flush=True)
+            self.save_failures.append({
+                "at": datetime.now().isoformat(timespec="seconds"),
+                "stored": stored,
+                "error": str(error),
+                "workouts": [as_dict(workout) for workout in workouts],
+            })
+    
+    async def watch_writer(self, interval=1.0):
+        """Drain the writer's failures while the server runs"""
+        while True:
+            await asyncio.sleep(interval)
+            self.drain_failures()
+    
+    def locked(self, func, *args):
+        with self.store_lock:
+            return func(*args)
+    
+    async def blocking(self, func, *args):
+        """Run store work on the store thread, never during a save"""
+        return await asyncio.get_running_loop().run_in_executor(self.store_thread, self.locked,
+                                                                func, *args)
+    
+    async def saved(self):
+        """Wait until every queued save is written (read-your-writes)"""
+        if self.writer.pending():
+            # Not through blocking(): the writer needs the store lock to finish
+            await asyncio.get_running_loop().run_in_executor(self.store_thread, self.writer.flush)
+    
+    # Connections
+    
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until it closes or goes idle"""
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.send_error(writer, HTTPError(400, "bad request line"), False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                
+                connection = headers.get("connection", "").lower()
+                if version == "HTTP/1.0":
+                    keep_alive = connection == "keep-alive"
+                else:
+                    keep_alive = connection != "close"
+                length = headers.get("content-length", "0")
+                if not length.isdigit():
+                    await self.send_error(writer, HTTPError(400, "bad Content-Length"), False)
+                    break
+                length = int(length)
+                if length > MAX_BODY:
+                    await self.send_error(writer, HTTPError(413, "request body too large"), False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                
+                self.requests += 1
+                request = Request(method, target, headers, body, version)
+                await self.dispatch(request, writer, keep_alive)
+                if not keep_alive or request.close_connection:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def dispatch(self, request, writer, keep_alive):
+        # Timed by hand: requests interleave on the loop, so no span stack here
+        started = time.perf_counter()
+        operation = "http.unknown"
+        try:
+            handler = self.routes.get((request.method, request.path))
+            if handler is None and request.path.startswith("/reports/"):
+                if request.method != "GET":
+                    raise HTTPError(405, "use GET")
+                handler = self.get_report
+            if handler is None:
+                if any(path == request.path for _, path in self.routes):
+                    raise HTTPError(405, f"{request.method} not allowed on {request.path}")
+                raise HTTPError(404, f"no such endpoint: {request.path}")
+            operation = "http." + handler.__name__
+            await handler(request, writer, keep_alive)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise
+        except Exception as e:
+            error = e if isinstance(e, HTTPError) else HTTPError(500, str(e))
+            metrics.inc(f"http.errors.{error.status}")
+            if request.response_started:
+                # A second status line would end up inside the body the
+                # client is reading; cutting the connection tells it the
+                # response is incomplete
+                writer.transport.abort()
+                raise ConnectionAbortedError(f"response failed part way: {error}") from e
+            await self.send_error(writer, error, keep_alive)
+        finally:
+            metrics.observe(operation, time.perf_counter() - started)
+    
+    # Responses
+    
+    def head(self, status, content_type, keep_alive, length=None, chunked=True):
+        """Status line and headers; without a length the body is chunked, or
+        (chunked=False) runs until the connection closes"""
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}",
+                 f"Content-Type: {content_type}",
+                 "Connection: " + ("keep-alive" if keep_alive else "close")]
+        if length is not None:
+            lines.append(f"Content-Length: {length}")
+        elif chunked:
+            lines.append("Transfer-Encoding: chunked")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    
+    def start_stream(self, request, writer, content_type, keep_alive):
+        """Send the headers of a streamed response"""
+        if not request.chunked:
+            keep_alive = False
+            request.close_connection = True
+        writer.write(self.head(200, content_type, keep_alive, chunked=request.chunked))
+        request.response_started = True
+    
+    async def send_json(self, writer, status, data, keep_alive):
+        body = json.dumps(data).encode()
+        writer.write(self.head(status, "application/json", keep_alive, len(body)) + body)
+        await writer.drain()
+    
+    async def send_error(self, writer, error, keep_alive):
+        await self.send_json(writer, error.status, {"error": str(error)}, keep_alive)
+    
+    async def send_chunk(self, request, writer, data):
+        if data:
+            if request.chunked:
+                data = f"{len(data):x}\r\n".encode() + data + b"\r\n"
+            writer.write(data)
+            await writer.drain()
+    
+    async def end_chunks(self, request, writer):
+        if request.chunked:
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()
+    
+    # Endpoints
+    
+    async def post_workouts(self, request, writer, keep_alive):
+        """Queue workouts for saving, like the Save Workout button"""
+        data = request.json()
+        items = data if isinstance(data, list) else [data]
+        now = datetime.now()
+        workouts = [workout_from_json(item, now) for item in items]
+        for workout in workouts:
+            self.writer.submit(workout)
+        await self.send_json(writer, 202, {"queued": len(workouts)}, keep_alive)
+    
+    def range_months(self, first_date, last_date):
+        """Months in the range that have workouts, plus the current one"""
+        months = sorted(set(self.store.months()) | {self.store.current_month})
+        return [month for month in months
+                if (not first_date or month >= first_date[:7])
+                and (not last_date or month <= last_date[:7])]
+    
+    def encode_month(self, month, first_date, last_date):
+        """Store thread: one month's matching workouts as JSON pieces, date-sorted"""
+        from report_writer import merge_runs
+        pieces = []
+        for workout in merge_runs(self.store.partition(month).sorted_runs()):
+            day = workout.get("date", "")
+            if (first_date and day < first_date) or (last_date and day > last_date):
+                continue
+            pieces.append(json.dumps(as_dict(workout)))
+        return pieces
+    
+    async def get_workouts(self, request, writer, keep_alive):
+        """Workouts in a date range, sent one month at a time (chunked)
+        
+        Only one month is held in memory, however wide the range.
+        """
+        first_date = parse_date(request.query["from"]) if "from" in request.query else None
+        last_date = parse_date(request.query["to"], last=True) if "to" in request.query else None
+        await self.saved()
+        months = await self.blocking(self.range_months, first_date, last_date)
+        
+        self.start_stream(request, writer, "application/json", keep_alive)
+        await self.send_chunk(request, writer, b'{"workouts": [')
+        count = 0
+        for month in months:
+            pieces = await self.blocking(self.encode_month, month, first_date, last_date)
+            for i in range(0, len(pieces), STREAM_CHUNK):
+                chunk = ", ".join(pieces[i:i + STREAM_CHUNK])
+                await self.send_chunk(request, writer, ((", " if count else "") + chunk).encode())
+                count += len(pieces[i:i + STREAM_CHUNK])
+        await self.send_chunk(request, writer, f'], "count": {count}}}'.encode())
+        await self.end_chunks(request, writer)
+    
+    def totals_for(self, month):
+        """Store thread: a month's totals, recounted only when its partition changed"""
+        from summary_cache import add_to_totals, empty_totals
+        if month == self.store.current_month:
+            return self.summary_cache.month(month)
+        partition = self.store.partition(month)
+        generation = partition.generation()
+        known = self.month_totals.get(month)
+        if known is None or known[0] != generation:
+            totals = empty_totals()
+            for workout in partition.iter_workouts():
+                add_to_totals(totals, workout)
+            known = self.month_totals[month] = (generation, totals)
+        return dict(known[1])
+    
+    def summary(self, first_month, last_month):
+        from summary_cache import empty_totals
+        months = {month: self.totals_for(month)
+                  for month in self.range_months(first_month, last_month)}
+        overall = empty_totals()
+        for totals in months.values():
+            for name in overall:
+                overall[name] += totals[name]
+        overall["total_hours"] = round(overall["total_hours"], 2)
+        return {"months": months, "totals": overall}
+    
+    async def get_summary(self, request, writer, keep_alive):
+        """Totals per month in from..to (default: just this month)"""
+        first_month = request.query.get("from")
+        last_month = request.query.get("to")
+        if first_month is None and last_month is None:
+            first_month = last_month = self.store.current_month
+        first_month = parse_month(first_month) if first_month else None
+        last_month = parse_month(last_month) if last_month else None
+        await self.saved()
+        data = await self.blocking(self.summary, first_month, last_month)
+        await self.send_json(writer, 200, data, keep_alive)
+    
+    async def get_months(self, request, writer, keep_alive):
+        await self.saved()
+        months = await self.blocking(self.store.months)
+        await self.send_json(writer, 200, {"months": months,
+                                           "current": self.store.current_month}, keep_alive)
+    
+    def render_report(self, month):
+        """Store thread: write a month's report file (cached) like the window does"""
+        import analytics
+        report_month = datetime.strptime(month, "%Y-%m").strftime("%B_%Y")
+        report_path = os.path.join(self.reports_folder, f"workout_report_{report_month}.txt")
+        workout_core.write_store_report(self.store.partition(month), report_path, report_month,
+                                        analytics=analytics.available(), cache=self.report_cache)
+        return report_path
+    
+    async def get_report(self, request, writer, keep_alive):
+        """Render /reports/<YYYY-MM> and send the report text"""
+        month = parse_month(request.path[len("/reports/"):])
+        await self.saved()
+        if month not in await self.blocking(self.store.months):
+            raise HTTPError(404, f"no workouts for {month}")
+        report_path = await self.blocking(self.render_report, month)
+        with open(report_path, 'rb') as f:
+            body = f.read()
+        writer.write(self.head(200, "text/plain; charset=utf-8", keep_alive, len(body)) + body)
+        await writer.drain()
+    
+    async def get_status(self, request, writer, keep_alive):
+        self.drain_failures()
+        await self.send_json(writer, 200, {"writer": self.writer.stats(),
+                                           "save_failures": list(self.save_failures)}, keep_alive)
+    
+    async def get_metrics(self, request, writer, keep_alive):
+        body = metrics.prometheus_text().encode()
+        writer.write(self.head(200, "text/plain; version=0.0.4", keep_alive, len(body)) + body)
+        await writer.drain()
+    
+    # Running
+    
+    async def serve(self, host="127.0.0.1", port=8765, ready=None):
+        """Serve until cancelled; ready(port) is called once listening"""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        port = server.sockets[0].getsockname()[1]
+        if ready is not None:
+            ready(port)
+        watcher = asyncio.create_task(self.watch_writer())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+            self.close()
+    
+    def close(self):
+        """Write queued saves and stop the worker threads"""
+        self.writer.shutdown(timeout=10)
+        self.drain_failures()
+        self.store_thread.shutdown()
+        self.report_cache.close()
+
+
+def run(base_dir, host="127.0.0.1", port=8765, backend=None):
+    """Serve the API until Ctrl+C"""
+    server = WorkoutServer(base_dir, backend)
+    
+    def ready(port):
+        print(f"Serving {base_dir} on http://{host}:{port}", flush=True)
+    
+    try:
+        asyncio.run(server.serve(host, port, ready))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,348 @@
+import json
+import os
+import uuid
+
+import metrics
+from workout_record import as_dict, decode, load_records
+from write_behind import PartialSaveError
+
+
+def date_key(workout):
+    return workout.get("date", "")
+
+
+def log_path(data_file):
+    return os.path.splitext(data_file)[0] + ".jsonl"
+
+
+def store_generation(data_file, log_file=None):
+    """Cheap change marker: size and mtime of the snapshot and the log"""
+    parts = []
+    for path in (data_file, log_file or log_path(data_file)):
+        try:
+            st = os.stat(path)
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+        except FileNotFoundError:
+            parts.append("-")
+    return "/".join(parts)
+
+
+def read_workouts(data_file, log_file=None):
+    """Every workout in a store's files as dicts, without changing the files
+    
+    For readers next to a process that may be writing (the gym's
+    leaderboard): nothing is recovered or rewritten, torn and damaged log
+    lines are just skipped. The log is read before the snapshot, so a
+    compaction in between can't lose its records.
+    """
+    log_id = None
+    logged = []
+    try:
+        with open(log_file or log_path(data_file), 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(entry, dict):
+                    continue
+                if log_id is None and not logged and "log_id" in entry:
+                    log_id = entry["log_id"]
+                else:
+                    logged.append(entry)
+    except FileNotFoundError:
+        pass
+    try:
+        with open(data_file, 'r') as f:
+            snapshot = json.load(f)
+    except (FileNotFoundError, ValueError):
+        snapshot = {}
+    workouts = snapshot.get("workouts", [])
+    # A log already folded into the snapshot is left over from a crash
+    if log_id is None or snapshot.get("compacted_log_id") != log_id:
+        workouts.extend(logged)
+    return workouts
+
+
+class WorkoutStore:
+    """Append-only workout storage.
+    
+    Workouts live in two files:
+    - a snapshot (workout_data.json) in the original {"workouts": [...]} layout
+    - a JSON Lines log (workout_data.jsonl) that every save appends one line to
+    
+    Saving only appends and fsyncs one line, so it costs the same no matter
+    how many workouts are stored. compact() folds the log into the snapshot.
+    An old workout_data.json without a log is read as a plain snapshot.
+    
+    On open, a torn last line (a write that never finished) is cut off.
+    A damaged line anywhere else is moved to workout_data.jsonl.bad and
+    the workouts after it are kept.
+    
+    Reads take the log before the snapshot, so they stay whole while the
+    writer thread compacts.
+    """
+    
+    def __init__(self, data_file, compact_every=500, log_file=None):
+        self.data_file = data_file
+        self.log_file = log_file or log_path(data_file)
+        self.bad_file = self.log_file + ".bad"
+        self.compact_every = compact_every
+        self.log_id = None
+        self.log_records = 0
+        self.log_sorted = True
+        self.last_log_date = ""
+        self.recover()
+    
+    def recover(self):
+        """Check the log: cut a torn last line, set damaged lines aside, forget compacted logs"""
+        self.log_id = None
+        self.log_records = 0
+        self.log_sorted = True
+        self.last_log_date = ""
+        if not os.path.exists(self.log_file):
+            return
+        
+        with open(self.log_file, 'rb') as f:
+            raw = f.read()
+        
+        lines = raw.splitlines(keepends=True)
+        # A last line without newline is a write that never finished
+        torn = bool(lines) and not lines[-1].endswith(b"\n")
+        if torn:
+            lines.pop()
+        
+        kept = []
+        bad = []
+        header = None
+        records = 0
+        log_sorted = True
+        last_date = ""
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                if not isinstance(entry, dict):
+                    raise ValueError("not an object")
+            except ValueError:
+                bad.append(line)
+                continue
+            if header is None and not records and "log_id" in entry:
+                header = entry
+            else:
+                records += 1
+                if date_key(entry) < last_date:
+                    log_sorted = False
+                last_date = max(last_date, date_key(entry))
+            kept.append(line)
+        
+        if bad:
+            # Keep damaged lines for a look later instead of throwing them away
+            with open(self.bad_file, 'ab') as f:
+                f.writelines(bad)
+                f.flush()
+                os.fsync(f.fileno())
+        
+        if header is None and not records:
+            # Nothing usable in the log, start over
+            os.remove(self.log_file)
+            return
+        
+        rewrite = bool(bad)
+        if header is None:
+            # The header line was damaged; the records still count
+            header = {"log_id": uuid.uuid4().hex}
+            kept.insert(0, (json.dumps(header) + "\n").encode())
+            rewrite = True
+        
+        if rewrite:
+            temp_file = self.log_file + ".tmp"
+            with open(temp_file, 'wb') as f:
+                f.writelines(kept)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.log_file)
+        elif torn:
+            with open(self.log_file, 'r+b') as f:
+                f.truncate(sum(len(line) for line in kept))
+                f.flush()
+                os.fsync(f.fileno())
+        
+        # A crash between writing the snapshot and removing the log leaves
+        # a log that is already part of the snapshot
+        snapshot = self._read_snapshot()
+        if snapshot.get("compacted_log_id") == header["log_id"]:
+            os.remove(self.log_file)
+            return
+        
+        self.log_id = header["log_id"]
+        self.log_records = records
+        self.log_sorted = log_sorted
+        self.last_log_date = last_date
+    
+    def exists(self):
+        """True if there is a snapshot or a log on disk"""
+        return os.path.exists(self.data_file) or os.path.exists(self.log_file)
+    
+    def generation(self):
+        """Cheap change marker: size and mtime of the snapshot and the log"""
+        return store_generation(self.data_file, self.log_file)
+    
+    @metrics.timed("store.read_snapshot")
+    def _read_snapshot(self, records=False):
+        """Read the snapshot file (the original workout_data.json layout)
+        
+        With records=True the workouts come back as Workout records, built
+        while the file is parsed.
+        """
+        try:
+            with open(self.data_file, 'r') as f:
+                data = load_records(f) if records else json.load(f)
+        except FileNotFoundError:
+            data = {"workouts": []}
+        except json.JSONDecodeError:
+            data = {"workouts": []}
+        data.setdefault("workouts", [])
+        return data
+    
+    def _read_log(self, records=False):
+        """(log_id, workouts) of the log as it is on disk now
+        
+        The log is never longer than compact_every records, so it is read
+        whole. It is looked for on disk rather than trusted to log_id,
+        which the writer thread sets only after its write. A line still
+        being written is left for the next read.
+        """
+        read = decode if records else json.loads
+        try:
+            with open(self.log_file, 'r') as f:
+                log_id = json.loads(next(f))["log_id"]
+                return log_id, [read(line) for line in f if line.endswith("\n")]
+        except (FileNotFoundError, StopIteration):
+            # Compacted meanwhile: the snapshot read next has it all
+            return None, []
+    
+    def _log_id_on_disk(self):
+        try:
+            with open(self.log_file, 'r') as f:
+                return json.loads(next(f))["log_id"]
+        except (FileNotFoundError, StopIteration):
+            return None
+    
+    def _read(self, records=False):
+        """(snapshot data, log workouts) that belong together
+        
+        compact() writes the snapshot before it removes the log, so the
+        log is read first. If the snapshot holds that log already its
+        workouts are dropped; if the log is gone by now, a compaction the
+        snapshot may or may not include ran in between, so read again.
+        """
+        while True:
+            log_id, logged = self._read_log(records)
+            data = self._read_snapshot(records)
+            if log_id is None:
+                return data, []
+            if data.get("compacted_log_id") == log_id:
+                return data, []
+            if self._log_id_on_disk() == log_id:
+                return data, logged
+    
+    def append(self, workout):
+        """Append one workout to the log and make it durable"""
+        self.append_many([workout])
+    
+    @metrics.timed("store.append")
+    def append_many(self, workouts):
+        """Append several workouts with a single write and fsync
+        
+        A failed write is cut off again, so trying again can't store
+        anything twice. If only the fsync fails the workouts are in the
+        log already and PartialSaveError says so (with nothing unsaved).
+        """
+        log_id = self.log_id or uuid.uuid4().hex
+        lines = [] if self.log_id else [json.dumps({"log_id": log_id}) + "\n"]
+        for workout in workouts:
+            lines.append(json.dumps(as_dict(workout), separators=(",", ":")) + "\n")
+        data = memoryview("".join(lines).encode())
+        sync_error = None
+        # Unbuffered, so a failure leaves nothing behind to be written later
+        with open(self.log_file, 'ab', buffering=0) as f:
+            end = f.seek(0, os.SEEK_END)
+            try:
+                while data:
+                    data = data[f.write(data):]
+            except BaseException:
+                f.truncate(end)
+                raise
+            try:
+                os.fsync(f.fileno())
+            except OSError as e:
+                sync_error = e
+        self.log_id = log_id
+        
+        for workout in workouts:
+            self.log_records += 1
+            if date_key(workout) < self.last_log_date:
+                self.log_sorted = False
+            self.last_log_date = max(self.last_log_date, date_key(workout))
+        if sync_error is not None:
+            raise PartialSaveError(f"written but not synced: {sync_error}", []) from sync_error
+        return len(workouts)
+    
+    def load(self):
+        """Return all data in the original {"workouts": [...]} layout"""
+        data, logged = self._read()
+        data["workouts"].extend(logged)
+        return data
+    
+    def iter_workouts(self):
+        """Yield every stored workout (as Workout records) without building one big list"""
+        data, logged = self._read(records=True)
+        yield from data["workouts"]
+        yield from logged
+    
+    def sorted_runs(self):
+        """The stored workouts as date-sorted runs, ready to be merged
+        
+        The snapshot is kept sorted by compact(), and the log is in save
+        order, which is date order unless the clock went backwards.
+        """
+        data, logged = self._read(records=True)
+        snapshot = data["workouts"]
+        snapshot.sort(key=date_key)
+        if self.log_sorted:
+            return [snapshot, logged]
+        return [snapshot, sorted(logged, key=date_key)]
+    
+    def needs_compaction(self):
+        """True once the log has grown past compact_every records"""
+        return self.log_records >= self.compact_every
+    
+    @metrics.timed("store.compact")
+    def compact(self):
+        """Fold the log into a fresh snapshot"""
+        data = self.load()
+        data["workouts"].sort(key=date_key)
+        if self.log_id is not None:
+            data["compacted_log_id"] = self.log_id
+        self._write_snapshot(data)
+        self._drop_log()
+    
+    def _write_snapshot(self, data):
+        """Write the snapshot atomically (temp file + rename)"""
+        temp_file = self.data_file + ".tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.data_file)
+    
+    def _drop_log(self):
+        """Remove the log once the snapshot holds its records"""
+        if os.path.exists(self.log_file):
+            os.remove(self.log_file)
+        self.log_id = None
+        self.log_records = 0
+        self.log_sorted = True
+        self.last_log_date = ""
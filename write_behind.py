@@ -0,0 +1,231 @@
+import queue
+import threading
+import time
+
+import metrics
+
+_STOP = object()
+
+
+class AfterSaveError(Exception):
+    """The workouts were stored, but something kept up to date from them failed
+    
+    write_batch() raises this for the summary, goals or an index, so the
+    save isn't retried (that would store the workouts twice) and isn't
+    reported as lost.
+    """
+
+
+class PartialSaveError(Exception):
+    """Only part of a batch was stored; `unsaved` are the workouts that weren't
+    
+    The stores raise this when some months were written before one
+    failed, or when the log was written but not synced (unsaved is then
+    empty). Appends aren't idempotent, so a retry must only write these.
+    """
+    
+    def __init__(self, message, unsaved):
+        super().__init__(message)
+        self.unsaved = unsaved
+
+
+def write_with_retries(write_batch, workouts, retries=3, retry_delay=0.1):
+    """write_batch(workouts), trying a failed store write again with backoff
+    
+    Returns (error, retries used). error is None when everything went
+    through, an AfterSaveError when the workouts are stored but a cache or
+    index is not, otherwise the last error of a save that never fully
+    worked (a PartialSaveError if some of the workouts are stored). After
+    a PartialSaveError only its unsaved workouts are tried again.
+    """
+    delay = retry_delay
+    for attempt in range(retries + 1):
+        try:
+            write_batch(workouts)
+            return None, attempt
+        except AfterSaveError as e:
+            return e, attempt
+        except Exception as e:
+            if isinstance(e, PartialSaveError):
+                if not e.unsaved:
+                    return AfterSaveError(f"stored, but {e}"), attempt
+                workouts = e.unsaved
+            if attempt == retries:
+                return e, attempt
+            metrics.inc("save.retries")
+            time.sleep(delay)
+            delay *= 2
+
+
+def unsaved_part(workouts, error):
+    """The workouts of a failed batch that are not stored"""
+    return error.unsaved if isinstance(error, PartialSaveError) else workouts
+
+
+class WriteBehindQueue:
+    """Saves workouts on a background thread so the window never waits on disk
+    
+    submit() only puts the workout on a queue. The worker takes whatever
+    has queued up (waiting `linger` seconds for more) and hands it to
+    write_batch() in one go, so a burst of saves costs a single durable
+    write. A failed write is tried `retries` more times, waiting
+    retry_delay, then twice as long, and so on, before the batch is given
+    up and handed to take_failures(). flush() waits until everything
+    submitted so far is written; shutdown() flushes and stops the worker.
+    """
+    
+    def __init__(self, write_batch, max_batch=500, linger=0.02, retries=3, retry_delay=0.1):
+        self.write_batch = write_batch
+        self.max_batch = max_batch
+        self.linger = linger
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.queue = queue.Queue()
+        self.condition = threading.Condition()
+        self.submitted = 0
+        self.processed = 0
+        # (workouts, error) not reported yet; an AfterSaveError means stored anyway
+        self.failed = []
+        
+        # Metrics (counted since the start, take_failures() doesn't reset them)
+        self.batches = 0
+        self.written = 0
+        self.failed_batches = 0
+        self.after_save_errors = 0
+        self.retried = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self.total_write_time = 0.0
+        
+        self.thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self.thread.start()
+    
+    def submit(self, workout):
+        """Queue one workout for saving"""
+        with self.condition:
+            self.submitted += 1
+        self.queue.put((time.perf_counter(), workout))
+    
+    def pending(self):
+        """Workouts submitted but not written yet"""
+        with self.condition:
+            return self.submitted - self.processed
+    
+    def flush(self, timeout=None):
+        """Wait until everything submitted so far is written (False on timeout)"""
+        with self.condition:
+            target = self.submitted
+            return self.condition.wait_for(lambda: self.processed >= target, timeout)
+    
+    def shutdown(self, timeout=None):
+        """Flush, then stop the worker"""
+        flushed = self.flush(timeout)
+        self.queue.put(_STOP)
+        self.thread.join(timeout)
+        return flushed
+    
+    def count_write(self, error, retries):
+        """Add one write's outcome to the failure counters"""
+        with self.condition:
+            self.retried += retries
+            if isinstance(error, AfterSaveError):
+                self.after_save_errors += 1
+            elif error is not None:
+                self.failed_batches += 1
+    
+    def take_failures(self):
+        """Return and forget the failures not reported yet (the counters stay)"""
+        with self.condition:
+            failed, self.failed = self.failed, []
+            return failed
+    
+    def _collect(self, first):
+        """The first item plus whatever else arrives within `linger` seconds"""
+        batch = [first]
+        stop = False
+        deadline = time.perf_counter() + self.linger
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    item = self.queue.get(timeout=remaining)
+                else:
+                    item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+    
+    def _run(self):
+        while True:
+            first = self.queue.get()
+            if first is _STOP:
+                return
+            batch, stop = self._collect(first)
+            workouts = [workout for _, workout in batch]
+            
+            started = time.perf_counter()
+            error, retries = write_with_retries(self.write_batch, workouts,
+                                                self.retries, self.retry_delay)
+            finished = time.perf_counter()
+            saved = error is None or isinstance(error, AfterSaveError)
+            self.count_write(error, retries)
+            
+            with self.condition:
+                if saved:
+                    self.batches += 1
+                    self.written += len(workouts)
+                    self.total_write_time += finished - started
+                    for queued_at, _ in batch:
+                        latency = finished - queued_at
+                        self.total_latency += latency
+                        self.max_latency = max(self.max_latency, latency)
+                    self.last_latency = finished - batch[-1][0]
+                if error is not None:
+                    self.failed.append((workouts if saved else unsaved_part(workouts, error), error))
+                self.processed += len(batch)
+                self.condition.notify_all()
+            if metrics.enabled:
+                if saved:
+                    metrics.observe("save.write", finished - started)
+                    for queued_at, _ in batch:
+                        metrics.observe("save.latency", finished - queued_at)
+                    metrics.inc("save.workouts", len(workouts))
+                if error is not None:
+                    metrics.inc("save.after_save_errors" if saved else "save.failed_batches")
+            if stop:
+                return
+    
+    def stats(self):
+        """Queue depth and commit latency as a dict"""
+        with self.condition:
+            return {
+                "queue_depth": self.submitted - self.processed,
+                "batches": self.batches,
+                "written": self.written,
+                "average_batch": round(self.written / self.batches, 1) if self.batches else 0,
+                "average_commit_ms": round(self.total_latency / self.written * 1000, 2) if self.written else 0,
+                "max_commit_ms": round(self.max_latency * 1000, 2),
+                "last_commit_ms": round(self.last_latency * 1000, 2),
+                "average_write_ms": round(self.total_write_time / self.batches * 1000, 2) if self.batches else 0,
+                "failed_batches": self.failed_batches,
+                "after_save_errors": self.after_save_errors,
+                "retries": self.retried,
+            }
+    
+    def stats_text(self):
+        """Queue metrics as text for a messagebox"""
+        stats = self.stats()
+        return (f"Waiting to be written: {stats['queue_depth']}\n"
+                f"Workouts written: {stats['written']} in {stats['batches']} batches "
+                f"(avg {stats['average_batch']} per batch)\n"
+                f"Commit latency: avg {stats['average_commit_ms']} ms, "
+                f"max {stats['max_commit_ms']} ms, last {stats['last_commit_ms']} ms\n"
+                f"Disk write per batch: avg {stats['average_write_ms']} ms\n"
+                f"Failed batches (not saved): {stats['failed_batches']}, "
+                f"retries: {stats['retries']}\n"
+                f"Saved, but summary/goals/index not updated: {stats['after_save_errors']}")